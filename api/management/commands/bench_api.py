@@ -0,0 +1,272 @@
+import http.client
+import platform
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import setup_databases, teardown_databases
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from common.benchmark import compare, load_results, save_results, summarize
+
+BENCH_USER = "__bench_api__"
+BENCH_PASSWORD = "Bench-Passw0rd!"
+# 名称 -> (方法, 路径)；login 含密码哈希，请求数单独配置
+ENDPOINTS = {
+    "ping": ("GET", "/api/ping/"),
+    "players": ("GET", "/api/players/?page_size=20"),
+    "search": ("GET", "/api/players/search/"),
+    "server_status": ("GET", "/api/server-status/"),
+    "cached": ("GET", "/api/cached/"),
+    "login": ("POST", "/api/login/"),
+}
+
+
+class _WSGIServer:
+    """进程内多线程 WSGI 服务器（Django runserver 同款），不输出访问日志。"""
+
+    def __init__(self):
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        class NoDelayServer(ThreadedWSGIServer):
+            # 响应头与响应体分两次写出：不关闭 Nagle 会与客户端延迟 ACK 叠加出约 40ms 的固定延迟
+            def get_request(self):
+                sock, addr = super().get_request()
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                return sock, addr
+
+        self.httpd = NoDelayServer(("127.0.0.1", 0), QuietHandler, allow_reuse_address=False)
+        self.httpd.set_app(WSGIHandler())
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+
+
+class _ASGIServer:
+    """进程内 uvicorn 服务器（需安装 uvicorn）。"""
+
+    def __init__(self):
+        try:
+            import uvicorn
+        except ImportError as e:
+            raise CommandError("ASGI 模式需要安装 uvicorn：pip install uvicorn") from e
+        from django.core.handlers.asgi import ASGIHandler
+
+        config = uvicorn.Config(ASGIHandler(), host="127.0.0.1", port=0, log_level="warning",
+                                access_log=False, lifespan="off")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise CommandError("uvicorn 启动失败")
+            time.sleep(0.01)
+        self.port = self.server.servers[0].sockets[0].getsockname()[1]
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+class _Worker:
+    """单个并发客户端：复用一条 keep-alive 连接，服务端关闭时重连。"""
+
+    def __init__(self, port):
+        self.port = port
+        self.conn = None
+        self.csrf_token = get_random_string(32)
+
+    def request(self, method, path, body=None):
+        headers = {"Host": "127.0.0.1"}
+        if body is not None:
+            body = urlencode(body)
+            # 与浏览器相同：CSRF Cookie 与请求头携带同一令牌
+            headers.update({
+                "Content-Type": "application/x-www-form-urlencoded",
+                "Cookie": f"{settings.CSRF_COOKIE_NAME}={self.csrf_token}",
+                "X-CSRFToken": self.csrf_token,
+            })
+        for attempt in (1, 2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                response.read()
+                if response.will_close:
+                    self.close()
+                return response.status
+            except (http.client.HTTPException, OSError):
+                self.close()
+                if attempt == 2:
+                    return 0
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class Command(BaseCommand):
+    help = "API 负载测试：在临时数据库中生成玩家数据，通过进程内 WSGI/ASGI 服务器并发请求各端点，输出吞吐与 p50/p95/p99"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--server", choices=["wsgi", "asgi"], default="wsgi")
+        parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="逗号分隔的端点名")
+        parser.add_argument("--requests", type=int, default=500, help="每个端点的请求数")
+        parser.add_argument("--login-requests", type=int, default=40)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--warmup", type=int, default=20, help="每个端点预热请求数（不计入结果）")
+        parser.add_argument("--seed", type=int, default=2000, help="生成的玩家数量（Faker）")
+        parser.add_argument("--use-current-db", action="store_true",
+                            help="直接使用当前数据库（默认创建并在结束后销毁临时测试库）")
+        parser.add_argument("--output", help="结果写入 JSON 文件")
+        parser.add_argument("--baseline", help="基线 JSON；任一端点回退超过阈值时命令失败")
+        parser.add_argument("--threshold", type=float, default=0.2, help="回退阈值（比例），默认 0.2")
+
+    def handle(self, *args, **options):
+        names = [n.strip() for n in options["endpoints"].split(",") if n.strip()]
+        unknown = set(names) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"未知端点：{', '.join(sorted(unknown))}")
+        old_config = None
+        self._seeded = []
+        if not options["use_current_db"]:
+            old_config = setup_databases(verbosity=0, interactive=False, aliases=set(connections))
+        try:
+            terms = self._seed(options["seed"])
+            results = self._run(names, terms, options)
+        finally:
+            if old_config is not None:
+                teardown_databases(old_config, verbosity=0)
+            else:
+                # 使用当前数据库时清理本次生成的全部玩家
+                User = get_user_model()
+                usernames = [BENCH_USER, *self._seeded]
+                for i in range(0, len(usernames), 500):
+                    User.objects.filter(username__in=usernames[i:i + 500]).delete()
+        data = {
+            "meta": {
+                "server": options["server"],
+                "concurrency": options["concurrency"],
+                "seed": options["seed"],
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "timestamp": timezone.now().isoformat(),
+            },
+            "results": results,
+        }
+        if options["output"]:
+            save_results(options["output"], data)
+            self.stdout.write(f"结果已写入 {options['output']}")
+        if options["baseline"]:
+            baseline = load_results(options["baseline"])
+            regressions = compare(results, baseline.get("results", baseline), options["threshold"])
+            if regressions:
+                raise CommandError("性能回退：\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS(f"与基线对比无回退（阈值 {options['threshold']:.0%}）"))
+
+    def _seed(self, count):
+        """生成玩家（不设置密码，避免逐个哈希），返回搜索用的昵称前缀；用户名记入 ``self._seeded`` 供清理。"""
+        User = get_user_model()
+        user = User(username=BENCH_USER)
+        user.set_password(BENCH_PASSWORD)
+        user.save()
+        if count <= 0:
+            return ["bench"]
+        try:
+            from faker import Faker
+        except ImportError as e:
+            raise CommandError("生成测试数据需要 Faker：pip install Faker（或使用 --seed 0）") from e
+        fake = Faker()
+        # 固定随机种子：数据分布与搜索词序列在各次运行间一致，结果才能与基线对比
+        Faker.seed(0)
+        random.seed(0)
+        now = timezone.now()
+        users, seen = [], {BENCH_USER}
+        while len(users) < count:
+            username = f"{fake.user_name()[:12]}{len(users)}"
+            if username in seen:
+                continue
+            seen.add(username)
+            users.append(User(
+                username=username,
+                nickname=fake.first_name()[:16],
+                qq=str(10000 + len(users)),
+                password="!",
+                is_whitelisted=random.random() < 0.7,
+                created_at=now,
+            ))
+        self._seeded = [u.username for u in users]
+        User.objects.bulk_create(users, batch_size=500)
+        return sorted({u.nickname[:2].lower() for u in users if len(u.nickname) >= 2})
+
+    def _run(self, names, terms, options):
+        overrides = override_settings(
+            API_RATE_LIMITS=[],  # 避免基准流量被限流截断
+            ALLOWED_HOSTS=["127.0.0.1"],
+            INTERNAL_IPS=[],  # 不注入调试工具栏
+        )
+        overrides.enable()
+        server = (_ASGIServer if options["server"] == "asgi" else _WSGIServer)()
+        try:
+            self.stdout.write(
+                f"{'endpoint':<14} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'errors':>7}"
+            )
+            results = {}
+            for name in names:
+                total = options["login_requests"] if name == "login" else options["requests"]
+                self._drive(server.port, name, terms, options["warmup"], options["concurrency"])
+                latencies, elapsed, errors = self._drive(server.port, name, terms, total, options["concurrency"])
+                results[name] = summary = summarize(latencies, elapsed, errors)
+                self.stdout.write(
+                    f"{name:<14} {summary['rps']:>8.1f} {summary['p50_ms']:>7.2f}ms {summary['p95_ms']:>7.2f}ms "
+                    f"{summary['p99_ms']:>7.2f}ms {summary['max_ms']:>7.2f}ms {errors:>7}"
+                )
+            return results
+        finally:
+            server.stop()
+            overrides.disable()
+
+    def _drive(self, port, name, terms, total, concurrency):
+        method, path = ENDPOINTS[name]
+        body = {"username": BENCH_USER, "password": BENCH_PASSWORD} if name == "login" else None
+        shares = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+
+        def worker(n):
+            client, latencies, errors = _Worker(port), [], 0
+            for _ in range(n):
+                target = f"{path}?{urlencode({'q': random.choice(terms)})}" if name == "search" else path
+                start = time.perf_counter()
+                status = client.request(method, target, body)
+                latencies.append(time.perf_counter() - start)
+                errors += not 200 <= status < 300
+            client.close()
+            return latencies, errors
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            parts = list(pool.map(worker, [s for s in shares if s]))
+        elapsed = time.perf_counter() - start
+        return [v for p, _ in parts for v in p], elapsed, sum(e for _, e in parts)
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+
+from common.benchmark import percentile
+
+BENCH_USER = "__bench_handlers__"
+BENCH_PASSWORD = "Bench-Passw0rd!"
+
+
+class Command(BaseCommand):
+    help = "进程内对比 WSGI 与 ASGI 处理链在 /api/ping/ 与 /api/login/ 上的吞吐与延迟"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="ping 请求数")
+        parser.add_argument("--login-requests", type=int, default=40, help="login 请求数（含密码哈希，较慢）")
+        parser.add_argument("--concurrency", type=int, default=16)
+
+    def _wsgi(self, method, path, data, total, concurrency):
+        def worker(n):
+            client, latencies, errors = Client(), [], 0
+            for _ in range(n):
+                start = time.perf_counter()
+                response = getattr(client, method)(path, data)
+                latencies.append(time.perf_counter() - start)
+                errors += not 200 <= response.status_code < 300
+            return latencies, errors
+
+        shares = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            parts = list(pool.map(worker, shares))
+        elapsed = time.perf_counter() - start
+        return [v for part, _ in parts for v in part], sum(e for _, e in parts), elapsed
+
+    def _asgi(self, method, path, data, total, concurrency):
+        async def run():
+            sem = asyncio.Semaphore(concurrency)
+            client = AsyncClient()
+
+            async def one():
+                async with sem:
+                    start = time.perf_counter()
+                    response = await getattr(client, method)(path, data)
+                    return time.perf_counter() - start, not 200 <= response.status_code < 300
+
+            start = time.perf_counter()
+            results = await asyncio.gather(*(one() for _ in range(total)))
+            elapsed = time.perf_counter() - start
+            return [latency for latency, _ in results], sum(error for _, error in results), elapsed
+
+        return asyncio.run(run())
+
+    def _report(self, label, latencies, errors, elapsed):
+        self.stdout.write(
+            f"{label:<14} {len(latencies) / elapsed:8.1f} req/s  "
+            f"p50 {percentile(latencies, 50) * 1000:7.1f}ms  p99 {percentile(latencies, 99) * 1000:7.1f}ms  "
+            f"errors {errors}"
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        user = User(username=BENCH_USER)
+        user.set_password(BENCH_PASSWORD)
+        user.save()
+        cases = [
+            ("ping", "get", "/api/ping/", {}, options["requests"]),
+            ("login", "post", "/api/login/", {"username": BENCH_USER, "password": BENCH_PASSWORD},
+             options["login_requests"]),
+        ]
+        failed = []
+        try:
+            # 关闭通用限流与登录限流，避免基准流量被 429 截断；测试客户端使用 testserver 主机名
+            with override_settings(API_RATE_LIMITS=[], LOGIN_ATTEMPT_LIMIT=10 ** 9, ALLOWED_HOSTS=["testserver"]):
+                for name, method, path, data, total in cases:
+                    for mode, runner in (("WSGI", self._wsgi), ("ASGI", self._asgi)):
+                        latencies, errors, elapsed = runner(method, path, data, total, options["concurrency"])
+                        self._report(f"{mode} {name}", latencies, errors, elapsed)
+                        if errors:
+                            failed.append(f"{mode} {name}: {errors}/{total}")
+        finally:
+            user.delete()
+        # 非 2xx 响应的耗时不代表正常处理路径，结果不可作为基准
+        if failed:
+            raise CommandError("存在非 2xx 响应：" + "，".join(failed))
@@ -1,4 +1,4 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
@@ -48,6 +48,21 @@ class LoginBackendTests(TestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertTrue(resp.json()['success'])
 
+    def test_failed_login_hashes_once(self):
+        from django.contrib.auth import authenticate
+        from players.management.commands.bench_login import count_password_hashes
+        for username in ('userA', '123456', 'nobody'):
+            with count_password_hashes() as counter:
+                self.assertIsNone(authenticate(None, username=username, password='wrong'))
+            self.assertEqual(counter['n'], 1, username)
+
+    def test_username_preferred_over_qq(self):
+        other = User(username='123456')
+        other.set_password('Other-Passw0rd!')
+        other.save()
+        from django.contrib.auth import authenticate
+        self.assertEqual(authenticate(None, username='123456', password='Other-Passw0rd!'), other)
+
     def test_login_throttle(self):
         # 测试用：降低限制阈值
         settings.LOGIN_ATTEMPT_LIMIT = 3
@@ -59,6 +74,46 @@ class LoginBackendTests(TestCase):
         self.assertFalse(resp.json()['success'])
         cache.clear()
 
+    async def test_concurrent_logins_do_not_consume_quota(self):
+        import asyncio
+        from django.test import AsyncClient, override_settings
+        from api.views import _login_limiter
+        await cache.aclear()
+        with override_settings(LOGIN_ATTEMPT_LIMIT=3):
+            c = AsyncClient()
+            # 并发的失败请求全部计数（原子累加，不丢失）
+            responses = await asyncio.gather(*(
+                c.post('/api/login/', {'username': 'userA', 'password': 'wrong'}) for _ in range(2)
+            ))
+            self.assertEqual([r.status_code for r in responses], [401, 401])
+            user_result, _ = await _login_limiter().apeek('user:userA', 'ip:127.0.0.1')
+            self.assertEqual(user_result.count, 2)
+            # 未超限时并发的正确登录全部成功
+            responses = await asyncio.gather(*(
+                AsyncClient().post('/api/login/', {'username': 'userA', 'password': 'Passw0rd!'}) for _ in range(8)
+            ))
+            self.assertEqual({r.status_code for r in responses}, {200})
+            # 超限后被拒绝的请求不占用配额
+            for _ in range(3):
+                await c.post('/api/login/', {'username': 'userA', 'password': 'wrong'})
+            for _ in range(3):
+                resp = await c.post('/api/login/', {'username': 'userA', 'password': 'wrong'})
+                self.assertEqual(resp.status_code, 429)
+            user_result, _ = await _login_limiter().apeek('user:userA', 'ip:127.0.0.1')
+            self.assertEqual(user_result.count, 3)
+        await cache.aclear()
+
+    def test_successful_login_not_counted(self):
+        from django.test import override_settings
+        from api.views import _login_limiter
+        cache.clear()
+        with override_settings(LOGIN_ATTEMPT_LIMIT=3):
+            resp = self.client.post('/api/login/', {'username': 'userA', 'password': 'Passw0rd!'})
+            self.assertEqual(resp.status_code, 200)
+            user_result, ip_result = _login_limiter().peek('user:userA', 'ip:127.0.0.1')
+        self.assertEqual((user_result.count, ip_result.count), (0, 0))
+        cache.clear()
+
 class ImageUploadValidationTests(TestCase):
     @staticmethod
     def _generate_image(fmt='PNG', size=(64,64)):
@@ -84,6 +139,80 @@ class ImageUploadValidationTests(TestCase):
         with self.assertRaises(Exception):
             validate_image(f)
 
+    def test_header_parsing_matches_pillow(self):
+        from common.upload_validators import parse_image_header
+        for fmt in ('PNG', 'JPEG', 'WEBP', 'GIF'):
+            data = self._generate_image(fmt, size=(123, 45))
+            self.assertEqual(parse_image_header(data), (fmt, 123, 45))
+        bio = BytesIO()
+        Image.new('RGBA', (77, 33)).save(bio, format='WEBP', lossless=True)
+        self.assertEqual(parse_image_header(bio.getvalue()), ('WEBP', 77, 33))
+
+    def test_decompression_bomb_rejected_by_header(self):
+        import struct
+        from django.core.exceptions import ValidationError
+        from common.upload_validators import validate_image
+        settings.ALLOWED_IMAGE_FORMATS = ['JPEG','PNG','WEBP']
+        # 仅构造文件头：声明 100000x100000 像素
+        data = b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + struct.pack('>II', 100000, 100000) + b'\x08\x02\x00\x00\x00'
+        f = SimpleUploadedFile('bomb.png', data, content_type='image/png')
+        with self.assertRaises(ValidationError):
+            validate_image(f)
+
+    def test_pil_fallback_for_other_allowed_formats(self):
+        from django.core.exceptions import ValidationError
+        from django.test import override_settings
+        from common.upload_validators import validate_image
+        data = self._generate_image('BMP', size=(40, 30))
+        with override_settings(ALLOWED_IMAGE_FORMATS=['PNG', 'BMP']):
+            validate_image(SimpleUploadedFile('a.bmp', data, content_type='image/bmp'))
+        with override_settings(ALLOWED_IMAGE_FORMATS=['PNG', 'BMP'], MEDIA_MAX_IMAGE_WIDTH=32):
+            with self.assertRaises(ValidationError):
+                validate_image(SimpleUploadedFile('a.bmp', data, content_type='image/bmp'))
+        with override_settings(ALLOWED_IMAGE_FORMATS=['PNG']):
+            with self.assertRaises(ValidationError):
+                validate_image(SimpleUploadedFile('a.bmp', data, content_type='image/bmp'))
+
+    def test_admin_form_reports_dropped_upload(self):
+        from django.contrib import admin
+        from django.test import RequestFactory
+        user = User.objects.create(username='uploader')
+        request = RequestFactory().post('/admin/players/user/')
+        request.user = User.objects.create_superuser('root', 'root@example.com', 'Passw0rd!x')
+        request.upload_errors = {'avatar': '图片大小超过限制：5MB'}
+        form_class = admin.site._registry[User].get_form(request, user)
+        form = form_class({'username': 'uploader'}, {}, instance=user)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['avatar'], ['图片大小超过限制：5MB'])
+
+    def test_model_validator_skips_stored_avatar(self):
+        from django.contrib.auth import get_user_model
+        from django.core.exceptions import ValidationError
+        settings.ALLOWED_IMAGE_FORMATS = ['JPEG','PNG','WEBP']
+        # 已保存但存储中缺失的头像：编辑其他字段不应读取文件
+        user = get_user_model()(username='stored_avatar', avatar='avatars/missing.png')
+        user.full_clean(exclude=['password'])
+        # 新上传的文件仍然校验
+        user.avatar = SimpleUploadedFile('bad.png', b'not an image at all', content_type='image/png')
+        with self.assertRaises(ValidationError):
+            user.full_clean(exclude=['password'])
+
+    def test_ckeditor_upload_rejected_while_streaming(self):
+        import tempfile
+        from django.test import override_settings
+        settings.ALLOWED_IMAGE_FORMATS = ['JPEG','PNG','WEBP']
+        User.objects.create_superuser('editor', password='Passw0rd!')
+        c = Client()
+        c.login(username='editor', password='Passw0rd!')
+        with override_settings(MEDIA_MAX_IMAGE_WIDTH=100, MEDIA_ROOT=tempfile.mkdtemp()):
+            big = SimpleUploadedFile('big.png', self._generate_image('PNG', size=(200, 50)), content_type='image/png')
+            resp = c.post('/ckeditor/upload/', {'upload': big})
+            self.assertEqual(resp.json()['uploaded'], 0)
+            self.assertIn('尺寸', resp.json()['error']['message'])
+            ok = SimpleUploadedFile('ok.png', self._generate_image('PNG', size=(64, 64)), content_type='image/png')
+            resp = c.post('/ckeditor/upload/', {'upload': ok})
+            self.assertEqual(resp.json()['uploaded'], '1')
+
 class CacheTests(TestCase):
     def test_cached_endpoint(self):
         c = Client()
@@ -101,3 +230,262 @@ class ApiExceptionMiddlewareTests(TestCase):
         self.assertEqual(resp.status_code, 500)
         payload = json.loads(resp.content.decode('utf-8'))
         self.assertFalse(payload['success'])
+
+class ServerStatusEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_snapshot_endpoint(self):
+        import time
+        from django.test import override_settings
+        from common.server_status import SNAPSHOT_KEY
+        cache.set(SNAPSHOT_KEY.format(name='main'), {"name": "main", "online": True, "players_online": 2,
+                                                      "updated_at": time.time(), "error": None}, None)
+        with override_settings(MC_SERVERS="main=127.0.0.1:25565,backup=127.0.0.1:25566"):
+            resp = Client().get('/api/server-status/')
+            data = resp.json()['data']
+            self.assertEqual(data[0]['players_online'], 2)
+            self.assertIsNone(data[1]['online'])
+            resp = Client().get('/api/server-status/?server=missing')
+            self.assertEqual(resp.status_code, 404)
+
+class PlayerListPaginationTests(TestCase):
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        now = timezone.now()
+        for i in range(7):
+            User.objects.create(username=f'p{i}', created_at=now - timedelta(minutes=i))
+        User.objects.create(username='hidden', is_active=False, created_at=now)
+
+    def test_forward_and_backward(self):
+        c = Client()
+        r1 = c.get('/api/players/', {'page_size': 3}).json()
+        self.assertEqual([p['name'] for p in r1['data']], ['p0', 'p1', 'p2'])
+        self.assertIsNone(r1['prev'])
+        r2 = c.get('/api/players/', {'page_size': 3, 'cursor': r1['next']}).json()
+        self.assertEqual([p['name'] for p in r2['data']], ['p3', 'p4', 'p5'])
+        r3 = c.get('/api/players/', {'page_size': 3, 'cursor': r2['next']}).json()
+        self.assertEqual([p['name'] for p in r3['data']], ['p6'])
+        self.assertIsNone(r3['next'])
+        back = c.get('/api/players/', {'page_size': 3, 'cursor': r2['prev']}).json()
+        self.assertEqual([p['name'] for p in back['data']], ['p0', 'p1', 'p2'])
+        self.assertIsNone(back['prev'])
+
+    def test_tampered_cursor(self):
+        resp = Client().get('/api/players/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(resp.status_code, 400)
+        self.assertFalse(resp.json()['success'])
+
+class RequestTimingTests(TestCase):
+    def test_server_timing_header(self):
+        cache.clear()
+        resp = Client().get('/api/players/')
+        header = resp['Server-Timing']
+        self.assertIn('total;dur=', header)
+        self.assertRegex(header, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertRegex(header, r'cache;dur=[\d.]+;desc="\d+ hit \d+ miss"')
+
+    def test_slow_request_logged(self):
+        from django.test import override_settings
+        with override_settings(SLOW_REQUEST_THRESHOLD_MS=0.0001):
+            with self.assertLogs('app', level='WARNING') as logs:
+                Client().get('/api/players/')
+        self.assertIn('慢请求', logs.output[0])
+        self.assertIn('slowest_sql', logs.output[0])
+
+class AsgiApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User(username='asyncUser', qq='654321')
+        user.set_password('Passw0rd!')
+        user.save()
+
+    async def test_async_ping_and_headers(self):
+        from django.test import AsyncClient
+        resp = await AsyncClient().get('/api/ping/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.json()['data']['pong'])
+        self.assertEqual(resp['X-Frame-Options'], 'DENY')
+        self.assertIn('total;dur=', resp['Server-Timing'])
+
+    async def test_async_login(self):
+        from django.test import AsyncClient
+        c = AsyncClient()
+        resp = await c.post('/api/login/', {'username': '654321', 'password': 'wrong'})
+        self.assertEqual(resp.status_code, 401)
+        resp = await c.post('/api/login/', {'username': '654321', 'password': 'Passw0rd!'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['data']['username'], 'asyncUser')
+
+    def test_custom_middleware_is_dual_mode(self):
+        from common.api_middleware import ApiExceptionMiddleware
+        from common.compression import CompressionMiddleware
+        from common.log import RequestIDMiddleware
+        from common.ratelimit import RateLimitMiddleware
+        from common.staticfiles import PrecompressedStaticMiddleware
+        from common.timing import RequestTimingMiddleware
+        from mysite.middleware import SecurityHeadersMiddleware
+        for mw in (ApiExceptionMiddleware, RateLimitMiddleware, RequestTimingMiddleware, SecurityHeadersMiddleware,
+                   RequestIDMiddleware, CompressionMiddleware, PrecompressedStaticMiddleware):
+            self.assertTrue(mw.sync_capable and mw.async_capable, mw.__name__)
+
+
+class ResponseCompressionTests(TestCase):
+    def setUp(self):
+        User.objects.bulk_create([User(username=f'zip{i}', nickname=f'Nick{i}') for i in range(60)])
+
+    def test_large_json_compressed_small_not(self):
+        import gzip
+        resp = self.client.get('/api/players/?page_size=50', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', resp['Vary'])
+        self.assertEqual(len(json.loads(gzip.decompress(resp.content))['data']), 50)
+        resp = self.client.get('/api/ping/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(resp.has_header('Content-Encoding'))
+
+    def test_secret_bearing_responses_not_compressed(self):
+        user = User(username='zipper')
+        user.set_password('Passw0rd!')
+        user.save()
+        resp = self.client.post('/api/login/', {'username': 'zipper', 'password': 'Passw0rd!'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(resp.has_header('Content-Encoding'))
+        # 已登录请求：gzip 头部带随机长度文件名（FNAME）
+        resp = self.client.get('/api/players/?page_size=50', HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertTrue(resp.content[3] & 0x08)
+
+    def test_streaming_compressed_per_chunk(self):
+        import gzip
+        import zlib
+        from django.http import StreamingHttpResponse
+        from django.test import RequestFactory
+        from common.compression import CompressionMiddleware
+        chunks = [json.dumps({'i': i, 'pad': 'x' * 500}).encode() for i in range(20)]
+        middleware = CompressionMiddleware(lambda r: StreamingHttpResponse(iter(chunks), content_type='application/json'))
+        resp = middleware(RequestFactory().get('/api/x/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        parts = list(resp.streaming_content)
+        # 每个输入块都立即产出可解压的数据
+        decoder = zlib.decompressobj(31)
+        self.assertEqual(decoder.decompress(parts[0]), chunks[0])
+        self.assertEqual(gzip.decompress(b''.join(parts)), b''.join(chunks))
+
+
+    def test_file_responses_not_compressed(self):
+        import io
+        from django.http import FileResponse, HttpResponse
+        from django.test import RequestFactory
+        from common.compression import CompressionMiddleware
+        body = b'{"pad": "' + b'x' * 4096 + b'"}'
+        request = RequestFactory().get('/downloads/data.json', HTTP_ACCEPT_ENCODING='gzip')
+        resp = CompressionMiddleware(lambda r: FileResponse(io.BytesIO(body), content_type='application/json'))(request)
+        self.assertFalse(resp.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(resp.streaming_content), body)
+
+        def ranged(r):
+            response = HttpResponse(body, content_type='application/json')
+            response['Accept-Ranges'] = 'bytes'
+            return response
+        resp = CompressionMiddleware(ranged)(request)
+        self.assertFalse(resp.has_header('Content-Encoding'))
+        self.assertEqual(resp['Accept-Ranges'], 'bytes')
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create(username=f'etag{i}') for i in range(3)]
+
+    def test_list_not_modified_until_change(self):
+        resp = self.client.get('/api/players/')
+        etag = resp['ETag']
+        self.assertIn('no-cache', resp['Cache-Control'])
+        # 命中时只执行一次聚合查询，不分页、不序列化
+        with self.assertNumQueries(1):
+            resp = self.client.get('/api/players/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+
+        self.users[0].nickname = 'Changed'
+        self.users[0].save()
+        resp = self.client.get('/api/players/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        etag = resp['ETag']
+        # 删除不改变其余行的 updated_at，由行数体现
+        self.users[1].delete()
+        self.assertEqual(self.client.get('/api/players/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    async def test_detail_validators_and_async_view(self):
+        from django.test import RequestFactory
+        from common.conditional import conditional
+        from common.responses import json_success
+        user = self.users[2]
+
+        @conditional(lambda request, pk: User.objects.get(pk=pk))
+        async def detail(request, pk):
+            return json_success({'id': pk})
+
+        resp = await detail(RequestFactory().get('/'), user.pk)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.has_header('Last-Modified'))
+        resp = await detail(RequestFactory().get('/', HTTP_IF_MODIFIED_SINCE=resp['Last-Modified']), user.pk)
+        self.assertEqual(resp.status_code, 304)
+
+
+class BenchmarkSuiteTests(TestCase):
+    def test_compare_flags_regressions(self):
+        from common.benchmark import compare, summarize
+        base = summarize([0.010] * 100, 1.0)
+        self.assertEqual(compare({'ping': base}, {'ping': base}), [])
+        slower = summarize([0.020] * 50, 1.0, errors=1)
+        problems = compare({'ping': slower, 'new': slower}, {'ping': base}, threshold=0.2)
+        self.assertEqual(len(problems), 3)  # 吞吐、p95、错误；基线中没有的端点忽略
+        self.assertTrue(all(p.startswith('ping:') for p in problems))
+
+    def test_command_runs_in_process_server_and_checks_baseline(self):
+        import os
+        import shutil
+        import tempfile
+        from django.core.management import call_command, CommandError
+        from io import StringIO
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        output = os.path.join(tmp, 'bench.json')
+        options = dict(use_current_db=True, seed=0, endpoints='ping,cached', requests=20, warmup=0,
+                       concurrency=2, stdout=StringIO())
+        call_command('bench_api', output=output, **options)
+        with open(output) as fp:
+            results = json.load(fp)['results']
+        self.assertEqual(set(results), {'ping', 'cached'})
+        self.assertEqual(results['ping']['requests'], 20)
+        self.assertEqual(results['ping']['errors'], 0)
+        # 把基线吞吐调到不可能达到的值，命令应失败
+        results['ping']['rps'] = 10 ** 9
+        with open(output, 'w') as fp:
+            json.dump({'results': results}, fp)
+        with self.assertRaises(CommandError):
+            call_command('bench_api', baseline=output, **options)
+        self.assertFalse(get_user_model().objects.filter(username='__bench_api__').exists())
+
+    def test_seeded_players_removed_from_current_db(self):
+        from django.core.management import call_command
+        from io import StringIO
+        before = get_user_model().objects.count()
+        call_command('bench_api', use_current_db=True, seed=30, endpoints='ping', requests=5, warmup=0,
+                     concurrency=1, stdout=StringIO())
+        self.assertEqual(get_user_model().objects.count(), before)
+
+
+class HandlerBenchTests(TransactionTestCase):
+    # 测试客户端在多个线程中各用独立连接，用户需真实提交
+    def test_handler_bench_counts_errors(self):
+        from unittest import mock
+        from django.core.management import call_command, CommandError
+        from io import StringIO
+        out = StringIO()
+        call_command('bench_handlers', requests=6, login_requests=4, concurrency=2, stdout=out)
+        self.assertEqual(out.getvalue().count('errors 0'), 4)
+        # 非 2xx 响应计为错误，命令失败
+        with mock.patch.object(get_user_model(), 'set_password', lambda user, raw: user.set_unusable_password()), \
+                self.assertRaises(CommandError):
+            call_command('bench_handlers', requests=2, login_requests=2, concurrency=1, stdout=StringIO())
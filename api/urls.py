@@ -1,8 +1,11 @@
 from django.urls import path
-from .views import ping, login_api, cached_time
+from .views import ping, login_api, cached_time, server_status, player_list, player_search
 
 urlpatterns = [
     path('ping/', ping, name='api_ping'),
     path('login/', login_api, name='api_login'),
     path('cached/', cached_time, name='api_cached'),
+    path('players/', player_list, name='api_player_list'),
+    path('players/search/', player_search, name='api_player_search'),
+    path('server-status/', server_status, name='api_server_status'),
 ]
\ No newline at end of file
@@ -1,50 +1,81 @@
 from django.views.decorators.http import require_GET, require_POST
-from django.contrib.auth import authenticate, login
-from django.core.cache import cache
-from django.views.decorators.cache import cache_page
+from django.contrib.auth import aauthenticate, alogin
 from django.http import HttpRequest
 from django.conf import settings
+from common.compression import no_compress
+from common.conditional import conditional
 from common.responses import json_success, json_error
+from common.ratelimit import RateLimiter, client_ip
+from common.server_status import aget_snapshot, aget_snapshots
+from common.pagination import json_cursor_page
+from common.tagged_cache import cache_view
+from players.models import User
+from players.search import player_index, player_summary
 
 @require_GET
-def ping(request: HttpRequest):  # 健康检测端点
+async def ping(request: HttpRequest):  # 健康检测端点（异步，ASGI 下无线程切换）
     return json_success({"pong": True, "method": request.method, "path": request.path})
 
 
-def _attempt_keys(username, ip):  # 生成用户与 IP 级别的限制键
-    return f"login:attempts:user:{username}", f"login:attempts:ip:{ip}"
+def _login_limiter():  # 用户与 IP 共用窗口（锁定分钟数），IP 上限为用户的两倍；非 Redis 后端也按滑动窗口计数
+    period = settings.LOGIN_LOCKOUT_MINUTES * 60
+    return RateLimiter((settings.LOGIN_ATTEMPT_LIMIT, period), prefix="login:attempts", sliding=True)
 
 
+@no_compress
 @require_POST
-def login_api(request: HttpRequest):  # 登录接口（支持用户名或 QQ），带双维度限流
+async def login_api(request: HttpRequest):  # 登录接口（支持用户名或 QQ），带双维度限流；异步缓存/ORM，哈希在独立线程池
     username = request.POST.get("username")
     password = request.POST.get("password")
-    client_ip = request.META.get("REMOTE_ADDR", "0.0.0.0")
 
     if not username or not password:
         return json_error("缺少用户名或密码", status=400)
 
-    user_key, ip_key = _attempt_keys(username, client_ip)
-    user_attempts = cache.get(user_key, 0)
-    ip_attempts = cache.get(ip_key, 0)
-
-    if user_attempts >= settings.LOGIN_ATTEMPT_LIMIT or ip_attempts >= settings.LOGIN_ATTEMPT_LIMIT * 2:
+    limiter = _login_limiter()
+    idents = (f"user:{username}", f"ip:{client_ip(request)}")
+    limits = [settings.LOGIN_ATTEMPT_LIMIT, settings.LOGIN_ATTEMPT_LIMIT * 2]
+    # 只读检查，不占用配额：被拒绝（429）与成功的登录都不计数
+    if any(r.limited for r in await limiter.apeek(*idents, limits=limits)):
         return json_error(f"登录失败过多，请 {settings.LOGIN_LOCKOUT_MINUTES} 分钟后再试", status=429)
 
-    user = authenticate(request, username=username, password=password)
+    user = await aauthenticate(request, username=username, password=password)
     if user is None:
-        cache.set(user_key, user_attempts + 1, timeout=settings.LOGIN_LOCKOUT_MINUTES * 60)
-        cache.set(ip_key, ip_attempts + 1, timeout=settings.LOGIN_LOCKOUT_MINUTES * 60)
-        remaining = max(0, settings.LOGIN_ATTEMPT_LIMIT - (user_attempts + 1))
-        return json_error(f"用户名或密码错误，剩余尝试次数：{remaining}", status=401)
-
-    cache.delete(user_key)
-    # 保留 IP 统计用于行为分析（可选：减少其计数）
-    login(request, user)
+        user_result, _ = await limiter.ahit(*idents, limits=limits)  # 仅失败计数，原子累加，并发下不丢计数
+        return json_error(f"用户名或密码错误，剩余尝试次数：{user_result.remaining}", status=401)
+
+    await limiter.areset(idents[0])
+    # 保留 IP 统计用于行为分析
+    await alogin(request, user)
     return json_success({"username": user.get_username(), "id": user.pk})
 
 @require_GET
-@cache_page(60)  # 缓存 60 秒示例端点，用于演示视图缓存
+@conditional(lambda request: User.objects.filter(is_active=True))  # 列表未变化时直接 304，不再分页与序列化
+def player_list(request: HttpRequest):  # 玩家列表（游标分页：?cursor=&page_size=）
+    qs = User.objects.only("id", "username", "nickname", "avatar", "avatar_variants", "is_whitelisted", "created_at")
+    return json_cursor_page(request, qs, player_summary)
+
+@require_GET
+def player_search(request: HttpRequest):  # 玩家搜索（?q=&limit=&fuzzy=1），进程内前缀索引；QQ 号仅对管理员可搜
+    try:
+        limit = min(int(request.GET.get("limit", settings.PLAYER_SEARCH_LIMIT)), settings.PLAYER_SEARCH_MAX_LIMIT)
+    except ValueError:
+        return json_error("limit 必须为整数", status=400)
+    fuzzy = request.GET.get("fuzzy", "").lower() in {"1", "true", "yes"}
+    pks = player_index.search(request.GET.get("q", ""), max(1, limit), fuzzy=fuzzy, with_qq=request.user.is_staff)
+    return json_success(player_index.summaries(pks))
+
+@require_GET
+async def server_status(request: HttpRequest):  # 游戏服务器状态快照（后台轮询写入缓存，接口只读缓存）
+    name = request.GET.get("server")
+    if name:
+        snapshot = await aget_snapshot(name)
+        if snapshot is None:
+            return json_error("暂无该服务器状态", status=404)
+        return json_success(snapshot)
+    return json_success(await aget_snapshots())
+
+@require_GET
+@cache_view(60, tags=["demo:cached"])  # 缓存 60 秒示例端点，用于演示带标签的视图缓存
 def cached_time(request: HttpRequest):
     import time
     return json_success({"ts": time.time(), "method": request.method, "path": request.path})
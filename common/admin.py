@@ -0,0 +1,101 @@
+"""后台通用组件：估算计数分页器与批量更新。
+
+大表的 changelist 每次加载都要 ``COUNT(*)``；``EstimatedCountPaginator`` 优先读取数据库统计信息
+（PostgreSQL 的 ``pg_class.reltuples``/``EXPLAIN``、MySQL 的 ``information_schema``、
+SQLite 的 ``sqlite_stat1``），估算值低于 ``ADMIN_ESTIMATED_COUNT_THRESHOLD`` 时才精确计数。
+估算值可能略大于实际行数，末页可能不足一页或为空。
+``UploadErrorsAdminMixin`` 让后台表单回显上传阶段被丢弃的图片原因。
+"""
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .forms import UploadErrorsFormMixin
+from .tagged_cache import invalidate_tags, model_tags
+
+
+def _table_estimate(connection, table):
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)", [table])
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        elif connection.vendor == "sqlite":
+            # 需执行过 ANALYZE；每行 stat 的第一个数为表行数
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+        else:
+            return None
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None and row[0] >= 0 else None
+
+
+def _plan_estimate(connection, queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            return int(plan[0]["Plan"]["Plan Rows"])
+        if connection.vendor == "mysql":
+            cursor.execute(f"EXPLAIN {sql}", params)
+            columns = [c[0].lower() for c in cursor.description]
+            row = cursor.fetchone()
+            return int(row[columns.index("rows")]) if row else None
+    return None
+
+
+def estimate_count(queryset):
+    """返回查询结果行数的估算值；数据库不提供统计信息时返回 None。"""
+    connection = connections[queryset.db]
+    try:
+        if not queryset.query.where and not queryset.query.distinct:
+            return _table_estimate(connection, queryset.model._meta.db_table)
+        return _plan_estimate(connection, queryset)
+    except (DatabaseError, LookupError, ValueError, TypeError):
+        return None
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, "query"):
+            return super().count
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < getattr(settings, "ADMIN_ESTIMATED_COUNT_THRESHOLD", 10000):
+            return super().count
+        return estimate
+
+
+def bulk_update(queryset, **values):
+    """单条 ``UPDATE`` 批量修改，不逐行触发模型信号；同时刷新 ``updated_at`` 并失效该模型的缓存标签。"""
+    model = queryset.model
+    if any(f.name == "updated_at" for f in model._meta.concrete_fields):
+        values.setdefault("updated_at", timezone.now())
+    # 先取出受影响的主键：单条缓存（``label:pk``）与集合缓存需一并失效（一次 ``set_many``）
+    pks = list(queryset.values_list("pk", flat=True))
+    updated = queryset.update(**values)
+    if updated:
+        tags = dict.fromkeys(tag for pk in pks for tag in model_tags(model, pk))
+        invalidate_tags(*(tags or [f"{model._meta.label_lower}:*"]))
+    return updated
+
+
+class UploadErrorsAdminMixin:
+    """后台表单回显上传流阶段被丢弃的文件原因（见 ``ImageUploadLimitHandler``），而不是当作未上传直接保存。"""
+
+    def get_form(self, request, obj=None, **kwargs):
+        form = super().get_form(request, obj, **kwargs)
+        return type(form.__name__, (UploadErrorsFormMixin, form), {"upload_request": request})
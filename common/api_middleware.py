@@ -1,14 +1,26 @@
 import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import JsonResponse
-from django.utils.deprecation import MiddlewareMixin
 
-class ApiExceptionMiddleware(MiddlewareMixin):
-    """统一拦截 API 异常，返回规范化 JSON 响应。"""
+class ApiExceptionMiddleware:
+    """统一拦截 API 异常，返回规范化 JSON 响应。
+
+    同时支持同步与异步调用链；``process_exception`` 仅在视图抛出异常时由 Django 调用。
+    """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
         # 使用实例级日志器避免被 提示方法可设为 static
         self.logger = logging.getLogger(__name__)
-        super().__init__(get_response)
+
+    def __call__(self, request):
+        # 异步模式下 get_response 返回协程，直接交由上层 await
+        return self.get_response(request)
 
     def process_exception(self, request, exception):
         # 若为 API 请求或客户端期望 JSON，则返回统一错误格式
@@ -16,4 +28,4 @@ class ApiExceptionMiddleware(MiddlewareMixin):
         if wants_json:
             self.logger.exception("API 异常: %s", exception)
             return JsonResponse({"success": False, "data": None, "message": str(exception)}, status=500)
-        return None
\ No newline at end of file
+        return None
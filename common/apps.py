@@ -5,3 +5,5 @@ class CommonConfig(AppConfig):
     name = "common"
     verbose_name = "公共组件"
 
+    def ready(self):
+        from . import signals  # noqa: F401
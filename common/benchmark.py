@@ -0,0 +1,54 @@
+"""基准测试通用工具：延迟分位数、结果汇总与基线对比。"""
+import json
+
+
+def percentile(values, pct):
+    """最近秩法分位数；空列表返回 0。"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies, elapsed, errors=0):
+    """把一组延迟（秒）汇总为可写入 JSON 的指标，延迟单位为毫秒。"""
+    ms = lambda v: round(v * 1000, 3)  # noqa: E731
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(max(latencies, default=0.0)),
+    }
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+def save_results(path, data):
+    with open(path, "w", encoding="utf-8") as fp:
+        json.dump(data, fp, ensure_ascii=False, indent=2)
+
+
+def compare(results, baseline, threshold=0.2):
+    """与基线逐项对比，返回回退说明列表。
+
+    回退判定：吞吐下降或 p95 延迟上升超过 ``threshold``（比例），或出现基线中没有的错误。
+    基线中不存在的端点不参与比较。
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if base.get("rps") and current["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: 吞吐 {current['rps']} req/s，低于基线 {base['rps']} req/s")
+        if base.get("p95_ms") and current["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {current['p95_ms']}ms，高于基线 {base['p95_ms']}ms")
+        if current["errors"] > base.get("errors", 0):
+            regressions.append(f"{name}: 错误 {current['errors']} 次（基线 {base.get('errors', 0)} 次）")
+    return regressions
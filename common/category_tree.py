@@ -0,0 +1,51 @@
+"""分类树缓存：进程内保存已构建的树，跨进程通过缓存中的版本号失效。"""
+import threading
+import uuid
+
+from django.core.cache import cache
+
+_trees = {}
+_lock = threading.Lock()
+
+
+def _version_key(model):
+    return f"category:tree:version:{model._meta.label_lower}"
+
+
+def invalidate_tree(model):
+    """分类写入后调用：更新版本号，所有进程下次读取时重建。"""
+    cache.set(_version_key(model), uuid.uuid4().hex, None)
+    with _lock:
+        _trees.pop(model._meta.label_lower, None)
+
+
+def build_tree(rows):
+    """由扁平记录构建嵌套树；``rows`` 需按 depth 升序以保证父级先出现。"""
+    nodes, roots = {}, []
+    for row in rows:
+        if row["parent_id"] and row["parent_id"] not in nodes:
+            continue  # 父级已停用：整棵子树不展示
+        node = {**row, "children": []}
+        nodes[row["id"]] = node
+        (nodes[row["parent_id"]]["children"] if row["parent_id"] else roots).append(node)
+    return roots
+
+
+def get_tree(model):
+    """返回启用分类的嵌套树（共享缓存对象，调用方请勿修改）。"""
+    label = model._meta.label_lower
+    version = cache.get(_version_key(model))
+    cached = _trees.get(label)
+    if cached is not None and cached[0] == version and version is not None:
+        return cached[1]
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(_version_key(model), version, None)
+        version = cache.get(_version_key(model), version)
+    rows = model._default_manager.filter(is_active=True).order_by("depth", "sort_order", "name").values(
+        "id", "parent_id", "name", "slug", "path", "depth", "sort_order",
+    )
+    tree = build_tree(rows)
+    with _lock:
+        _trees[label] = (version, tree)
+    return tree
@@ -0,0 +1,192 @@
+"""动态响应压缩（brotli / gzip），面向 API 的 JSON 与流式响应。
+
+- 仅压缩 ``RESPONSE_COMPRESS_CONTENT_TYPES`` 中的类型，且普通响应不小于 ``RESPONSE_COMPRESS_MIN_SIZE``；
+- ``StreamingHttpResponse`` 逐块压缩并在每块后 flush，客户端无需等待整个响应；
+  ``FileResponse`` 与声明了 ``Accept-Ranges`` 的响应不压缩（保留 sendfile 与 Range 请求）；
+- BREACH 防护：携带机密的响应（设置 Cookie、使用或轮换了 CSRF 令牌、视图标记 ``no_compress``）不压缩；
+  带会话 Cookie 的请求只使用 gzip，并在文件头写入随机长度的文件名（与 Django GZipMiddleware 相同的 HTB 缓解）。
+- brotli 为可选依赖：未安装时只使用 gzip。
+"""
+import importlib.util
+import secrets
+import struct
+import zlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+
+
+def accepted_encodings(header):
+    """解析 Accept-Encoding，返回 q > 0 的编码集合。"""
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+class _GzipEncoder:
+    """增量 gzip：原始 deflate 流 + 手工拼接的文件头/尾，文件头可带随机长度的文件名。"""
+
+    def __init__(self, level, max_random_bytes=0):
+        flags, name = 0, b""
+        if max_random_bytes:
+            flags = 0x08  # FNAME
+            name = secrets.token_hex(secrets.randbelow(max_random_bytes) + 1)[:max_random_bytes].encode() + b"\x00"
+        self._header = b"\x1f\x8b\x08" + bytes([flags]) + b"\x00\x00\x00\x00\x00\xff" + name
+        self._deflate = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self._crc = 0
+        self._size = 0
+
+    def _take_header(self):
+        header, self._header = self._header, b""
+        return header
+
+    def process(self, data, flush=True):
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        out = self._take_header() + self._deflate.compress(data)
+        return out + self._deflate.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self):
+        return self._take_header() + self._deflate.flush() + struct.pack("<II", self._crc, self._size & 0xFFFFFFFF)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality):
+        import brotli
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def process(self, data, flush=True):
+        out = self._compressor.process(data)
+        return out + self._compressor.flush() if flush else out
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def no_compress(view_func):
+    """标记视图响应不压缩（响应体包含令牌等机密，且可能反射用户输入时使用）。"""
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _wrapped_view(request, *args, **kwargs):
+            response = await view_func(request, *args, **kwargs)
+            response.no_compress = True
+            return response
+    else:
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            response = view_func(request, *args, **kwargs)
+            response.no_compress = True
+            return response
+    return _wrapped_view
+
+
+class CompressionMiddleware:
+    """按 Accept-Encoding 选择 br / gzip 压缩响应体。同时支持同步与异步调用链。"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.min_size = getattr(settings, "RESPONSE_COMPRESS_MIN_SIZE", 1024)
+        self.content_types = tuple(getattr(settings, "RESPONSE_COMPRESS_CONTENT_TYPES", ("application/json",)))
+        self.brotli_quality = getattr(settings, "RESPONSE_COMPRESS_BROTLI_QUALITY", 4)
+        self.gzip_level = getattr(settings, "RESPONSE_COMPRESS_GZIP_LEVEL", 6)
+        self.max_random_bytes = getattr(settings, "RESPONSE_COMPRESS_RANDOM_BYTES", 100)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def _compressible(self, response):
+        if response.status_code in (204, 206, 304) or response.has_header("Content-Encoding"):
+            return False
+        # 文件响应（下载、静态文件）保留 sendfile 与字节范围语义，不做动态压缩
+        if getattr(response, "file_to_stream", None) is not None or response.has_header("Accept-Ranges"):
+            return False
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        return content_type.startswith(self.content_types)
+
+    @staticmethod
+    def _carries_secret(request, response):
+        return (
+            getattr(response, "no_compress", False)
+            or bool(response.cookies)
+            or request.META.get("CSRF_COOKIE_USED")
+            or request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        )
+
+    def _encoder(self, request):
+        accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        # 带会话的请求响应可能含用户数据：不使用无随机化缓解的 brotli
+        authenticated = settings.SESSION_COOKIE_NAME in request.COOKIES
+        if BROTLI_AVAILABLE and "br" in accepted and not authenticated:
+            return "br", _BrotliEncoder(self.brotli_quality)
+        if "gzip" in accepted:
+            return "gzip", _GzipEncoder(self.gzip_level, self.max_random_bytes if authenticated else 0)
+        return None, None
+
+    def process_response(self, request, response):
+        if not self._compressible(response):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if self._carries_secret(request, response):
+            return response
+        encoding, encoder = self._encoder(request)
+        if encoder is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                original = response.streaming_content
+
+                async def compressed():
+                    async for chunk in original:
+                        if chunk:
+                            yield encoder.process(chunk)
+                    yield encoder.finish()
+            else:
+                original = response.streaming_content
+
+                def compressed():
+                    for chunk in original:
+                        if chunk:
+                            yield encoder.process(chunk)
+                    yield encoder.finish()
+            response.streaming_content = compressed()
+            del response.headers["Content-Length"]
+        else:
+            content = encoder.process(response.content, flush=False) + encoder.finish()
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers["Content-Length"] = str(len(content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,77 @@
+"""条件请求：基于 ``BaseModel.updated_at`` 计算 ETag / Last-Modified，命中时在序列化与渲染之前返回 304。
+
+- 列表：一次聚合 ``MAX(updated_at), COUNT(*)``；计数覆盖了删除行（删除不会改变其余行的 ``updated_at``）。
+  列表只发送 ETag：Last-Modified 无法反映删除，仅带 If-Modified-Since 的客户端会拿到过期列表；
+- 详情：对象自身的 ``updated_at``，同时发送 ETag 与 Last-Modified。
+  注意 ``QuerySet.update()`` 不会自动更新 ``updated_at``，影响输出的批量更新需显式设置。
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.db import models
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def compute_validators(source, extra=""):
+    """返回 (etag, last_modified)；``source`` 为模型实例或 QuerySet，``extra`` 参与 ETag（如与用户相关的输出）。"""
+    if isinstance(source, models.Model):
+        key, latest, count = f"{source._meta.label_lower}:{source.pk}", source.updated_at, 1
+    else:
+        result = source.order_by().aggregate(latest=Max("updated_at"), count=Count("pk"))
+        key, latest, count = source.model._meta.label_lower, result["latest"], result["count"]
+    raw = f"{key}:{latest.isoformat() if latest else '-'}:{count}:{extra}"
+    etag = f'"{hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()}"'
+    last_modified = int(latest.timestamp()) if latest and isinstance(source, models.Model) else None
+    return etag, last_modified
+
+
+def _finish(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        if not response.has_header("ETag"):
+            response["ETag"] = etag
+        if last_modified is not None and not response.has_header("Last-Modified"):
+            response["Last-Modified"] = http_date(last_modified)
+        # 要求客户端每次带校验值重新验证，而不是按启发式规则直接使用本地副本
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+def conditional(source_func, vary=None):
+    """条件 GET 装饰器：``source_func(request, *args, **kwargs)`` 返回 QuerySet、模型实例或 None（不处理）。
+
+    ``vary(request)`` 返回的字符串参与 ETag，用于输出随用户变化的视图。支持同步与异步视图。
+    """
+    def prepare(request, args, kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return None
+        source = source_func(request, *args, **kwargs)
+        if source is None:
+            return None
+        return compute_validators(source, vary(request) if vary else "")
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_view(request, *args, **kwargs):
+                validators = await sync_to_async(prepare)(request, args, kwargs)
+                if validators is None:
+                    return await view_func(request, *args, **kwargs)
+                response = get_conditional_response(request, etag=validators[0], last_modified=validators[1])
+                if response is None:
+                    response = await view_func(request, *args, **kwargs)
+                return _finish(response, *validators)
+        else:
+            @wraps(view_func)
+            def _wrapped_view(request, *args, **kwargs):
+                validators = prepare(request, args, kwargs)
+                if validators is None:
+                    return view_func(request, *args, **kwargs)
+                response = get_conditional_response(request, etag=validators[0], last_modified=validators[1])
+                if response is None:
+                    response = view_func(request, *args, **kwargs)
+                return _finish(response, *validators)
+        return _wrapped_view
+    return decorator
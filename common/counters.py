@@ -0,0 +1,197 @@
+"""浏览量缓冲计数：请求内只累加到缓存，定期批量写回数据库。
+
+- Redis 后端：按模型使用 HINCRBY 原子累加，刷新时 RENAME 摘取快照；
+- 其他后端（locmem 等）：进程内字典 + 锁累加，按间隔在本进程内刷新。
+刷新时按模型、按增量分组，以少量 ``UPDATE ... SET views = views + n`` 完成写回。
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .write_queue import enqueue_write
+
+logger = logging.getLogger("app")
+
+_KEY_PREFIX = "views:pending"
+# 单条 UPDATE 的主键上限（兼容 SQLite 参数数量限制）
+_BATCH_SIZE = 500
+
+
+def _label(model) -> str:
+    return model._meta.label_lower
+
+
+def _flush_interval() -> int:
+    return int(getattr(settings, "VIEW_COUNTER_FLUSH_INTERVAL", 60))
+
+
+class LocalViewBuffer:
+    """进程内缓冲：{模型标签: {主键: 增量}}。"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(lambda: defaultdict(int))
+
+    def incr(self, label, pk, amount=1):
+        with self._lock:
+            self._pending[label][pk] += amount
+
+    def pending(self, label, pks):
+        with self._lock:
+            bucket = self._pending.get(label, {})
+            return {pk: bucket.get(pk, 0) for pk in pks}
+
+    def drain(self):
+        with self._lock:
+            snapshot, self._pending = self._pending, defaultdict(lambda: defaultdict(int))
+        return {label: dict(bucket) for label, bucket in snapshot.items() if bucket}
+
+
+class RedisViewBuffer:
+    """Redis 缓冲：每个模型一个哈希，另以集合记录有待刷新的模型。"""
+    def __init__(self, client):
+        self.client = client
+
+    @staticmethod
+    def _hash_key(label):
+        return f"{_KEY_PREFIX}:{label}"
+
+    def incr(self, label, pk, amount=1):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hincrby(self._hash_key(label), str(pk), amount)
+        pipe.sadd(f"{_KEY_PREFIX}:labels", label)
+        pipe.execute()
+
+    def pending(self, label, pks):
+        pks = list(pks)
+        if not pks:
+            return {}
+        values = self.client.hmget(self._hash_key(label), [str(pk) for pk in pks])
+        return {pk: int(v or 0) for pk, v in zip(pks, values)}
+
+    def drain(self):
+        result = {}
+        for raw in self.client.smembers(f"{_KEY_PREFIX}:labels"):
+            label = raw.decode() if isinstance(raw, bytes) else raw
+            src = self._hash_key(label)
+            tmp = f"{src}:flushing:{time.time_ns()}"
+            try:
+                # RENAME 为原子操作：之后的累加写入新哈希，不会丢失
+                self.client.rename(src, tmp)
+            except Exception:
+                continue  # 哈希不存在（已被其他进程摘取）
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hgetall(tmp)
+            pipe.delete(tmp)
+            data, _ = pipe.execute()
+            bucket = {}
+            for k, v in data.items():
+                k = k.decode() if isinstance(k, bytes) else k
+                bucket[k] = int(v)
+            if bucket:
+                result[label] = bucket
+        return result
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def get_buffer():
+    """按默认缓存后端选择缓冲实现（进程内单例）。"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+                if backend.startswith("django_redis"):
+                    from django_redis import get_redis_connection
+                    _buffer = RedisViewBuffer(get_redis_connection("default"))
+                else:
+                    _buffer = LocalViewBuffer()
+    return _buffer
+
+
+def reset_buffer():
+    """丢弃当前缓冲实例（配置切换或测试时使用）。"""
+    global _buffer
+    with _buffer_lock:
+        _buffer = None
+
+
+def incr_views(instance, amount=1):
+    """为模型实例累加浏览量（仅写缓存，不触发数据库写入）。"""
+    get_buffer().incr(_label(type(instance)), instance.pk, amount)
+    _maybe_flush()
+
+
+def _maybe_flush():
+    # 进程内缓冲无法被外部命令读取，因此按间隔在本进程内顺带刷新
+    global _last_flush
+    interval = _flush_interval()
+    if interval <= 0 or time.monotonic() - _last_flush < interval:
+        return
+    _last_flush = time.monotonic()
+    # 开启写入队列时交给写线程合并提交；否则同步执行，异常由 enqueue_write 记录
+    enqueue_write(flush_views)
+
+
+def pending_views(model, pks):
+    """返回 {主键: 尚未写回的增量}。"""
+    return get_buffer().pending(_label(model), pks)
+
+
+def get_views(instance) -> int:
+    """已持久化的浏览量 + 缓冲中的增量。"""
+    pending = pending_views(type(instance), [instance.pk]).get(instance.pk, 0)
+    return (instance.views or 0) + pending
+
+
+def get_views_many(objects) -> dict:
+    """批量读取：返回 {实例: 总浏览量}，每个模型仅一次缓存读取。"""
+    by_model = defaultdict(list)
+    for obj in objects:
+        by_model[type(obj)].append(obj)
+    result = {}
+    for model, items in by_model.items():
+        pending = pending_views(model, [o.pk for o in items])
+        for o in items:
+            result[o] = (o.views or 0) + pending.get(o.pk, 0)
+    return result
+
+
+def flush_views() -> int:
+    """将缓冲增量批量写回数据库，返回更新的行数。"""
+    drained = list(get_buffer().drain().items())
+    updated = 0
+    for index, (label, bucket) in enumerate(drained):
+        try:
+            model = apps.get_model(label)
+        except LookupError:
+            logger.warning("浏览量刷新：未知模型 %s，已丢弃 %d 条", label, len(bucket))
+            continue
+        # 相同增量的主键合并为一条 UPDATE
+        by_amount = defaultdict(list)
+        for pk, amount in bucket.items():
+            if amount:
+                by_amount[amount].append(model._meta.pk.to_python(pk))
+        try:
+            with transaction.atomic():
+                for amount, pks in by_amount.items():
+                    for i in range(0, len(pks), _BATCH_SIZE):
+                        chunk = pks[i:i + _BATCH_SIZE]
+                        updated += model._base_manager.filter(pk__in=chunk).update(views=F("views") + amount)
+        except Exception:
+            # 写回失败时把当前及尚未写回的模型放回缓冲，等待下次刷新
+            buf = get_buffer()
+            for pending_label, pending_bucket in drained[index:]:
+                for pk, amount in pending_bucket.items():
+                    buf.incr(pending_label, pk, amount)
+            raise
+    return updated
@@ -0,0 +1,133 @@
+"""主从读写分离：写入走主库，读取走只读副本，写入后短时间内读取固定到主库。
+
+- 副本别名列在 ``settings.DATABASE_REPLICAS``（由 ``DB_REPLICAS`` 环境变量生成），为空时路由器不干预；
+- 同一请求内只选一个副本，避免在延迟不同的副本之间来回读取；
+- 请求中发生写入后，本请求剩余的读取改走主库，并下发 ``REPLICA_PIN_COOKIE``，
+  在 ``REPLICA_PIN_SECONDS`` 秒内该客户端的读取都走主库（读到自己的写入）；
+- 事务内的读取始终走主库；请求之外（管理命令、后台任务）可用 ``use_primary()`` 显式固定。
+"""
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = contextvars.ContextVar("db_routing_state", default=None)
+
+
+class RoutingState:
+    """单个请求（或 ``use_primary`` 代码块）的路由状态；可变对象，线程切换后仍可见。"""
+    __slots__ = ("pinned", "wrote", "replica")
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+        self.replica = None
+
+
+def replicas():
+    return list(getattr(settings, "DATABASE_REPLICAS", ()))
+
+
+@contextmanager
+def use_primary():
+    """代码块内的读取全部走主库。"""
+    state = _state.get()
+    if state is None:
+        token = _state.set(RoutingState(pinned=True))
+        try:
+            yield
+        finally:
+            _state.reset(token)
+        return
+    previous, state.pinned = state.pinned, True
+    try:
+        yield
+    finally:
+        state.pinned = previous
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if not aliases or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        state = _state.get()
+        if state is None:
+            return random.choice(aliases)
+        if state.pinned or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if state.replica is None:
+            state.replica = random.choice(aliases)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replicas():
+            return False
+        return None
+
+
+class ReplicaPinMiddleware:
+    """为每个请求建立路由状态，并用短期 Cookie 实现写后读固定到主库。同时支持同步与异步调用链。"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.cookie_name = getattr(settings, "REPLICA_PIN_COOKIE", "db_pin")
+        self.pin_seconds = getattr(settings, "REPLICA_PIN_SECONDS", 5)
+
+    def _begin(self, request):
+        try:
+            pinned = float(request.COOKIES.get(self.cookie_name, 0)) > time.time()
+        except ValueError:
+            pinned = False
+        state = RoutingState(pinned=pinned)
+        return state, _state.set(state)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state, token = self._begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(response, state)
+
+    async def __acall__(self, request):
+        state, token = self._begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(response, state)
+
+    def _finish(self, response, state):
+        if state.wrote and self.pin_seconds:
+            response.set_cookie(
+                self.cookie_name,
+                f"{time.time() + self.pin_seconds:.3f}",
+                max_age=self.pin_seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
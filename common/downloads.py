@@ -0,0 +1,155 @@
+"""大文件下载：断点续传（Range / If-Range）、条件请求与发送卸载。
+
+- 配置 ``DOWNLOAD_ACCEL_PREFIX`` 时只返回 ``X-Accel-Redirect`` 响应头，由 Nginx 发送文件
+  （Range 由 Nginx 处理，Django 不读取文件内容）；
+- 否则使用 ``FileResponse``：WSGI 服务器提供 ``wsgi.file_wrapper`` 时走 sendfile 零拷贝，
+  区间请求只发送 ``Content-Length`` 指定的字节数；
+- 下载计数交给后台线程写入浏览量缓冲（``BaseModel.views``），下载请求不等待数据库。
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+from .tasks import submit
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header, size):
+    """解析单个字节区间，返回 (起始, 结束)（含两端）。
+
+    无法解析或多区间时返回 None（按 RFC 9110 忽略 Range，返回完整文件）；
+    区间不可满足时抛出 ``ValueError``。
+    """
+    match = _RANGE_RE.match((header or "").replace(" ", ""))
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # 后缀区间：最后 N 个字节
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def _if_range_matches(value, etag, last_modified):
+    """If-Range 只接受强校验：ETag 完全相同，或日期与 Last-Modified 一致。"""
+    value = value.strip()
+    if value.startswith(('"', "W/")):
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+class _RangeFile:
+    """把文件限制在 [start, start + length) 区间内读取；保留 fileno 以便服务器使用 sendfile。"""
+
+    def __init__(self, fp, start, length):
+        fp.seek(start)
+        self._fp = fp
+        self._remaining = length
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b""
+        size = self._remaining if size is None or size < 0 else min(size, self._remaining)
+        data = self._fp.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self._fp.fileno()
+
+    def tell(self):
+        return self._fp.tell()
+
+    def close(self):
+        self._fp.close()
+
+
+def _count(instance):
+    instance.incr_views()
+
+
+def serve_download(request, path, *, filename=None, instance=None, root=None):
+    """返回 ``root``（默认 ``DOWNLOAD_ROOT``）下相对路径 ``path`` 的下载响应。
+
+    ``instance`` 为继承 ``BaseModel`` 的下载记录时累加其浏览量作为下载次数；
+    续传的后续区间与 HEAD、304 请求不计数。
+    """
+    root = os.fspath(root or settings.DOWNLOAD_ROOT)
+    try:
+        fullpath = safe_join(root, path)
+    except SuspiciousFileOperation:
+        raise Http404("文件不存在")
+    try:
+        stat = os.stat(fullpath)
+    except OSError:
+        raise Http404("文件不存在")
+    if not os.path.isfile(fullpath):
+        raise Http404("文件不存在")
+
+    size, last_modified = stat.st_size, int(stat.st_mtime)
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    filename = filename or os.path.basename(fullpath)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    span = None
+    if request.method == "GET" and "Range" in request.headers:
+        if_range = request.headers.get("If-Range")
+        if if_range is None or _if_range_matches(if_range, etag, last_modified):
+            try:
+                span = parse_range(request.headers["Range"], size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{size}"
+                response["Accept-Ranges"] = "bytes"
+                return response
+
+    prefix = getattr(settings, "DOWNLOAD_ACCEL_PREFIX", "")
+    if prefix:
+        # Nginx internal location 指向同一目录，Range/If-Range 由 Nginx 按原始请求头处理
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(os.path.relpath(fullpath, root).replace(os.sep, "/"))
+        response["Content-Disposition"] = content_disposition_header(True, filename)
+    elif request.method == "HEAD":
+        response = HttpResponse(content_type=content_type)
+        response["Content-Length"] = size
+        response["Content-Disposition"] = content_disposition_header(True, filename)
+    elif span is None:
+        response = FileResponse(open(fullpath, "rb"), as_attachment=True, filename=filename, content_type=content_type)
+    else:
+        start, end = span
+        response = FileResponse(
+            _RangeFile(open(fullpath, "rb"), start, end - start + 1),
+            status=206, as_attachment=True, filename=filename, content_type=content_type,
+        )
+        response["Content-Length"] = end - start + 1
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    if instance is not None and request.method == "GET" and (span is None or span[0] == 0):
+        submit(_count, instance)
+    return response
@@ -1,17 +1,41 @@
 from django import forms
 from .validators import ComplexityPasswordValidator
 
-# 敏感词集合
+# 内置敏感词集合（未配置 SENSITIVE_WORDS_FILE 时使用）
 SENSITIVE_WORDS = {"badword1", "badword2"}
 
 def clean_sensitive(text: str) -> str:
-    """对文本进行简单敏感词清洗（以 * 替换）。"""
+    """对文本进行敏感词清洗（每处命中以 * 替换），单次扫描完成。"""
     if not text:
         return text
-    cleaned = text
-    for w in SENSITIVE_WORDS:
-        cleaned = cleaned.replace(w, "*")
-    return cleaned
+    from .sensitive import get_matcher
+    return get_matcher().replace(text)
+
+
+def contains_sensitive(text: str) -> bool:
+    """文本是否包含敏感词（用于直接拒绝提交的场景）。"""
+    from .sensitive import get_matcher
+    return get_matcher().contains(text)
+
+class UploadErrorsFormMixin:
+    """把上传流阶段被 ``ImageUploadLimitHandler`` 丢弃的文件原因作为字段错误返回。
+
+    被丢弃的文件不在 ``request.FILES`` 中，不处理时表单会当作未上传而直接保存。
+    通过 ``upload_request`` 参数（或同名类属性）传入当前请求。
+    """
+    upload_request = None
+
+    def __init__(self, *args, upload_request=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if upload_request is not None:
+            self.upload_request = upload_request
+
+    def clean(self):
+        cleaned = super().clean()
+        for name, message in getattr(self.upload_request, "upload_errors", {}).items():
+            if name in self.fields:
+                self.add_error(name, message)
+        return cleaned
 
 class BaseStyledForm(forms.Form):
     """基础表单：统一注入样式类（Bootstrap 兼容）。"""
@@ -21,8 +45,13 @@ class BaseStyledForm(forms.Form):
             css = field.widget.attrs.get("class", "")
             field.widget.attrs["class"] = (css + " form-control").strip()
 
-class BaseModelForm(forms.ModelForm):
-    """基础模型表单：统一样式与敏感词清洗。"""
+class BaseModelForm(UploadErrorsFormMixin, forms.ModelForm):
+    """基础模型表单：统一样式、敏感词清洗与上传丢弃原因的回显。
+
+    ``sensitive_mode`` 为 ``"mask"`` 时替换敏感词，为 ``"reject"`` 时直接报错。
+    """
+    sensitive_mode = "mask"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         for field in self.fields.values():
@@ -32,7 +61,12 @@ class BaseModelForm(forms.ModelForm):
     def clean(self):
         cleaned = super().clean()
         for k, v in list(cleaned.items()):
-            if isinstance(v, str):
+            if not isinstance(v, str):
+                continue
+            if self.sensitive_mode == "reject":
+                if contains_sensitive(v):
+                    self.add_error(k, "内容包含敏感词")
+            else:
                 cleaned[k] = clean_sensitive(v)
         return cleaned
 
@@ -0,0 +1,266 @@
+"""日志管道：请求线程只把记录放入有界队列，由单个监听线程格式化并写入文件。
+
+- ``configure`` 作为 ``LOGGING_CONFIG`` 使用：先按 ``LOGGING`` 正常配置，再把各 logger 的处理器
+  替换为共享队列上的 ``QueueingHandler``，原处理器交给监听线程调用；
+- 队列占用超过 ``LOG_QUEUE_HIGH_WATER`` 时 INFO 及以下按 ``LOG_QUEUE_SAMPLE`` 采样，
+  队列已满时直接丢弃；丢弃数计入 ``stats()``，队列回落后补写汇总告警（每 10 秒至多一条）；
+- ``RequestIDMiddleware`` 为每个请求生成（或沿用上游的）请求 ID，记录入队时写入 ``request_id``；
+- ``JsonFormatter`` 输出紧凑的单行 JSON。
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+def get_request_id():
+    return _request_id.get()
+
+
+class RequestIDMiddleware:
+    """读取上游（如 Nginx ``$request_id``）传入的请求 ID，缺失或不合法时生成新 ID，并写回响应头。
+
+    应放在 MIDDLEWARE 首位，使其余中间件（含耗时统计）的日志都带有请求 ID。
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.header = getattr(settings, "REQUEST_ID_HEADER", "X-Request-ID")
+
+    def _request_id(self, request):
+        value = request.headers.get(self.header, "")
+        return value if _REQUEST_ID_RE.match(value) else uuid.uuid4().hex
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        request.request_id = self._request_id(request)
+        token = _request_id.set(request.request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_id.reset(token)
+        response[self.header] = request.request_id
+        return response
+
+    async def __acall__(self, request):
+        request.request_id = self._request_id(request)
+        token = _request_id.set(request.request_id)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_id.reset(token)
+        response[self.header] = request.request_id
+        return response
+
+
+class RequestIDFilter(logging.Filter):
+    """补全 ``request_id`` 属性，供文本格式中的 ``%(request_id)s`` 使用；已由队列写入的不覆盖。"""
+
+    def filter(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = get_request_id() or "-"
+        return True
+
+
+# LogRecord 自带属性；其余属性视为 extra 字段写入 JSON
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id", "targets"}
+
+
+class JsonFormatter(logging.Formatter):
+    """单行 JSON：时间、级别、logger、消息、请求 ID、位置，以及异常与 extra 字段。"""
+
+    def format(self, record):
+        data = {
+            "ts": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id and request_id != "-":
+            data["request_id"] = request_id
+        data["at"] = f"{record.module}:{record.lineno}"
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        if record.stack_info:
+            data["stack"] = record.stack_info
+        for key, value in vars(record).items():
+            # Django 请求日志附带的 request 对象不可序列化且信息重复
+            if key not in _RECORD_ATTRS and key != "request" and not key.startswith("_"):
+                data[key] = value
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class _Listener(logging.handlers.QueueListener):
+    """按记录携带的目标处理器分发：同一线程服务所有 logger。"""
+
+    def handle(self, record):
+        for handler in record.targets:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)  # 有界队列：停止时等待空位而不是丢弃哨兵
+
+
+class LogPipeline:
+    """共享的有界队列、监听线程与丢弃计数。"""
+
+    def __init__(self, maxsize=10000, high_water=0.8, sample=10, report_interval=10.0):
+        self.queue = queue.Queue(maxsize)
+        self.maxsize = maxsize
+        self.high_water = int(maxsize * high_water)
+        self.sample = max(sample, 1)
+        self.dropped = 0
+        self.sampled = 0
+        self._reported = (0, 0)
+        self.report_interval = report_interval
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def start(self):
+        if self._listener is None:
+            self._listener = _Listener(self.queue)
+            self._listener.start()
+
+    def stop(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def after_fork(self):
+        # 预加载（gunicorn --preload）时监听线程不会随 fork 复制到子进程
+        self.queue = queue.Queue(self.maxsize)
+        self._lock = threading.Lock()
+        self._listener = None
+        self.start()
+
+    def stats(self):
+        return {"queued": self.queue.qsize(), "dropped": self.dropped, "sampled": self.sampled}
+
+    def put(self, record):
+        if record.levelno <= logging.INFO and self.queue.qsize() >= self.high_water:
+            if random.randrange(self.sample):
+                with self._lock:
+                    self.sampled += 1
+                return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        if ((self.dropped, self.sampled) != self._reported and self.queue.qsize() < self.high_water
+                and time.monotonic() - self._last_report >= self.report_interval):
+            self._report(record.targets)
+
+    def _report(self, targets):
+        with self._lock:
+            dropped, sampled = self.dropped - self._reported[0], self.sampled - self._reported[1]
+            self._reported = (self.dropped, self.sampled)
+            self._last_report = time.monotonic()
+        if not dropped and not sampled:
+            return
+        record = logging.LogRecord("app.logging", logging.WARNING, __file__, 0,
+                                   "日志队列过载：丢弃 %d 条，采样丢弃 %d 条", (dropped, sampled), None)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        record.targets = targets
+        record.log_dropped, record.log_sampled = dropped, sampled
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+class QueueingHandler(logging.handlers.QueueHandler):
+    """只负责入队的处理器：``targets`` 为原先挂在该 logger 上的处理器。"""
+
+    def __init__(self, pipeline, targets):
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+        self.targets = tuple(targets)
+
+    def prepare(self, record):
+        # 在请求线程中完成消息插值与异常格式化（参数对象可能在之后被修改），不做最终格式化
+        record = logging.makeLogRecord(vars(record))
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if not hasattr(record, "request_id"):
+            record.request_id = get_request_id() or "-"
+        record.targets = self.targets
+        return record
+
+    def enqueue(self, record):
+        self.pipeline.put(record)
+
+
+_pipeline = None
+
+
+def get_pipeline():
+    return _pipeline
+
+
+def configure(config):
+    """``LOGGING_CONFIG`` 入口：``LOG_QUEUE`` 关闭时等同 ``dictConfig``。"""
+    global _pipeline
+    logging.config.dictConfig(config)
+    if not getattr(settings, "LOG_QUEUE", False):
+        return
+    if _pipeline is None:
+        _pipeline = LogPipeline(
+            maxsize=getattr(settings, "LOG_QUEUE_SIZE", 10000),
+            high_water=getattr(settings, "LOG_QUEUE_HIGH_WATER", 0.8),
+            sample=getattr(settings, "LOG_QUEUE_SAMPLE", 10),
+        )
+        _pipeline.start()
+        atexit.register(_pipeline.stop)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_pipeline.after_fork)
+    for name in [None, *config.get("loggers", {})]:
+        logger = logging.getLogger(name)
+        targets = [h for h in logger.handlers if not isinstance(h, QueueingHandler)]
+        if targets:
+            for handler in targets:
+                logger.removeHandler(handler)
+            logger.addHandler(QueueingHandler(_pipeline, targets))
+
+
+def wait_idle(timeout=5.0):
+    """等待队列中的记录全部写出（测试与管理命令退出前使用）。"""
+    if _pipeline is None:
+        return True
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if _pipeline.queue.unfinished_tasks == 0:
+            return True
+        time.sleep(0.01)
+    return False
@@ -0,0 +1,152 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from common.benchmark import percentile
+from common.write_queue import WriteQueue
+
+MODES = ("default", "tuned", "queued")
+
+
+class _Bench:
+    """一次测量：独立的临时数据库文件，读线程与写线程并发运行固定时长。"""
+
+    def __init__(self, path, mode, rows):
+        self.path = path
+        self.mode = mode
+        self.rows = rows
+        self.local = threading.local()
+        self.stop = threading.Event()
+        self.read_latencies = []
+        self.write_latencies = []
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def connect(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            # 与 Django 一致：自动提交模式，事务由代码显式开启
+            timeout = settings.SQLITE_BUSY_TIMEOUT if self.mode != "default" else 5.0
+            conn = sqlite3.connect(self.path, timeout=timeout, isolation_level=None, check_same_thread=False)
+            if self.mode != "default":
+                for pragma in settings.SQLITE_PRAGMAS:
+                    conn.execute(pragma)
+            self.local.conn = conn
+        return conn
+
+    def setup(self):
+        conn = self.connect()
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, n INTEGER NOT NULL, payload TEXT NOT NULL)")
+        conn.execute("BEGIN")
+        conn.executemany("INSERT INTO items (n, payload) VALUES (0, ?)", (("x" * 200,) for _ in range(self.rows)))
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def transaction(self):
+        conn = self.connect()
+        conn.execute("BEGIN" if self.mode == "default" else "BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def savepoint(self):
+        conn = self.connect()
+        conn.execute("SAVEPOINT item")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK TO item")
+            conn.execute("RELEASE item")
+            raise
+        conn.execute("RELEASE item")
+
+    def write_once(self):
+        self.connect().execute("UPDATE items SET n = n + 1 WHERE id = ?", (random.randint(1, self.rows),))
+
+    def reader(self):
+        conn, latencies = self.connect(), []
+        while not self.stop.is_set():
+            low = random.randint(1, self.rows - 100)
+            start = time.perf_counter()
+            try:
+                conn.execute("SELECT COUNT(*), SUM(n) FROM items WHERE id BETWEEN ? AND ?", (low, low + 100)).fetchone()
+            except sqlite3.OperationalError:
+                with self.lock:
+                    self.errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+        with self.lock:
+            self.read_latencies += latencies
+
+    def writer(self, write_queue):
+        latencies = []
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            try:
+                if write_queue is not None:
+                    write_queue.submit(self.write_once).result()
+                else:
+                    with self.transaction():
+                        self.write_once()
+            except sqlite3.OperationalError:
+                with self.lock:
+                    self.errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+        with self.lock:
+            self.write_latencies += latencies
+
+    def run(self, readers, writers, seconds):
+        self.setup()
+        write_queue = None
+        if self.mode == "queued":
+            write_queue = WriteQueue(batch_context=self.transaction, item_context=self.savepoint, name="bench-writer")
+        threads = [threading.Thread(target=self.reader) for _ in range(readers)]
+        threads += [threading.Thread(target=self.writer, args=(write_queue,)) for _ in range(writers)]
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        self.stop.set()
+        for t in threads:
+            t.join()
+        if write_queue is not None:
+            write_queue.shutdown()
+
+
+class Command(BaseCommand):
+    help = "SQLite 并发基准：对比默认配置、生产配置（WAL 等）与写入队列下读请求的延迟"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=3.0, help="每种模式的运行时长")
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--modes", default=",".join(MODES), help=f"逗号分隔，可选 {'/'.join(MODES)}")
+
+    def handle(self, *args, **options):
+        modes = [m.strip() for m in options["modes"].split(",") if m.strip() in MODES]
+        self.stdout.write(
+            f"{'mode':<8} {'reads/s':>9} {'read p50':>9} {'p99':>8} {'max':>8} {'writes/s':>9} {'write p50':>10} {'errors':>7}"
+        )
+        for mode in modes:
+            with tempfile.TemporaryDirectory() as tmp:
+                bench = _Bench(os.path.join(tmp, "bench.sqlite3"), mode, max(options["rows"], 200))
+                bench.run(options["readers"], options["writers"], options["seconds"])
+            reads, writes = bench.read_latencies, bench.write_latencies
+            ms = lambda v: f"{v * 1000:.2f}ms"  # noqa: E731
+            self.stdout.write(
+                f"{mode:<8} {len(reads) / options['seconds']:>9.0f} {ms(percentile(reads, 50)):>9} "
+                f"{ms(percentile(reads, 99)):>8} {ms(max(reads, default=0)):>8} "
+                f"{len(writes) / options['seconds']:>9.0f} {ms(percentile(writes, 50)):>10} {bench.errors:>7}"
+            )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from common.counters import flush_views
+
+
+class Command(BaseCommand):
+    help = "将缓冲中的浏览量增量批量写回数据库（建议由 cron/定时任务周期执行）"
+
+    def handle(self, *args, **options):
+        updated = flush_views()
+        self.stdout.write(self.style.SUCCESS(f"已写回 {updated} 行浏览量"))
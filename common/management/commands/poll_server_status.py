@@ -0,0 +1,27 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from common.server_status import StatusPoller
+
+
+class Command(BaseCommand):
+    help = "后台轮询 Minecraft 服务器状态并写入缓存快照（生产环境需共享缓存，如 Redis）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="仅查询一次后退出")
+
+    def handle(self, *args, **options):
+        poller = StatusPoller()
+        if not poller.servers:
+            self.stderr.write("未配置 MC_SERVERS，已退出")
+            return
+        if options["once"]:
+            for snap in asyncio.run(poller.run_once()):
+                state = "在线" if snap["online"] else f"离线（{snap['error']}）"
+                self.stdout.write(f"{snap['name']}: {state}")
+            return
+        try:
+            asyncio.run(poller.run())
+        except KeyboardInterrupt:
+            pass
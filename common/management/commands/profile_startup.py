@@ -0,0 +1,129 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from common.benchmark import load_results, save_results
+
+# 子进程中执行的启动过程：与 gunicorn worker 相同地构造 WSGI 应用并加载 URLconf
+_BOOT_SCRIPT = """
+import importlib, json, sys, time
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+importlib.import_module(sys.argv[1])
+print(json.dumps({"total_ms": (time.perf_counter() - start) * 1000}))
+"""
+
+
+def parse_importtime(text):
+    """解析 ``-X importtime`` 输出，返回 {模块: (自身耗时 ms, 累计耗时 ms)}；同一模块只计首次导入。"""
+    modules = {}
+    for line in text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # 表头行
+        name = parts[2].strip()
+        modules.setdefault(name, (int(parts[0]) / 1000, int(parts[1]) / 1000))
+    return modules
+
+
+def group_by_package(modules):
+    """按顶层包汇总自身耗时（ms），即每个应用/依赖对启动时间的净贡献。"""
+    packages = {}
+    for name, (self_ms, _) in modules.items():
+        top = name.split(".")[0]
+        packages[top] = packages.get(top, 0.0) + self_ms
+    return packages
+
+
+def compare_startup(current, baseline, threshold=0.2, min_ms=5.0):
+    """与基线对比：总耗时或某个包的耗时增长超过 ``threshold`` 且绝对增量不小于 ``min_ms`` 视为回退。"""
+    regressions = []
+    pairs = [("total", current["total_ms"], baseline.get("total_ms"))]
+    base_packages = baseline.get("packages", {})
+    pairs += [(name, ms, base_packages.get(name, 0.0)) for name, ms in current["packages"].items()]
+    for name, ms, base in pairs:
+        if base is None or ms - base < min_ms:
+            continue
+        if ms > base * (1 + threshold):
+            regressions.append(f"{name}: {ms:.1f}ms，基线 {base:.1f}ms")
+    return regressions
+
+
+class Command(BaseCommand):
+    help = "启动耗时分析：在子进程中以 -X importtime 加载 Django 与 URLconf，按应用/模块汇总导入耗时并可与基线对比"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=3, help="重复次数，各项取中位数")
+        parser.add_argument("--env", help="子进程使用的 DJANGO_ENV（默认沿用当前环境）")
+        parser.add_argument("--top", type=int, default=15, help="输出累计耗时最高的模块数")
+        parser.add_argument("--output", help="结果写入 JSON 文件")
+        parser.add_argument("--baseline", help="基线 JSON；总耗时或任一包回退超过阈值时命令失败")
+        parser.add_argument("--threshold", type=float, default=0.2, help="回退阈值（比例），默认 0.2")
+        parser.add_argument("--min-ms", type=float, default=5.0, help="忽略小于该绝对增量（ms）的波动")
+
+    def handle(self, *args, **options):
+        runs = [self._boot(options["env"]) for _ in range(max(options["repeat"], 1))]
+        result = self._median(runs)
+        self.stdout.write(f"启动总耗时 {result['total_ms']:.1f}ms（{len(runs)} 次取中位数）")
+        self.stdout.write(f"\n{'package':<28} {'self':>10}")
+        for name, ms in sorted(result["packages"].items(), key=lambda kv: -kv[1])[:options["top"]]:
+            self.stdout.write(f"{name:<28} {ms:>8.1f}ms")
+        self.stdout.write(f"\n{'module':<48} {'cumulative':>12} {'self':>10}")
+        for name, (self_ms, cum_ms) in sorted(runs[0][1].items(), key=lambda kv: -kv[1][1])[:options["top"]]:
+            self.stdout.write(f"{name:<48} {cum_ms:>10.1f}ms {self_ms:>8.1f}ms")
+
+        data = {
+            "meta": {
+                "env": options["env"] or os.getenv("DJANGO_ENV", "development"),
+                "settings": os.environ.get("DJANGO_SETTINGS_MODULE"),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "timestamp": timezone.now().isoformat(),
+            },
+            "results": result,
+        }
+        if options["output"]:
+            save_results(options["output"], data)
+            self.stdout.write(f"结果已写入 {options['output']}")
+        if options["baseline"]:
+            baseline = load_results(options["baseline"])
+            regressions = compare_startup(result, baseline.get("results", baseline),
+                                          options["threshold"], options["min_ms"])
+            if regressions:
+                raise CommandError("启动耗时回退：\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS(f"与基线对比无回退（阈值 {options['threshold']:.0%}）"))
+
+    def _boot(self, env):
+        """启动一个全新解释器，返回 (总耗时 ms, 模块耗时表)。"""
+        child_env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+        child_env.pop("PYTHONIMPORTTIME", None)
+        if env:
+            child_env["DJANGO_ENV"] = env
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _BOOT_SCRIPT, settings.ROOT_URLCONF],
+            cwd=settings.BASE_DIR, env=child_env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            tail = "\n".join(l for l in proc.stderr.splitlines() if not l.startswith("import time:"))[-2000:]
+            raise CommandError(f"子进程启动失败：\n{tail}")
+        return json.loads(proc.stdout.strip().splitlines()[-1])["total_ms"], parse_importtime(proc.stderr)
+
+    @staticmethod
+    def _median(runs):
+        packages = [group_by_package(modules) for _, modules in runs]
+        names = set().union(*packages)
+        return {
+            "total_ms": round(statistics.median(total for total, _ in runs), 1),
+            "packages": {n: round(statistics.median(p.get(n, 0.0) for p in packages), 2) for n in sorted(names)},
+        }
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
 from django.utils import timezone
 
 class BaseModel(models.Model):
@@ -12,13 +14,32 @@ class BaseModel(models.Model):
         abstract = True
         ordering = ["-created_at"]
         get_latest_by = "创建时间"
+        # 游标分页按 (created_at, id) 定位边界行
+        indexes = [models.Index(fields=["created_at", "id"])]
+
+    def incr_views(self, amount=1):
+        """累加浏览量（写入缓冲，由 flush_views 批量落库）。"""
+        from .counters import incr_views
+        incr_views(self, amount)
+
+    @property
+    def total_views(self) -> int:
+        """已落库浏览量 + 缓冲中尚未写回的增量。"""
+        from .counters import get_views
+        return get_views(self)
 
 class BaseCategory(BaseModel):
-    """抽象分类：名称、短标识、父级与排序。"""
+    """抽象分类：名称、短标识、父级与排序。
+
+    额外维护物化路径 ``path``（如 ``/1/5/``）与层级 ``depth``，保存/移动时自动更新，
+    子树、祖先查询均为一次带索引的查询；完整分类树缓存在进程内，任一分类写入后失效。
+    """
     name = models.CharField("名称", max_length=64, db_index=True)
     slug = models.SlugField("标识", max_length=100, unique=True)
     parent = models.ForeignKey("self", verbose_name="父级", on_delete=models.CASCADE, null=True, blank=True, related_name="children")
     sort_order = models.IntegerField("排序", default=0, db_index=True)
+    path = models.CharField("路径", max_length=255, db_index=True, editable=False, default="")
+    depth = models.PositiveSmallIntegerField("层级", default=0, editable=False)
 
     class Meta:
         abstract = True
@@ -30,3 +51,66 @@ class BaseCategory(BaseModel):
 
     def __str__(self):
         return self.name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._tree_parent_id = instance.__dict__.get("parent_id")
+        return instance
+
+    def _parent_path(self):
+        if not self.parent_id:
+            return "/"
+        path = type(self)._base_manager.filter(pk=self.parent_id).values_list("path", flat=True).first()
+        if not path:
+            raise ValueError("父级分类路径缺失，请先保存父级")
+        return path
+
+    def save(self, *args, **kwargs):
+        manager = type(self)._base_manager
+        moved = self._state.adding or not self.path or self.parent_id != getattr(self, "_tree_parent_id", self.parent_id)
+        if not moved:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic(using=kwargs.get("using")):
+            parent_path = self._parent_path()
+            old_path = self.path
+            if self.pk and old_path and parent_path.startswith(old_path):
+                raise ValueError("不能将分类移动到自身或其子分类下")
+            if self.pk:
+                self.path = f"{parent_path}{self.pk}/"
+                self.depth = self.path.count("/") - 2
+            super().save(*args, **kwargs)
+            if not self.path.endswith(f"/{self.pk}/"):
+                # 新建时主键在插入后才可知，补写一次路径
+                self.path = f"{parent_path}{self.pk}/"
+                self.depth = self.path.count("/") - 2
+                manager.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+            if old_path and old_path != self.path:
+                # 一条 UPDATE 改写整棵子树的路径前缀与层级
+                manager.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(Value(self.path), Substr("path", len(old_path) + 1)),
+                    depth=F("depth") + (self.path.count("/") - old_path.count("/")),
+                )
+        self._tree_parent_id = self.parent_id
+
+    def get_descendants(self, include_self=False):
+        """子树（一次前缀查询）。"""
+        qs = type(self)._default_manager.filter(path__startswith=self.path)
+        return qs if include_self else qs.exclude(pk=self.pk)
+
+    def get_ancestors(self, include_self=False):
+        """祖先链（根在前），用于面包屑导航。"""
+        ids = [int(p) for p in self.path.strip("/").split("/") if p]
+        if not include_self:
+            ids = ids[:-1]
+        return type(self)._default_manager.filter(pk__in=ids).order_by("depth")
+
+    def is_descendant_of(self, other) -> bool:
+        return self.path.startswith(other.path) and self.pk != other.pk
+
+    @classmethod
+    def get_tree(cls):
+        """完整分类树（嵌套字典列表，按 sort_order/name 排序），进程内缓存。"""
+        from .category_tree import get_tree
+        return get_tree(cls)
@@ -0,0 +1,94 @@
+"""游标（keyset）分页：按 ``(-created_at, -pk)`` 排序，深翻页也只是一次索引范围扫描。
+
+游标为签名后的不透明字符串，记录边界行的 ``created_at``/``pk`` 与翻页方向，
+客户端无法伪造；无需 ``COUNT(*)``。
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.core import signing
+from django.db.models import Q
+
+from .responses import json_error, json_success
+
+_SALT = "common.pagination.cursor"
+
+
+class InvalidCursor(ValueError):
+    """游标被篡改或格式错误。"""
+
+
+def encode_cursor(obj, direction):
+    return signing.dumps({"t": obj.created_at.isoformat(), "p": obj.pk, "d": direction}, salt=_SALT)
+
+
+def decode_cursor(cursor):
+    try:
+        data = signing.loads(cursor, salt=_SALT)
+        return datetime.fromisoformat(data["t"]), data["p"], data["d"]
+    except (signing.BadSignature, KeyError, TypeError, ValueError) as e:
+        raise InvalidCursor("无效的分页游标") from e
+
+
+@dataclass
+class CursorPage:
+    items: list = field(default_factory=list)
+    next_cursor: str = None
+    prev_cursor: str = None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+class CursorPaginator:
+    """适用于 BaseModel 子类的游标分页器（按创建时间倒序）。"""
+    def __init__(self, queryset, page_size=20, max_page_size=100, active_only=True):
+        self.queryset = queryset.filter(is_active=True) if active_only else queryset
+        self.page_size = max(1, min(int(page_size), max_page_size))
+
+    def page(self, cursor=None) -> CursorPage:
+        if not cursor:
+            rows = list(self.queryset.order_by("-created_at", "-pk")[:self.page_size + 1])
+            more = len(rows) > self.page_size
+            rows = rows[:self.page_size]
+            return CursorPage(rows, encode_cursor(rows[-1], "n") if more else None, None)
+
+        ts, pk, direction = decode_cursor(cursor)
+        if direction == "n":
+            qs = self.queryset.filter(Q(created_at__lt=ts) | Q(created_at=ts, pk__lt=pk)).order_by("-created_at", "-pk")
+        else:
+            qs = self.queryset.filter(Q(created_at__gt=ts) | Q(created_at=ts, pk__gt=pk)).order_by("created_at", "pk")
+        rows = list(qs[:self.page_size + 1])
+        more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if direction == "p":
+            rows.reverse()
+        if not rows:
+            return CursorPage([], None, None)
+        # 向后翻页时“更多”指更早的数据；向前翻页时指更新的数据
+        has_next = more if direction == "n" else True
+        has_prev = True if direction == "n" else more
+        return CursorPage(
+            rows,
+            encode_cursor(rows[-1], "n") if has_next else None,
+            encode_cursor(rows[0], "p") if has_prev else None,
+        )
+
+
+def json_cursor_page(request, queryset, serialize, page_size=20, max_page_size=100, active_only=True):
+    """读取 ``?cursor=&page_size=`` 并以 json_success 返回，附带 ``next``/``prev`` 游标。"""
+    try:
+        size = int(request.GET.get("page_size", page_size))
+    except ValueError:
+        size = page_size
+    paginator = CursorPaginator(queryset, size, max_page_size, active_only)
+    try:
+        page = paginator.page(request.GET.get("cursor"))
+    except InvalidCursor as e:
+        return json_error(str(e), status=400)
+    return json_success([serialize(obj) for obj in page.items], next=page.next_cursor, prev=page.prev_cursor)
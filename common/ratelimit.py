@@ -0,0 +1,285 @@
+"""原子限流：基于缓存计数器的限流器、视图装饰器与 API 中间件。
+
+- django-redis：滑动窗口计数（当前窗口 + 按时间衰减的上一窗口），
+  由一段 Lua 脚本原子完成，每次检查一次往返；
+- 其他缓存后端：固定窗口计数，``incr`` 失败时退回 ``add``，
+  稳定状态下同样只需一次缓存调用；``sliding=True`` 时再读取上一窗口（多一次 ``get_many``），
+  近似滑动窗口，避免窗口交界处放行两倍上限（登录限流使用）。
+超限统一返回 429 的 ``json_error``。
+"""
+import re
+import time
+from dataclasses import dataclass
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from .responses import json_error
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# KEYS: 成对的 (当前窗口, 上一窗口)；ARGV[1]=增量，ARGV[2]=过期秒数
+_SLIDING_WINDOW_LUA = """
+local out = {}
+for i = 1, #KEYS, 2 do
+    local cur = redis.call('INCRBY', KEYS[i], ARGV[1])
+    if cur == tonumber(ARGV[1]) then
+        redis.call('EXPIRE', KEYS[i], ARGV[2])
+    end
+    out[#out + 1] = cur
+    out[#out + 1] = tonumber(redis.call('GET', KEYS[i + 1]) or '0')
+end
+return out
+"""
+
+
+def parse_rate(rate):
+    """解析 ``"10/m"``、``"5/15m"`` 形式的频率，返回 (次数, 周期秒数)。"""
+    if isinstance(rate, (tuple, list)):
+        return int(rate[0]), int(rate[1])
+    m = re.fullmatch(r"\s*(\d+)\s*/\s*(\d*)\s*([smhd])\s*", str(rate))
+    if not m:
+        raise ValueError(f"无法解析的限流频率: {rate!r}")
+    count, mult, unit = m.groups()
+    return int(count), int(mult or 1) * _UNITS[unit]
+
+
+@dataclass
+class RateLimitResult:
+    """单个限流维度的检查结果。"""
+    key: str
+    count: float
+    limit: int
+    period: int
+
+    @property
+    def limited(self) -> bool:
+        return self.count >= self.limit
+
+    @property
+    def remaining(self) -> int:
+        return max(0, int(self.limit - self.count))
+
+
+class RateLimiter:
+    """按标识累加计数的限流器，可一次检查多个标识（如用户与 IP）。"""
+    def __init__(self, rate, prefix="rl", cache_alias="default", sliding=False):
+        self.limit, self.period = parse_rate(rate)
+        self.prefix = prefix
+        self.cache = caches[cache_alias]
+        self.cache_alias = cache_alias
+        self._redis = settings.CACHES.get(cache_alias, {}).get("BACKEND", "").startswith("django_redis")
+        self._sliding = self._redis or sliding
+
+    def _keys(self, ident, now):
+        window = int(now // self.period)
+        return f"{self.prefix}:{ident}:{window}", f"{self.prefix}:{ident}:{window - 1}"
+
+    def _weight(self, now):
+        # 上一窗口在滑动窗口内剩余的比例
+        return 1.0 - (now % self.period) / self.period
+
+    def hit(self, *idents, amount=1, limits=None):
+        """原子累加各标识的计数并返回结果列表；``limits`` 可为各标识单独指定上限。"""
+        now = time.time()
+        limits = limits or [self.limit] * len(idents)
+        if self._redis:
+            counts = self._hit_redis(idents, amount, now)
+        else:
+            counts = [self._hit_generic(self._keys(i, now)[0], amount) for i in idents]
+            if self._sliding:
+                counts = self._add_previous(idents, counts, self.cache.get_many(self._previous_keys(idents, now)), now)
+        return [RateLimitResult(i, c, lim, self.period) for i, c, lim in zip(idents, counts, limits)]
+
+    async def ahit(self, *idents, amount=1, limits=None):
+        """``hit`` 的异步版本。"""
+        now = time.time()
+        limits = limits or [self.limit] * len(idents)
+        if self._redis:
+            counts = await sync_to_async(self._hit_redis)(idents, amount, now)
+        else:
+            counts = [await self._ahit_generic(self._keys(i, now)[0], amount) for i in idents]
+            if self._sliding:
+                previous = await self.cache.aget_many(self._previous_keys(idents, now))
+                counts = self._add_previous(idents, counts, previous, now)
+        return [RateLimitResult(i, c, lim, self.period) for i, c, lim in zip(idents, counts, limits)]
+
+    def _previous_keys(self, idents, now):
+        return [self._keys(i, now)[1] for i in idents]
+
+    def _add_previous(self, idents, counts, values, now):
+        weight = self._weight(now)
+        return [c + int(values.get(self._keys(i, now)[1]) or 0) * weight for i, c in zip(idents, counts)]
+
+    def _peek_keys(self, idents, now):
+        pairs = [self._keys(i, now) for i in idents]
+        wanted = [k for pair in pairs for k in pair] if self._sliding else [cur for cur, _ in pairs]
+        return pairs, wanted
+
+    def peek(self, *idents, limits=None):
+        """只读检查（一次 ``get_many``），不增加计数。"""
+        now = time.time()
+        pairs, wanted = self._peek_keys(idents, now)
+        return self._peek_results(idents, pairs, limits, self.cache.get_many(wanted), now)
+
+    async def apeek(self, *idents, limits=None):
+        """``peek`` 的异步版本（``aget_many``）。"""
+        now = time.time()
+        pairs, wanted = self._peek_keys(idents, now)
+        return self._peek_results(idents, pairs, limits, await self.cache.aget_many(wanted), now)
+
+    def _peek_results(self, idents, pairs, limits, values, now):
+        limits = limits or [self.limit] * len(idents)
+        weight = self._weight(now)
+        results = []
+        for ident, (cur, prev), lim in zip(idents, pairs, limits):
+            count = int(values.get(cur) or 0)
+            if self._sliding:
+                count += int(values.get(prev) or 0) * weight
+            results.append(RateLimitResult(ident, count, lim, self.period))
+        return results
+
+    def reset(self, *idents):
+        now = time.time()
+        self.cache.delete_many([k for i in idents for k in self._keys(i, now)])
+
+    async def areset(self, *idents):
+        now = time.time()
+        await self.cache.adelete_many([k for i in idents for k in self._keys(i, now)])
+
+    def _hit_generic(self, key, amount):
+        try:
+            return self.cache.incr(key, amount)
+        except ValueError:
+            if self.cache.add(key, amount, timeout=self.period * 2):
+                return amount
+            return self.cache.incr(key, amount)  # 并发下被其他请求抢先创建
+
+    async def _ahit_generic(self, key, amount):
+        # BaseCache.aincr 默认实现为 aget + aset，并发协程会丢失计数；改用后端自身的原子 incr
+        return await sync_to_async(self._hit_generic)(key, amount)
+
+    def _hit_redis(self, idents, amount, now):
+        from django_redis import get_redis_connection
+        client = get_redis_connection(self.cache_alias)
+        keys = [self.cache.make_key(k) for i in idents for k in self._keys(i, now)]
+        raw = client.eval(_SLIDING_WINDOW_LUA, len(keys), amount, self.period * 2, *keys)
+        weight = self._weight(now)
+        return [int(raw[j]) + int(raw[j + 1]) * weight for j in range(0, len(raw), 2)]
+
+
+def client_ip(request):
+    return request.META.get("REMOTE_ADDR", "0.0.0.0")
+
+
+def _resolve_ident(request, key):
+    if callable(key):
+        return str(key(request))
+    if key == "ip":
+        return f"ip:{client_ip(request)}"
+    if key == "user":
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+        return f"ip:{client_ip(request)}"
+    if key == "route":
+        return f"route:{request.path}:{client_ip(request)}"
+    raise ValueError(f"未知的限流维度: {key!r}")
+
+
+async def _aresolve_ident(request, key):
+    # 异步视图中 request.user 的惰性加载会触发同步查询，需改用 auser()
+    if key == "user":
+        user = await request.auser()
+        if user.is_authenticated:
+            return f"user:{user.pk}"
+        return f"ip:{client_ip(request)}"
+    return _resolve_ident(request, key)
+
+
+def _limited_response(result):
+    resp = json_error("请求过于频繁，请稍后再试", status=429)
+    resp["Retry-After"] = str(result.period)
+    return resp
+
+
+def ratelimit(rate, key="ip", methods=None, prefix=None):
+    """视图限流装饰器：``key`` 取 ip/user/route 或可调用对象；超限返回 429。支持异步视图。"""
+    limiter_holder = {}
+
+    def decorator(view_func):
+        scope = prefix or f"rl:view:{view_func.__module__}.{view_func.__name__}"
+
+        def get_limiter():
+            limiter = limiter_holder.get("limiter")
+            if limiter is None:
+                limiter = limiter_holder["limiter"] = RateLimiter(rate, prefix=scope)
+            return limiter
+
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _async_view(request, *args, **kwargs):
+                if methods is None or request.method in methods:
+                    result = (await get_limiter().ahit(await _aresolve_ident(request, key)))[0]
+                    if result.count > result.limit:
+                        return _limited_response(result)
+                return await view_func(request, *args, **kwargs)
+            return _async_view
+
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                result = get_limiter().hit(_resolve_ident(request, key))[0]
+                if result.count > result.limit:
+                    return _limited_response(result)
+            return view_func(request, *args, **kwargs)
+
+        return _wrapped_view
+
+    return decorator
+
+
+class RateLimitMiddleware:
+    """按 ``settings.API_RATE_LIMITS`` 为 API 路径统一限流，同时支持同步与异步调用链。
+
+    配置示例：``[{"path": r"^/api/", "rate": "120/m", "key": "ip"}]``，
+    按顺序匹配，每条命中的规则各计一次数。
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self._rules = []
+        for i, rule in enumerate(getattr(settings, "API_RATE_LIMITS", [])):
+            self._rules.append((
+                re.compile(rule["path"]),
+                rule.get("key", "ip"),
+                RateLimiter(rule["rate"], prefix=f"rl:mw:{i}"),
+            ))
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_request(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        for pattern, key, limiter in self._rules:
+            if pattern.search(request.path):
+                result = (await limiter.ahit(await _aresolve_ident(request, key)))[0]
+                if result.count > result.limit:
+                    return _limited_response(result)
+        return await self.get_response(request)
+
+    def process_request(self, request):
+        for pattern, key, limiter in self._rules:
+            if pattern.search(request.path):
+                result = limiter.hit(_resolve_ident(request, key))[0]
+                if result.count > result.limit:
+                    return _limited_response(result)
+        return None
@@ -0,0 +1,162 @@
+"""Minecraft RCON 客户端：单连接复用，一批命令在同一连接上逐条收发。
+
+报文格式：``<int32 长度><int32 请求 ID><int32 类型><ASCII 正文>\\0\\0``（小端）。
+原版/Forge 服务器每次 ``read()`` 只解析一个报文，同一次读取中多余的数据会导致断开，
+因此每条命令都等收到响应后再发送下一条；
+响应正文达到分包上限（4096 字节）时再发送一个未知类型的哨兵报文，服务器会原样回应其 ID，
+借此确定分包的长响应何时结束。
+"""
+import itertools
+import logging
+import socket
+import struct
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger("app")
+
+TYPE_RESPONSE = 0
+TYPE_COMMAND = 2
+TYPE_LOGIN = 3
+# 服务器单个响应报文的最大正文长度：达到该长度说明响应可能被分包
+MAX_RESPONSE_BODY = 4096
+
+
+class RconError(Exception):
+    """连接或协议错误。"""
+
+
+class RconAuthError(RconError):
+    """密码错误。"""
+
+
+def _encode(request_id, kind, body):
+    payload = struct.pack("<ii", request_id, kind) + body.encode("utf-8") + b"\x00\x00"
+    return struct.pack("<i", len(payload)) + payload
+
+
+class RconClient:
+    def __init__(self, host, port=25575, password="", timeout=5.0):
+        self.host = host
+        self.port = int(port)
+        self.password = password
+        self.timeout = timeout
+        self._sock = None
+        self._buffer = b""
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self.close()
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        except OSError as e:
+            raise RconError(f"无法连接 RCON {self.host}:{self.port}：{e}") from e
+        self._sock = sock
+        request_id = next(self._ids)
+        sock.sendall(_encode(request_id, TYPE_LOGIN, self.password))
+        reply_id, _, _ = self._read_packet()
+        if reply_id == -1:
+            self.close()
+            raise RconAuthError("RCON 认证失败")
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._buffer = b""
+
+    def _recv_exact(self, size):
+        while len(self._buffer) < size:
+            chunk = self._sock.recv(max(4096, size - len(self._buffer)))
+            if not chunk:
+                raise RconError("RCON 连接被关闭")
+            self._buffer += chunk
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def _read_packet(self):
+        (length,) = struct.unpack("<i", self._recv_exact(4))
+        if length < 10:
+            raise RconError(f"无效的 RCON 报文长度：{length}")
+        data = self._recv_exact(length)
+        request_id, kind = struct.unpack("<ii", data[:8])
+        return request_id, kind, data[8:-2].decode("utf-8", "replace")
+
+    def _execute(self, commands):
+        return [self._execute_one(c) for c in commands]
+
+    def _execute_one(self, command):
+        request_id = next(self._ids)
+        self._sock.sendall(_encode(request_id, TYPE_COMMAND, command))
+        parts = []
+        while True:
+            reply_id, _, body = self._read_packet()
+            if reply_id == request_id:
+                parts.append(body)
+                break
+        if len(body.encode("utf-8")) < MAX_RESPONSE_BODY:
+            return body
+        # 可能还有后续分包：服务器已读取命令报文，此时再单独发送哨兵
+        sentinel = next(self._ids)
+        self._sock.sendall(_encode(sentinel, TYPE_RESPONSE, ""))
+        while True:
+            reply_id, _, body = self._read_packet()
+            if reply_id == sentinel:
+                return "".join(parts)
+            if reply_id == request_id:
+                parts.append(body)
+
+    def run(self, *commands):
+        """在同一连接上逐条执行一批命令，按顺序返回各自的响应文本。
+
+        连接失效时重连并整批重试一次，因此命令应当幂等（如 ``whitelist add``）。
+        """
+        if not commands:
+            return []
+        with self._lock:
+            for attempt in (1, 2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._execute(commands)
+                except RconAuthError:
+                    raise
+                except (OSError, RconError) as e:
+                    self.close()
+                    if attempt == 2:
+                        if isinstance(e, RconError):
+                            raise
+                        raise RconError(f"RCON 通信失败：{e}") from e
+                    logger.info("RCON 连接失效，重连后重试：%s", e)
+
+    def command(self, command):
+        return self.run(command)[0]
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(host=None, port=None, password=None):
+    """按地址复用进程内的 RCON 连接（默认读取 ``MC_RCON_*`` 配置）。"""
+    host = host or getattr(settings, "MC_RCON_HOST", "127.0.0.1")
+    port = int(port or getattr(settings, "MC_RCON_PORT", 25575))
+    password = password if password is not None else getattr(settings, "MC_RCON_PASSWORD", "")
+    key = (host, port, password)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = RconClient(host, port, password, getattr(settings, "MC_RCON_TIMEOUT", 5.0))
+        return client
+
+
+def close_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
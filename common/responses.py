@@ -1,13 +1,135 @@
-from django.http import JsonResponse
+import csv
+import importlib.util
+import json
+import logging
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.query import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
+
+logger = logging.getLogger("app")
+
+# JSON 序列化后端：orjson 可用时优先（JSON_BACKEND=auto），否则回退标准库
+_ORJSON_AVAILABLE = importlib.util.find_spec("orjson") is not None
+_django_encoder = DjangoJSONEncoder()
+
+
+def _stdlib_dumps(obj) -> bytes:
+    return json.dumps(obj, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _orjson_dumps(obj) -> bytes:
+    import orjson
+    try:
+        # Decimal、惰性翻译字符串等由 DjangoJSONEncoder 兜底；日期时间也交给它，保持与标准库后端相同的格式
+        return orjson.dumps(
+            obj,
+            default=_django_encoder.default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+    except TypeError:
+        # 超出 64 位的整数等 orjson 不支持的值，回退标准库
+        return _stdlib_dumps(obj)
+
+
+def json_dumps(obj) -> bytes:
+    """按 ``settings.JSON_BACKEND`` 选择后端序列化为 UTF-8 字节。"""
+    backend = getattr(settings, "JSON_BACKEND", "auto")
+    if backend in {"auto", "orjson"} and _ORJSON_AVAILABLE:
+        return _orjson_dumps(obj)
+    return _stdlib_dumps(obj)
+
+
+def _json_response(payload, status):
+    return HttpResponse(json_dumps(payload), status=status, content_type="application/json")
+
 
 # 统一 JSON 响应封装（success/data/message 三段式）
 def json_success(data=None, message="成功", status=200, **kwargs):
     payload = {"success": True, "data": data, "message": message}
     payload.update(kwargs)
-    return JsonResponse(payload, status=status, safe=False)
+    return _json_response(payload, status)
 
 
 def json_error(message="失败", data=None, status=400, **kwargs):
     payload = {"success": False, "data": data, "message": message}
     payload.update(kwargs)
-    return JsonResponse(payload, status=status, safe=False)
+    return _json_response(payload, status)
+
+
+def _stream_envelope(items, serialize, message, extra, buffer_size):
+    yield b'{"success":true,"data":['
+    buffer = bytearray()
+    first = True
+    for item in items:
+        if not first:
+            buffer += b","
+        first = False
+        buffer += json_dumps(serialize(item) if serialize else item)
+        if len(buffer) >= buffer_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+    tail = {"message": message, **extra}
+    # 以 "]," 接上其余字段：去掉尾部对象的左花括号
+    yield b"]," + json_dumps(tail)[1:]
+
+
+def json_stream(items, serialize=None, message="成功", status=200, chunk_size=2000, buffer_size=64 * 1024, **kwargs):
+    """以 ``StreamingHttpResponse`` 输出 success/data/message 结构，``data`` 为逐条序列化的列表。
+
+    QuerySet 使用 ``.iterator(chunk_size)`` 分批读取，内存占用与总行数无关。
+    响应开始发送后无法再修改状态码，序列化异常会导致响应体被截断。
+    """
+    if isinstance(items, QuerySet):
+        items = items.iterator(chunk_size=chunk_size)
+    response = StreamingHttpResponse(
+        _stream_envelope(items, serialize, message, kwargs, buffer_size),
+        status=status,
+        content_type="application/json",
+    )
+    return response
+
+
+class _Echo:
+    """csv.writer 的伪文件对象：writerow 直接返回格式化后的行。"""
+    def write(self, value):
+        return value
+
+
+# 以这些字符开头的单元格会被表格软件当作公式执行（CSV 注入）
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_safe(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_rows(rows, header, buffer_size):
+    writer = csv.writer(_Echo())
+    buffer = ["\ufeff"]  # BOM：Excel 按 UTF-8 识别中文
+    size = 0
+    if header:
+        buffer.append(writer.writerow(header))
+    for row in rows:
+        line = writer.writerow([_csv_safe(v) for v in row])
+        buffer.append(line)
+        size += len(line)
+        if size >= buffer_size:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def csv_stream(rows, header=None, filename="export.csv", chunk_size=2000, buffer_size=64 * 1024):
+    """以 ``StreamingHttpResponse`` 输出 CSV 附件；QuerySet（建议 ``values_list``）按 ``chunk_size`` 分批读取。"""
+    if isinstance(rows, QuerySet):
+        rows = rows.iterator(chunk_size=chunk_size)
+    response = StreamingHttpResponse(_csv_rows(rows, header, buffer_size), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
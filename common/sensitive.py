@@ -0,0 +1,164 @@
+"""敏感词匹配引擎：Aho-Corasick 自动机，单次扫描找出全部命中。
+
+- 词典来自 ``settings.SENSITIVE_WORDS_FILE``（每行一词，``#`` 开头为注释），
+  未配置时使用 ``common.forms.SENSITIVE_WORDS``；
+- 每个进程只构建一次，按 ``SENSITIVE_WORDS_CHECK_INTERVAL`` 秒检查文件修改时间，变更后热重载；
+- 提供仅匹配（``contains``/``find``）与替换（``replace``）两种用法。
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger("app")
+
+
+class SensitiveMatcher:
+    """多模式匹配自动机。构建 O(词典总长)，匹配 O(文本长度 + 命中数)。"""
+    def __init__(self, words=()):
+        # 节点以整数编号：goto 转移表、fail 失配指针、out 该节点结束的词长、dict_link 输出链
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [0]
+        self._dict_link = [0]
+        self.size = 0
+        for w in words:
+            self._add(w)
+        self._build()
+
+    def _add(self, word):
+        word = word.strip()
+        if not word:
+            return
+        node = 0
+        for ch in word:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(0)
+                self._dict_link.append(0)
+            node = nxt
+        if not self._out[node]:
+            self.size += 1
+        self._out[node] = len(word)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                fc = self._goto[f].get(ch, 0)
+                self._fail[child] = fc if fc != child else 0
+                # 输出链：沿失配指针最近的一个“词结尾”节点
+                self._dict_link[child] = fc if self._out[fc] else self._dict_link[fc]
+
+    def _scan(self, text):
+        goto, fail, out, link = self._goto, self._fail, self._out, self._dict_link
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            hit = node if out[node] else link[node]
+            while hit:
+                yield i + 1 - out[hit], i + 1
+                hit = link[hit]
+
+    def contains(self, text) -> bool:
+        """是否包含任一敏感词（命中即返回）。"""
+        if not text or not self.size:
+            return False
+        for _ in self._scan(text):
+            return True
+        return False
+
+    def find(self, text):
+        """返回全部命中 ``[(起始, 结束, 词)]``（可能重叠），按结束位置排序。"""
+        if not text or not self.size:
+            return []
+        return [(s, e, text[s:e]) for s, e in self._scan(text)]
+
+    def replace(self, text, repl="*", per_char=False):
+        """按最左最长、互不重叠的原则替换命中；``per_char`` 为真时按字符逐个替换。"""
+        if not text or not self.size:
+            return text
+        matches = sorted(self._scan(text), key=lambda m: (m[0], -m[1]))
+        if not matches:
+            return text
+        parts, pos = [], 0
+        for start, end in matches:
+            if start < pos:
+                continue
+            parts.append(text[pos:start])
+            parts.append(repl * (end - start) if per_char else repl)
+            pos = end
+        parts.append(text[pos:])
+        return "".join(parts)
+
+
+def load_words(path):
+    with open(path, encoding="utf-8") as fh:
+        return [line.strip() for line in fh if line.strip() and not line.lstrip().startswith("#")]
+
+
+_matcher = None
+_matcher_mtime = None
+_last_check = 0.0
+_lock = threading.Lock()
+
+
+def _words_file():
+    return getattr(settings, "SENSITIVE_WORDS_FILE", "") or ""
+
+
+def _build_matcher():
+    path = _words_file()
+    if path and os.path.exists(path):
+        mtime = os.path.getmtime(path)
+        matcher = SensitiveMatcher(load_words(path))
+        logger.info("敏感词词典已加载：%s（%d 条）", path, matcher.size)
+        return matcher, mtime
+    from .forms import SENSITIVE_WORDS
+    return SensitiveMatcher(SENSITIVE_WORDS), None
+
+
+def get_matcher() -> SensitiveMatcher:
+    """返回当前进程的匹配器，词典文件变更时自动重建。"""
+    global _matcher, _matcher_mtime, _last_check
+    now = time.monotonic()
+    interval = getattr(settings, "SENSITIVE_WORDS_CHECK_INTERVAL", 5)
+    if _matcher is not None and now - _last_check < interval:
+        return _matcher
+    with _lock:
+        _last_check = now
+        path = _words_file()
+        try:
+            mtime = os.path.getmtime(path) if path else None
+        except OSError:
+            mtime = None
+        if _matcher is None or mtime != _matcher_mtime:
+            try:
+                _matcher, _matcher_mtime = _build_matcher()
+            except Exception:
+                # 重载失败时继续使用旧词典
+                logger.exception("敏感词词典加载失败：%s", path)
+                if _matcher is None:
+                    raise
+    return _matcher
+
+
+def reset_matcher():
+    """清空已构建的匹配器（词典配置变更或测试时使用）。"""
+    global _matcher, _matcher_mtime, _last_check
+    with _lock:
+        _matcher, _matcher_mtime, _last_check = None, None, 0.0
@@ -0,0 +1,138 @@
+"""Minecraft 服务器状态轮询：后台异步查询，快照写入缓存供接口 O(1) 读取。
+
+- 每台服务器独立协程按间隔查询（mcstatus SLP），互不阻塞；
+- 查询失败时保留上一次成功的数据（stale-while-revalidate），
+  并按指数退避推迟下次查询，直至 ``MC_STATUS_MAX_BACKOFF``；
+- Web 请求只读缓存快照，不会直接连接游戏服务器。
+"""
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger("app")
+
+SNAPSHOT_KEY = "mcstatus:snapshot:{name}"
+
+
+def parse_servers(raw: str):
+    """解析 ``"main=play.example.com:25565,lobby=127.0.0.1"`` 形式的服务器配置。"""
+    servers = []
+    for item in (raw or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, address = item.rpartition("=")
+        host, _, port = address.partition(":")
+        servers.append({"name": name or address, "host": host, "port": int(port or 25565)})
+    return servers
+
+
+def configured_servers():
+    """``settings.MC_SERVERS`` 可为逗号分隔字符串或已解析的字典列表。"""
+    servers = getattr(settings, "MC_SERVERS", [])
+    return parse_servers(servers) if isinstance(servers, str) else list(servers)
+
+
+def get_snapshot(name):
+    """读取单台服务器快照（附带 ``age`` 秒数与 ``stale`` 标记）。"""
+    return _with_age(cache.get(SNAPSHOT_KEY.format(name=name)))
+
+
+def get_snapshots():
+    """一次 ``get_many`` 读取全部已配置服务器的快照，按配置顺序返回。"""
+    names = [s["name"] for s in configured_servers()]
+    found = cache.get_many([SNAPSHOT_KEY.format(name=n) for n in names])
+    return [_with_age(found.get(SNAPSHOT_KEY.format(name=n))) or {"name": n, "online": None} for n in names]
+
+
+async def aget_snapshot(name):
+    return _with_age(await cache.aget(SNAPSHOT_KEY.format(name=name)))
+
+
+async def aget_snapshots():
+    names = [s["name"] for s in configured_servers()]
+    found = await cache.aget_many([SNAPSHOT_KEY.format(name=n) for n in names])
+    return [_with_age(found.get(SNAPSHOT_KEY.format(name=n))) or {"name": n, "online": None} for n in names]
+
+
+def _with_age(snapshot):
+    if snapshot is None:
+        return None
+    snapshot = dict(snapshot)
+    now = time.time()
+    snapshot["age"] = round(now - snapshot["updated_at"], 1) if snapshot.get("updated_at") else None
+    interval = getattr(settings, "MC_STATUS_INTERVAL", 30)
+    snapshot["stale"] = bool(snapshot.get("error")) or snapshot["age"] is None or snapshot["age"] > interval * 2
+    return snapshot
+
+
+async def query_java_status(server, timeout):
+    """默认查询实现：通过 mcstatus 执行一次 Server List Ping。"""
+    from mcstatus import JavaServer
+    status = await JavaServer(server["host"], server["port"], timeout=timeout).async_status(tries=1)
+    return {
+        "players_online": status.players.online,
+        "players_max": status.players.max,
+        "sample": [p.name for p in (status.players.sample or [])],
+        "latency_ms": round(status.latency, 1),
+        "version": status.version.name,
+        "protocol": status.version.protocol,
+        "motd": status.motd.to_plain(),
+    }
+
+
+class StatusPoller:
+    """按服务器并发轮询并写入缓存快照。"""
+    def __init__(self, servers=None, interval=None, timeout=None, max_backoff=None, query=query_java_status):
+        self.servers = servers if servers is not None else configured_servers()
+        self.interval = interval or getattr(settings, "MC_STATUS_INTERVAL", 30)
+        self.timeout = timeout or getattr(settings, "MC_STATUS_TIMEOUT", 3)
+        self.max_backoff = max_backoff or getattr(settings, "MC_STATUS_MAX_BACKOFF", 300)
+        self.query = query
+        self._failures = {}
+
+    def next_delay(self, name) -> float:
+        """成功后按固定间隔；连续失败则指数退避（上限 max_backoff）。"""
+        failures = self._failures.get(name, 0)
+        if not failures:
+            return self.interval
+        return min(self.max_backoff, self.interval * (2 ** failures))
+
+    async def poll_once(self, server):
+        key = SNAPSHOT_KEY.format(name=server["name"])
+        previous = await cache.aget(key) or {}
+        now = time.time()
+        try:
+            data = await asyncio.wait_for(self.query(server, self.timeout), timeout=self.timeout + 1)
+        except Exception as exc:
+            failures = self._failures[server["name"]] = self._failures.get(server["name"], 0) + 1
+            # 保留旧数据继续提供（stale），仅更新错误信息
+            snapshot = {**previous, "name": server["name"], "online": False, "checked_at": now,
+                        "error": str(exc) or exc.__class__.__name__, "failures": failures}
+            logger.warning("服务器状态查询失败 %s:%s（第 %d 次）：%s",
+                           server["host"], server["port"], failures, exc)
+        else:
+            self._failures[server["name"]] = 0
+            snapshot = {**data, "name": server["name"], "online": True, "checked_at": now,
+                        "updated_at": now, "error": None, "failures": 0}
+        await cache.aset(key, snapshot, timeout=None)
+        return snapshot
+
+    async def _run_server(self, server, stop):
+        while not stop.is_set():
+            await self.poll_once(server)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.next_delay(server["name"]))
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self, stop=None):
+        """持续轮询直到 ``stop`` 事件被设置。"""
+        stop = stop or asyncio.Event()
+        await asyncio.gather(*(self._run_server(s, stop) for s in self.servers))
+
+    async def run_once(self):
+        return await asyncio.gather(*(self.poll_once(s) for s in self.servers))
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .category_tree import invalidate_tree
+from .models import BaseCategory, BaseModel
+from .tagged_cache import invalidate_tags, model_tags
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_category_tree(sender, **kwargs):
+    """任一 BaseCategory 子类写入或删除后，在事务提交后使其分类树缓存失效（避免按未提交或已回滚的数据重建）。"""
+    if isinstance(sender, type) and issubclass(sender, BaseCategory):
+        transaction.on_commit(lambda: invalidate_tree(sender), using=kwargs.get("using"))
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_model_tags(sender, instance=None, **kwargs):
+    """BaseModel 子类写入或删除后，失效该对象与该模型集合的缓存标签。
+
+    在事务提交后才递增版本号：提交前失效会让并发请求按未提交的旧数据重算，并以新版本号缓存到过期。
+    """
+    if not getattr(settings, "TAGGED_CACHE_AUTO_INVALIDATE", True):
+        return
+    if isinstance(sender, type) and issubclass(sender, BaseModel) and instance is not None:
+        tags = model_tags(instance)  # 删除后主键会被清空，先取出标签
+        transaction.on_commit(lambda: invalidate_tags(*tags), using=kwargs.get("using"))
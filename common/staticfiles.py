@@ -0,0 +1,173 @@
+"""静态资源：内容哈希文件名 + 预压缩（.gz / .br），以及按 Accept-Encoding 选择预压缩文件的服务中间件。
+
+- ``CompressedManifestStaticFilesStorage``：collectstatic 时先生成带哈希的文件名，
+  再用多进程为文本类文件生成 ``.gz`` / ``.br``；哈希文件名已包含内容摘要，压缩文件已存在即跳过；
+- ``PrecompressedStaticMiddleware``：``STATIC_URL`` 下的请求直接从 ``STATIC_ROOT`` 返回，
+  带哈希的文件使用一年期 ``immutable`` 缓存头。
+- brotli 为可选依赖：未安装时只生成/提供 gzip。
+"""
+import gzip
+import mimetypes
+import os
+import posixpath
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .compression import BROTLI_AVAILABLE, accepted_encodings
+
+COMPRESSIBLE_EXTENSIONS = {
+    ".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".html", ".xml", ".ico", ".wasm", ".ttf", ".otf", ".eot",
+}
+# 文件名中的 12 位内容哈希（ManifestStaticFilesStorage 的默认格式）
+_HASHED_RE = re.compile(r"\.[0-9a-f]{12}\.[^/.]+$")
+
+
+def compress(data, encoding):
+    """按编码压缩字节串：``br``（brotli，需安装）或 ``gzip``（mtime 置 0，输出可复现）。"""
+    if encoding == "br":
+        import brotli
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _compress_file(path, encodings, min_ratio):
+    """在工作进程中压缩单个文件；压缩率不足时不写出。返回写出的编码列表。"""
+    with open(path, "rb") as fp:
+        data = fp.read()
+    written = []
+    for encoding in encodings:
+        target = f"{path}.{'br' if encoding == 'br' else 'gz'}"
+        if os.path.exists(target):
+            continue
+        compressed = compress(data, encoding)
+        if len(compressed) > len(data) * min_ratio:
+            continue
+        tmp = f"{target}.tmp{os.getpid()}"
+        with open(tmp, "wb") as fp:
+            fp.write(compressed)
+        os.replace(tmp, target)
+        written.append(encoding)
+    return written
+
+
+def encodings():
+    return ["br", "gzip"] if BROTLI_AVAILABLE else ["gzip"]
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """带内容哈希的静态文件存储，post_process 之后并行生成预压缩文件。"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed.add(hashed_name)
+            yield name, hashed_name, processed
+        if not dry_run:
+            self.compress_files(sorted(hashed))
+
+    def compress_files(self, names):
+        min_size = getattr(settings, "STATIC_COMPRESS_MIN_SIZE", 256)
+        min_ratio = getattr(settings, "STATIC_COMPRESS_MIN_RATIO", 0.95)
+        formats = encodings()
+        jobs = []
+        for name in names:
+            if posixpath.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            path = self.path(name)
+            # 哈希文件名对应唯一内容：各格式的压缩文件均已存在时无需重新压缩
+            if os.path.getsize(path) < min_size or all(
+                os.path.exists(f"{path}.{'br' if f == 'br' else 'gz'}") for f in formats
+            ):
+                continue
+            jobs.append(path)
+        if not jobs:
+            return 0
+        workers = getattr(settings, "STATIC_COMPRESS_WORKERS", 0) or os.cpu_count() or 1
+        if workers == 1 or len(jobs) < 4:
+            results = [_compress_file(p, formats, min_ratio) for p in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                results = list(pool.map(_compress_file, jobs, [formats] * len(jobs), [min_ratio] * len(jobs),
+                                        chunksize=8))
+        return sum(len(r) for r in results)
+
+
+class PrecompressedStaticMiddleware:
+    """从 ``STATIC_ROOT`` 提供静态文件，优先返回客户端可接受的预压缩版本。
+
+    文件名带内容哈希的资源发送 ``Cache-Control: immutable``（一年），其余使用 ``STATIC_MAX_AGE``。
+    应放在会话/认证等中间件之前，静态请求不再经过它们。
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith("/") else None
+        self.root = os.fspath(settings.STATIC_ROOT)
+        self.max_age = getattr(settings, "STATIC_MAX_AGE", 60)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.serve(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self.serve(request) or await self.get_response(request)
+
+    def serve(self, request):
+        if self.prefix is None or not request.path_info.startswith(self.prefix) or request.method not in ("GET", "HEAD"):
+            return None
+        name = request.path_info[len(self.prefix):]
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        variants = {enc: path + suffix for enc, suffix in (("br", ".br"), ("gzip", ".gz")) if os.path.exists(path + suffix)}
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding", "")) if variants else ()
+        encoding = next((enc for enc in variants if enc in accepted), None)
+        served = variants[encoding] if encoding else path
+        if encoding:
+            stat = os.stat(served)
+
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+        last_modified = int(stat.st_mtime)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            if request.method == "HEAD":
+                response = HttpResponse(content_type=content_type)
+                response["Content-Length"] = stat.st_size
+            else:
+                response = FileResponse(open(served, "rb"), content_type=content_type)
+            if encoding:
+                response["Content-Encoding"] = encoding
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+        if _HASHED_RE.search(name):
+            response["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response["Cache-Control"] = f"public, max-age={self.max_age}"
+        if variants:
+            patch_vary_headers(response, ("Accept-Encoding",))
+        return response
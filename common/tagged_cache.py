@@ -0,0 +1,177 @@
+"""带标签的缓存：按标签版本号失效、单飞重算、TTL 抖动。
+
+- 每个条目记录写入时各标签的版本号；读取时与条目一起 ``get_many``（一次往返），
+  版本不一致即视为过期。``invalidate_tags`` 只需为标签写入新版本号；
+- 条目有软过期（带抖动）与硬过期：软过期后只有抢到锁的进程重算，
+  其余请求继续拿到旧值，避免热点键同时过期造成击穿；
+- BaseModel 子类保存/删除时自动失效 ``<app_label>.<model>:<pk>`` 与 ``<app_label>.<model>:*``
+  （见 ``common.signals``），列表类缓存声明 ``:*`` 标签即可。
+"""
+import hashlib
+import random
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+_TAG_PREFIX = "tagver:"
+_MISSING = object()
+
+
+def _tag_key(tag):
+    return f"{_TAG_PREFIX}{tag}"
+
+
+def model_tags(instance_or_model, pk=None):
+    """模型对应的标签：单条 ``label:pk``，集合 ``label:*``。"""
+    label = instance_or_model._meta.label_lower
+    if pk is None and not isinstance(instance_or_model, type):
+        pk = instance_or_model.pk
+    return [f"{label}:{pk}", f"{label}:*"] if pk is not None else [f"{label}:*"]
+
+
+def invalidate_tags(*tags):
+    """为标签写入新版本号（一次 ``set_many``），所有依赖这些标签的条目随即失效。"""
+    if tags:
+        token = uuid.uuid4().hex
+        cache.set_many({_tag_key(t): token for t in tags}, timeout=None)
+
+
+def _current_versions(tags, known):
+    """补齐缺失的标签版本号（仅在写入条目时发生）。"""
+    versions = {}
+    for tag in tags:
+        v = known.get(_tag_key(tag))
+        if v is None:
+            cache.add(_tag_key(tag), uuid.uuid4().hex, timeout=None)
+            v = cache.get(_tag_key(tag))
+        versions[tag] = v
+    return versions
+
+
+def _jittered(ttl):
+    jitter = getattr(settings, "TAGGED_CACHE_JITTER", 0.1)
+    return ttl * random.uniform(1 - jitter, 1 + jitter)
+
+
+class TaggedCache:
+    def __init__(self, grace=None, lock_timeout=None):
+        self.grace = grace if grace is not None else getattr(settings, "TAGGED_CACHE_GRACE", 60)
+        self.lock_timeout = lock_timeout if lock_timeout is not None else getattr(settings, "TAGGED_CACHE_LOCK_TIMEOUT", 10)
+
+    def _read(self, key, tags):
+        """返回 (值或 _MISSING, 是否新鲜, 标签版本快照)。"""
+        found = cache.get_many([key, *(_tag_key(t) for t in tags)])
+        entry = found.get(key)
+        if entry is None:
+            return _MISSING, False, found
+        fresh = entry["soft"] > time.time() and all(
+            entry["tags"].get(t) == found.get(_tag_key(t)) for t in tags
+        )
+        return entry["value"], fresh, found
+
+    def set(self, key, value, ttl, tags=(), known=None):
+        versions = _current_versions(tags, known or {})
+        soft_ttl = _jittered(ttl)
+        entry = {"value": value, "tags": versions, "soft": time.time() + soft_ttl}
+        # 硬过期以抖动后的软过期为基准，保证软过期后仍有 grace 时间返回旧值
+        cache.set(key, entry, timeout=int(soft_ttl + self.grace) + 1)
+
+    def get_or_set(self, key, func, ttl, tags=()):
+        """读取缓存；过期时仅一个进程调用 ``func`` 重算，其余进程返回旧值。"""
+        tags = list(tags)
+        value, fresh, known = self._read(key, tags)
+        if fresh:
+            return value
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        if cache.add(lock_key, token, timeout=self.lock_timeout):
+            try:
+                value = func()
+                self.set(key, value, ttl, tags, known)
+                return value
+            finally:
+                self._release(lock_key, token)
+        if value is not _MISSING:
+            return value  # 他人正在重算：先返回旧值
+        # 无旧值可用：等待持锁者写入；锁已释放却没有值（持锁者失败或结果不可缓存）时立即自行计算
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value, _, known = self._read(key, tags)
+            if value is not _MISSING:
+                return value
+            if cache.get(lock_key) is None:
+                break
+        value = func()
+        self.set(key, value, ttl, tags, known)
+        return value
+
+    @staticmethod
+    def _release(lock_key, token):
+        # 锁超时后可能已被其他进程重新获取：只删除自己持有的锁
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+tagged_cache = TaggedCache()
+
+
+def _call_key(prefix, args, kwargs):
+    raw = repr((args, sorted(kwargs.items())))
+    return f"tc:{prefix}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def cached(ttl, tags=(), key=None):
+    """函数结果缓存装饰器；``tags``/``key`` 可为可调用对象（接收同样的参数）。"""
+    def decorator(func):
+        prefix = f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if callable(key) else _call_key(prefix, args, kwargs)
+            entry_tags = tags(*args, **kwargs) if callable(tags) else tags
+            return tagged_cache.get_or_set(cache_key, lambda: func(*args, **kwargs), ttl, entry_tags)
+
+        return wrapper
+    return decorator
+
+
+def cache_view(ttl, tags=(), vary_on_user=False):
+    """视图缓存装饰器：仅缓存 GET/HEAD 的 200 响应，按完整路径（含查询串）区分。"""
+    def decorator(view_func):
+        prefix = f"{view_func.__module__}.{view_func.__qualname__}"
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view_func(request, *args, **kwargs)
+            parts = [request.get_full_path()]
+            if vary_on_user:
+                parts.append(str(getattr(request.user, "pk", None)))
+            cache_key = _call_key(prefix, tuple(parts), {})
+            entry_tags = tags(request, *args, **kwargs) if callable(tags) else tags
+            holder = {}
+
+            def render():
+                response = view_func(request, *args, **kwargs)
+                holder["response"] = response
+                if response.status_code != 200 or response.streaming:
+                    raise _Uncacheable
+                return (response.content, response["Content-Type"])
+
+            try:
+                content, content_type = tagged_cache.get_or_set(cache_key, render, ttl, entry_tags)
+            except _Uncacheable:
+                return holder["response"]
+            return holder.get("response") or HttpResponse(content, content_type=content_type)
+
+        return wrapper
+    return decorator
+
+
+class _Uncacheable(Exception):
+    """视图返回了不应缓存的响应（非 200 或流式）。"""
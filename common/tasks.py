@@ -0,0 +1,53 @@
+"""轻量后台任务：进程内有界线程池，把耗时工作移出请求线程。
+
+Celery 接入前的过渡方案：``submit`` 与 ``on_commit`` 接口保持简单，
+后续可替换为 Celery 任务而无需修改调用方。
+``BACKGROUND_TASKS_EAGER`` 为真时同步执行（开发/测试）。
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger("app")
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "BACKGROUND_TASK_WORKERS", 2),
+                    thread_name_prefix="mctp-bg",
+                )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception("后台任务执行失败：%s", getattr(func, "__qualname__", func))
+        raise
+    finally:
+        # 线程池线程不经过请求周期，需要自行释放数据库连接
+        close_old_connections()
+
+
+def submit(func, *args, **kwargs):
+    """提交后台任务；同步模式下直接执行并返回结果。"""
+    if getattr(settings, "BACKGROUND_TASKS_EAGER", False):
+        return func(*args, **kwargs)
+    return _get_executor().submit(_run, func, args, kwargs)
+
+
+def on_commit(func, *args, **kwargs):
+    """当前事务提交后再提交后台任务，避免任务读到未提交的数据。"""
+    transaction.on_commit(lambda: submit(func, *args, **kwargs))
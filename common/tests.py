@@ -0,0 +1,801 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from io import StringIO
+import os
+
+User = get_user_model()
+
+@override_settings(VIEW_COUNTER_FLUSH_INTERVAL=0)
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        from common import counters
+        counters.reset_buffer()
+        self.counters = counters
+        self.u1 = User.objects.create(username='viewer1')
+        self.u2 = User.objects.create(username='viewer2')
+
+    def test_incr_is_buffered(self):
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                self.u1.incr_views()
+        self.u1.refresh_from_db()
+        self.assertEqual(self.u1.views, 0)
+        self.assertEqual(self.u1.total_views, 5)
+
+    def test_flush_groups_updates(self):
+        for _ in range(3):
+            self.u1.incr_views()
+            self.u2.incr_views()
+        # 两个主键增量相同，合并为一条 UPDATE（外加事务保存点）
+        with self.assertNumQueries(3):
+            updated = self.counters.flush_views()
+        self.assertEqual(updated, 2)
+        self.u1.refresh_from_db()
+        self.assertEqual(self.u1.views, 3)
+        self.assertEqual(self.u1.total_views, 3)
+
+    def test_failed_flush_restores_remaining_labels(self):
+        from django.core.exceptions import FieldDoesNotExist
+        buf = self.counters.get_buffer()
+        buf.incr('auth.group', 1, 2)  # 没有 views 字段：写回时失败
+        self.u1.incr_views(3)
+        with self.assertRaises(FieldDoesNotExist):
+            self.counters.flush_views()
+        self.assertEqual(buf.pending('auth.group', [1]), {1: 2})
+        self.assertEqual(self.u1.total_views, 3)
+
+    def test_get_views_many(self):
+        self.u1.incr_views(2)
+        totals = self.counters.get_views_many([self.u1, self.u2])
+        self.assertEqual(totals[self.u1], 2)
+        self.assertEqual(totals[self.u2], 0)
+
+    def test_flush_command(self):
+        self.u2.incr_views(4)
+        out = StringIO()
+        call_command('flush_views', stdout=out)
+        self.u2.refresh_from_db()
+        self.assertEqual(self.u2.views, 4)
+
+class RateLimiterTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_parse_rate(self):
+        from common.ratelimit import parse_rate
+        self.assertEqual(parse_rate("10/m"), (10, 60))
+        self.assertEqual(parse_rate("5/15m"), (5, 900))
+        with self.assertRaises(ValueError):
+            parse_rate("ten per minute")
+
+    def test_hit_and_peek(self):
+        from common.ratelimit import RateLimiter
+        limiter = RateLimiter("3/h", prefix="rl:test")
+        for expected in (1, 2, 3):
+            self.assertEqual(limiter.hit("ip:1")[0].count, expected)
+        self.assertTrue(limiter.peek("ip:1")[0].limited)
+        self.assertFalse(limiter.peek("ip:2")[0].limited)
+        limiter.reset("ip:1")
+        self.assertEqual(limiter.peek("ip:1")[0].count, 0)
+
+    def test_sliding_window_on_generic_backend(self):
+        from unittest import mock
+        from common.ratelimit import RateLimiter
+        fixed = RateLimiter("4/m", prefix="rl:fixed")
+        sliding = RateLimiter("4/m", prefix="rl:sliding", sliding=True)
+        with mock.patch("common.ratelimit.time.time", return_value=6000 + 59):
+            for limiter in (fixed, sliding):
+                for _ in range(4):
+                    limiter.hit("ip:1")
+        # 进入下一窗口 6 秒：上一窗口仍计入 90%
+        with mock.patch("common.ratelimit.time.time", return_value=6060 + 6):
+            self.assertEqual(fixed.hit("ip:1")[0].count, 1)
+            result = sliding.hit("ip:1")[0]
+            self.assertAlmostEqual(result.count, 1 + 4 * 0.9)
+            self.assertTrue(result.count > result.limit)
+            self.assertAlmostEqual(sliding.peek("ip:1")[0].count, 1 + 4 * 0.9)
+
+    def test_decorator_returns_429(self):
+        from django.test import RequestFactory
+        from common.ratelimit import ratelimit
+        from common.responses import json_success
+
+        @ratelimit("2/h", key="ip")
+        def view(request):
+            return json_success()
+
+        rf = RequestFactory()
+        self.assertEqual(view(rf.get('/api/x/')).status_code, 200)
+        self.assertEqual(view(rf.get('/api/x/')).status_code, 200)
+        resp = view(rf.get('/api/x/'))
+        self.assertEqual(resp.status_code, 429)
+        self.assertIn('Retry-After', resp)
+
+class FakeSLPServer:
+    """本地伪 Minecraft 服务器：仅实现 Server List Ping 的状态与 ping 报文。"""
+    def __init__(self, online=3, sample=("Steve", "Alex")):
+        self.status = {
+            "version": {"name": "1.20.1", "protocol": 763},
+            "players": {"max": 20, "online": online,
+                        "sample": [{"name": n, "id": "00000000-0000-0000-0000-000000000000"} for n in sample]},
+            "description": {"text": "MCTP"},
+        }
+        self.server = None
+        self.port = None
+
+    @staticmethod
+    async def _read_varint(reader):
+        value = 0
+        for i in range(5):
+            b = (await reader.readexactly(1))[0]
+            value |= (b & 0x7F) << (7 * i)
+            if not b & 0x80:
+                return value
+        raise ValueError("varint too long")
+
+    @staticmethod
+    def _varint(value):
+        out = bytearray()
+        while True:
+            b = value & 0x7F
+            value >>= 7
+            out.append(b | (0x80 if value else 0))
+            if not value:
+                return bytes(out)
+
+    def _packet(self, payload):
+        return self._varint(len(payload)) + payload
+
+    async def _handle(self, reader, writer):
+        import json as _json
+        try:
+            while True:
+                length = await self._read_varint(reader)
+                data = await reader.readexactly(length)
+                if data[0] == 0x00 and length == 1:  # 状态请求
+                    body = _json.dumps(self.status).encode()
+                    writer.write(self._packet(b"\x00" + self._varint(len(body)) + body))
+                elif data[0] == 0x01:  # ping：原样回显
+                    writer.write(self._packet(data))
+                await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        import asyncio
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class ServerStatusPollerTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_parse_servers(self):
+        from common.server_status import parse_servers
+        self.assertEqual(parse_servers("main=play.example.com:25566, 127.0.0.1"), [
+            {"name": "main", "host": "play.example.com", "port": 25566},
+            {"name": "127.0.0.1", "host": "127.0.0.1", "port": 25565},
+        ])
+
+    def test_poll_fake_server(self):
+        import asyncio
+        from common.server_status import StatusPoller, get_snapshot
+
+        async def scenario():
+            fake = FakeSLPServer()
+            await fake.start()
+            server = {"name": "main", "host": "127.0.0.1", "port": fake.port}
+            poller = StatusPoller(servers=[server], interval=10, timeout=2)
+            snap = await poller.poll_once(server)
+            await fake.stop()
+            return poller, server, snap
+
+        poller, server, snap = asyncio.run(scenario())
+        self.assertTrue(snap["online"])
+        self.assertEqual(snap["players_online"], 3)
+        self.assertEqual(snap["sample"], ["Steve", "Alex"])
+        self.assertEqual(snap["version"], "1.20.1")
+        cached = get_snapshot("main")
+        self.assertFalse(cached["stale"])
+        self.assertIsNotNone(cached["age"])
+
+    def test_failure_keeps_stale_data_and_backs_off(self):
+        import asyncio
+        from common.server_status import StatusPoller, get_snapshot
+        calls = []
+
+        async def flaky(server, timeout):
+            calls.append(1)
+            if len(calls) == 1:
+                return {"players_online": 5}
+            raise ConnectionRefusedError("down")
+
+        server = {"name": "main", "host": "127.0.0.1", "port": 1}
+        poller = StatusPoller(servers=[server], interval=10, max_backoff=60, query=flaky)
+        asyncio.run(poller.poll_once(server))
+        self.assertEqual(poller.next_delay("main"), 10)
+        asyncio.run(poller.poll_once(server))
+        self.assertEqual(poller.next_delay("main"), 20)
+        asyncio.run(poller.poll_once(server))
+        asyncio.run(poller.poll_once(server))
+        self.assertEqual(poller.next_delay("main"), 60)
+        snap = get_snapshot("main")
+        self.assertFalse(snap["online"])
+        self.assertTrue(snap["stale"])
+        self.assertEqual(snap["players_online"], 5)
+
+class SensitiveMatcherTests(TestCase):
+    def tearDown(self):
+        from common.sensitive import reset_matcher
+        reset_matcher()
+
+    def test_find_all_matches_in_one_pass(self):
+        from common.sensitive import SensitiveMatcher
+        m = SensitiveMatcher(["he", "she", "his", "hers", "外挂"])
+        found = [w for _, _, w in m.find("ushers 开外挂")]
+        self.assertEqual(sorted(found), ["he", "hers", "she", "外挂"])
+        self.assertTrue(m.contains("用了外挂"))
+        self.assertFalse(m.contains("正常内容"))
+
+    def test_replace_leftmost_longest(self):
+        from common.sensitive import SensitiveMatcher
+        m = SensitiveMatcher(["ab", "bcd", "cd", "外挂"])
+        self.assertEqual(m.replace("abcd"), "**")
+        self.assertEqual(m.replace("x外挂y", per_char=True), "x**y")
+
+    def test_clean_sensitive_default_words(self):
+        from common.forms import clean_sensitive
+        self.assertEqual(clean_sensitive("hi badword1!"), "hi *!")
+
+    def test_hot_reload_from_file(self):
+        import os
+        import tempfile
+        from common.forms import clean_sensitive
+        from common.sensitive import reset_matcher
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "words.txt")
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write("# 注释\n刷屏\n")
+            with override_settings(SENSITIVE_WORDS_FILE=path, SENSITIVE_WORDS_CHECK_INTERVAL=0):
+                reset_matcher()
+                self.assertEqual(clean_sensitive("别刷屏"), "别*")
+                with open(path, "w", encoding="utf-8") as fh:
+                    fh.write("广告\n")
+                os.utime(path, (1, 1))  # 确保修改时间变化
+                self.assertEqual(clean_sensitive("别刷屏，发广告"), "别刷屏，发*")
+
+from common.models import BaseCategory
+
+class TreeCategory(BaseCategory):
+    class Meta(BaseCategory.Meta):
+        app_label = 'common'
+
+class CategoryTreeTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.root = TreeCategory.objects.create(name='机械', slug='mech', sort_order=1)
+        self.child = TreeCategory.objects.create(name='齿轮', slug='gear', parent=self.root)
+        self.leaf = TreeCategory.objects.create(name='大齿轮', slug='big-gear', parent=self.child)
+        self.other = TreeCategory.objects.create(name='建筑', slug='build', sort_order=0)
+
+    def test_paths_and_queries(self):
+        self.assertEqual(self.leaf.path, f'/{self.root.pk}/{self.child.pk}/{self.leaf.pk}/')
+        self.assertEqual(self.leaf.depth, 2)
+        with self.assertNumQueries(1):
+            self.assertEqual({c.slug for c in self.root.get_descendants()}, {'gear', 'big-gear'})
+        with self.assertNumQueries(1):
+            self.assertEqual([c.slug for c in self.leaf.get_ancestors()], ['mech', 'gear'])
+
+    def test_move_subtree(self):
+        child = TreeCategory.objects.get(pk=self.child.pk)
+        child.parent = self.other
+        child.save()
+        leaf = TreeCategory.objects.get(pk=self.leaf.pk)
+        self.assertEqual(leaf.path, f'/{self.other.pk}/{self.child.pk}/{self.leaf.pk}/')
+        self.assertTrue(leaf.is_descendant_of(self.other))
+        # 不能移动到自身子树下
+        child = TreeCategory.objects.get(pk=self.child.pk)
+        child.parent = leaf
+        with self.assertRaises(ValueError):
+            child.save()
+
+    def test_tree_cached_and_invalidated(self):
+        tree = TreeCategory.get_tree()
+        self.assertEqual([n['slug'] for n in tree], ['build', 'mech'])
+        self.assertEqual(tree[1]['children'][0]['children'][0]['slug'], 'big-gear')
+        with self.assertNumQueries(0):
+            TreeCategory.get_tree()
+        with self.captureOnCommitCallbacks(execute=True):
+            TreeCategory.objects.create(name='红石', slug='redstone', sort_order=2)
+            # 提交前仍返回旧树
+            self.assertEqual([n['slug'] for n in TreeCategory.get_tree()], ['build', 'mech'])
+        self.assertEqual([n['slug'] for n in TreeCategory.get_tree()], ['build', 'mech', 'redstone'])
+
+class JsonResponseTests(TestCase):
+    def test_backends_produce_same_payload(self):
+        import datetime
+        import decimal
+        import json
+        from common.responses import json_success
+        data = {"n": decimal.Decimal("1.50"), "when": datetime.date(2024, 1, 2), 1: "int key", "big": 2 ** 70}
+        for backend in ("stdlib", "auto"):
+            with override_settings(JSON_BACKEND=backend):
+                payload = json.loads(json_success(data).content)
+                self.assertEqual(payload["data"], {"n": "1.50", "when": "2024-01-02", "1": "int key", "big": 2 ** 70})
+
+    def test_backends_format_datetimes_identically(self):
+        import datetime
+        from django.utils import timezone
+        from common.responses import json_dumps
+        data = {
+            "aware": timezone.now(),
+            "naive": datetime.datetime(2026, 10, 18, 15, 43, 46, 834988),
+            "time": datetime.time(8, 30, 15, 123456),
+        }
+        with override_settings(JSON_BACKEND="stdlib"):
+            expected = json_dumps(data)
+        with override_settings(JSON_BACKEND="auto"):
+            self.assertEqual(json_dumps(data), expected)
+        self.assertIn(b'"naive":"2026-10-18T15:43:46.834"', expected)
+
+    def test_json_stream_queryset(self):
+        import json
+        from common.responses import json_stream
+        for i in range(5):
+            User.objects.create(username=f'stream{i}')
+        resp = json_stream(User.objects.order_by('pk').values('username'), chunk_size=2, buffer_size=16, total=5)
+        self.assertTrue(resp.streaming)
+        payload = json.loads(b''.join(resp.streaming_content))
+        self.assertTrue(payload['success'])
+        self.assertEqual([u['username'] for u in payload['data']], [f'stream{i}' for i in range(5)])
+        self.assertEqual(payload['total'], 5)
+
+    def test_json_stream_empty(self):
+        import json
+        from common.responses import json_stream
+        payload = json.loads(b''.join(json_stream([], message='空').streaming_content))
+        self.assertEqual(payload, {"success": True, "data": [], "message": "空"})
+
+class TaggedCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_invalidate_by_tag(self):
+        from common.tagged_cache import tagged_cache, invalidate_tags
+        calls = []
+        compute = lambda: calls.append(1) or len(calls)
+        self.assertEqual(tagged_cache.get_or_set('k', compute, 60, ['user:1', 'news:*']), 1)
+        self.assertEqual(tagged_cache.get_or_set('k', compute, 60, ['user:1', 'news:*']), 1)
+        invalidate_tags('user:2')
+        self.assertEqual(tagged_cache.get_or_set('k', compute, 60, ['user:1', 'news:*']), 1)
+        invalidate_tags('news:*')
+        self.assertEqual(tagged_cache.get_or_set('k', compute, 60, ['user:1', 'news:*']), 2)
+
+    def test_stale_served_while_other_worker_recomputes(self):
+        from django.core.cache import cache
+        from common.tagged_cache import tagged_cache, invalidate_tags
+        tagged_cache.get_or_set('hot', lambda: 'old', 60, ['t'])
+        invalidate_tags('t')
+        cache.add('hot:lock', 1)  # 模拟另一进程持有重算锁
+        self.assertEqual(tagged_cache.get_or_set('hot', lambda: 'new', 60, ['t']), 'old')
+        cache.delete('hot:lock')
+        self.assertEqual(tagged_cache.get_or_set('hot', lambda: 'new', 60, ['t']), 'new')
+
+    def test_waiters_compute_when_lock_holder_fails(self):
+        import threading
+        import time as _time
+        from django.core.cache import cache
+        from common.tagged_cache import TaggedCache
+        tc = TaggedCache(lock_timeout=5)
+        started, release = threading.Event(), threading.Event()
+
+        def failing():
+            started.set()
+            release.wait(2)
+            raise ValueError('boom')
+
+        def holder():
+            with self.assertRaises(ValueError):
+                tc.get_or_set('cold', failing, 60)
+
+        t = threading.Thread(target=holder)
+        t.start()
+        started.wait(2)
+        threading.Timer(0.1, release.set).start()
+        begin = _time.monotonic()
+        self.assertEqual(tc.get_or_set('cold', lambda: 'mine', 60), 'mine')
+        t.join()
+        self.assertLess(_time.monotonic() - begin, 2)
+        self.assertIsNone(cache.get('cold:lock'))
+
+    def test_lock_release_keeps_foreign_lock(self):
+        from django.core.cache import cache
+        from common.tagged_cache import tagged_cache
+
+        def steal():
+            cache.set('k2:lock', 'other-worker')  # 模拟锁超时后被其他进程重新获取
+            return 'v'
+
+        tagged_cache.get_or_set('k2', steal, 60)
+        self.assertEqual(cache.get('k2:lock'), 'other-worker')
+
+    def test_model_save_bumps_tags(self):
+        from common.tagged_cache import cached, model_tags
+        user = User.objects.create(username='tagged')
+        calls = []
+
+        @cached(60, tags=lambda pk: model_tags(User, pk))
+        def profile(pk):
+            calls.append(pk)
+            return User.objects.get(pk=pk).nickname
+
+        self.assertEqual(profile(user.pk), '')
+        profile(user.pk)
+        self.assertEqual(len(calls), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.nickname = 'Tagged'
+            user.save()
+            # 提交前不失效：并发请求不会按未提交的数据写入新版本
+            self.assertEqual(profile(user.pk), '')
+        self.assertEqual(profile(user.pk), 'Tagged')
+        self.assertEqual(len(calls), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+        with self.assertRaises(User.DoesNotExist):
+            profile(user.pk)
+
+    def test_hard_timeout_covers_jittered_soft_expiry(self):
+        from unittest import mock
+        from common.tagged_cache import TaggedCache
+        tc = TaggedCache(grace=60)
+        with mock.patch('common.tagged_cache.random.uniform', return_value=1.1), \
+                mock.patch('common.tagged_cache.cache.set') as cache_set:
+            tc.set('k', 'v', 3600)
+        self.assertGreaterEqual(cache_set.call_args.kwargs['timeout'], 3600 * 1.1 + 60)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'], REPLICA_PIN_SECONDS=5)
+class ReplicaRouterTests(SimpleTestCase):
+    # 仅校验路由结果，不访问数据库（SimpleTestCase 不开启事务）
+    def setUp(self):
+        from common.db_router import PrimaryReplicaRouter
+        self.router = PrimaryReplicaRouter()
+
+    def _middleware(self, view):
+        from common.db_router import ReplicaPinMiddleware
+        return ReplicaPinMiddleware(view)
+
+    def test_reads_stick_to_one_replica_per_request(self):
+        seen = []
+
+        def view(request):
+            seen.extend(self.router.db_for_read(User) for _ in range(20))
+            return HttpResponse()
+
+        response = self._middleware(view)(RequestFactory().get('/'))
+        self.assertEqual(len(set(seen)), 1)
+        self.assertIn(seen[0], ['replica_1', 'replica_2'])
+        self.assertNotIn('db_pin', response.cookies)
+
+    def test_write_pins_rest_of_request_and_sets_cookie(self):
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(User))
+            self.assertEqual(self.router.db_for_write(User), 'default')
+            seen.append(self.router.db_for_read(User))
+            return HttpResponse()
+
+        response = self._middleware(view)(RequestFactory().post('/'))
+        self.assertNotEqual(seen[0], 'default')
+        self.assertEqual(seen[1], 'default')
+        self.assertEqual(response.cookies['db_pin']['max-age'], 5)
+
+    def test_cookie_pins_following_requests(self):
+        import time
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(User))
+            return HttpResponse()
+
+        middleware = self._middleware(view)
+        for value in (str(time.time() + 5), str(time.time() - 1), 'junk'):
+            request = RequestFactory().get('/')
+            request.COOKIES['db_pin'] = value
+            middleware(request)
+        self.assertEqual(seen[0], 'default')
+        self.assertNotEqual(seen[1], 'default')
+        self.assertNotEqual(seen[2], 'default')
+
+    def test_use_primary_and_migrations(self):
+        from common.db_router import use_primary
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(User), 'default')
+        self.assertIn(self.router.db_for_read(User), ['replica_1', 'replica_2'])
+        self.assertFalse(self.router.allow_migrate('replica_1', 'players'))
+        self.assertIsNone(self.router.allow_migrate('default', 'players'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_reads_primary(self):
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+
+class WriteQueueTests(TransactionTestCase):
+    # 写线程使用独立连接，需真实提交，故用 TransactionTestCase
+    def test_batch_commit_and_failure_isolation(self):
+        from common.write_queue import WriteQueue
+        users = [User.objects.create(username=f'wq{i}') for i in range(3)]
+        queue = WriteQueue(batch_size=10, max_delay=0.05)
+
+        def rename(pk, nickname):
+            User.objects.filter(pk=pk).update(nickname=nickname)
+            return pk
+
+        def broken():
+            User.objects.filter(pk=users[0].pk).update(nickname='broken')
+            raise RuntimeError('boom')
+
+        futures = [queue.submit(rename, u.pk, f'n{u.pk}') for u in users]
+        failed = queue.submit(broken)
+        queue.shutdown()
+        self.assertEqual([f.result() for f in futures], [u.pk for u in users])
+        with self.assertRaises(RuntimeError):
+            failed.result()
+        # 失败项只回滚自身保存点
+        self.assertEqual(
+            dict(User.objects.filter(pk__in=[u.pk for u in users]).values_list('pk', 'nickname')),
+            {u.pk: f'n{u.pk}' for u in users},
+        )
+
+    def test_batch_context_failure_fails_every_future(self):
+        import contextlib
+        from django.db import OperationalError
+        from common.write_queue import WriteQueue
+
+        @contextlib.contextmanager
+        def locked():
+            raise OperationalError('database is locked')
+            yield
+
+        queue = WriteQueue(batch_size=10, max_delay=0.05, batch_context=locked)
+        futures = [queue.submit(lambda i=i: i) for i in range(3)]
+        queue.shutdown()
+        for future in futures:
+            with self.assertRaises(OperationalError):
+                future.result(timeout=1)
+
+    def test_bench_command_runs(self):
+        out = StringIO()
+        call_command('bench_sqlite', seconds=0.2, readers=1, writers=1, rows=300, stdout=out)
+        self.assertIn('queued', out.getvalue())
+
+
+class StartupProfileTests(SimpleTestCase):
+    def test_parse_and_group(self):
+        from common.management.commands.profile_startup import group_by_package, parse_importtime
+        text = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |   players.search\n"
+            "import time:      2000 |       2100 | players\n"
+            "import time:       500 |        500 | PIL\n"
+            "import time:       999 |        999 | players.search\n"
+            "other stderr line\n"
+        )
+        modules = parse_importtime(text)
+        self.assertEqual(modules['players.search'], (0.1, 0.1))  # 重复行只计首次
+        self.assertEqual(group_by_package(modules), {'players': 2.1, 'PIL': 0.5})
+
+    def test_compare_ignores_noise(self):
+        from common.management.commands.profile_startup import compare_startup
+        baseline = {'total_ms': 300.0, 'packages': {'django': 100.0, 'players': 2.0}}
+        current = {'total_ms': 302.0, 'packages': {'django': 104.0, 'players': 4.0, 'PIL': 30.0}}
+        # django/players 增量低于绝对下限；PIL 为新增的启动依赖
+        self.assertEqual(compare_startup(current, baseline), ['PIL: 30.0ms，基线 0.0ms'])
+
+    def test_ckeditor_uploader_not_imported_by_urlconf(self):
+        import subprocess
+        import sys
+        from django.conf import settings
+        code = ("import sys, django; django.setup(); import mysite.urls; "
+                "print(sorted(m for m in sys.modules if m.startswith(('ckeditor_uploader.views', 'PIL'))))")
+        out = subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR, capture_output=True, text=True,
+                             env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'mysite.settings', 'DJANGO_ENV': 'production',
+                                  'SECRET_KEY': 'test'})
+        self.assertEqual(out.returncode, 0, out.stderr[-2000:])
+        self.assertEqual(out.stdout.strip().splitlines()[-1], '[]')
+
+
+class DownloadTests(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.data = bytes(range(256)) * 40
+        with open(os.path.join(self.root, 'pack.zip'), 'wb') as fp:
+            fp.write(self.data)
+        override = override_settings(DOWNLOAD_ROOT=self.root, DOWNLOAD_ACCEL_PREFIX='', BACKGROUND_TASKS_EAGER=True)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_full_and_range(self):
+        resp = self.client.get('/downloads/pack.zip')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(b''.join(resp.streaming_content), self.data)
+        self.assertEqual(resp['Accept-Ranges'], 'bytes')
+        self.assertIn('attachment', resp['Content-Disposition'])
+
+        resp = self.client.get('/downloads/pack.zip', HTTP_RANGE='bytes=100-199')
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Range'], f'bytes 100-199/{len(self.data)}')
+        self.assertEqual(resp['Content-Length'], '100')
+        self.assertEqual(b''.join(resp.streaming_content), self.data[100:200])
+
+        resp = self.client.get('/downloads/pack.zip', HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(resp.streaming_content), self.data[-10:])
+
+        resp = self.client.get('/downloads/pack.zip', HTTP_RANGE=f'bytes={len(self.data)}-')
+        self.assertEqual(resp.status_code, 416)
+        self.assertEqual(resp['Content-Range'], f'bytes */{len(self.data)}')
+
+    def test_if_range_and_conditional(self):
+        etag = self.client.head('/downloads/pack.zip')['ETag']
+        resp = self.client.get('/downloads/pack.zip', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(resp.status_code, 206)
+        # 文件已变化（校验值不匹配）：忽略 Range，返回完整文件
+        resp = self.client.get('/downloads/pack.zip', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(resp.status_code, 200)
+        resp.close()
+        self.assertEqual(self.client.get('/downloads/pack.zip', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_accel_redirect_and_traversal(self):
+        with override_settings(DOWNLOAD_ACCEL_PREFIX='/protected/'):
+            resp = self.client.get('/downloads/pack.zip')
+        self.assertEqual(resp['X-Accel-Redirect'], '/protected/pack.zip')
+        self.assertEqual(resp.content, b'')
+        self.assertEqual(self.client.get('/downloads/../settings.py').status_code, 404)
+        self.assertEqual(self.client.get('/downloads/missing.zip').status_code, 404)
+
+    def test_download_counted_once_per_download(self):
+        from common.downloads import serve_download
+        user = User.objects.create(username='dl')
+        factory = RequestFactory()
+        for headers in ({}, {'HTTP_RANGE': 'bytes=0-99'}, {'HTTP_RANGE': 'bytes=100-'}):
+            serve_download(factory.get('/', **headers), 'pack.zip', instance=user).close()
+        # 续传的后续区间不计数
+        self.assertEqual(User.objects.get(pk=user.pk).total_views, 2)
+
+
+class LogPipelineTests(SimpleTestCase):
+    def _record(self, level=20, msg='hello', args=()):
+        import logging
+        return logging.LogRecord('app', level, __file__, 1, msg, args, None)
+
+    def test_listener_writes_json_with_request_id(self):
+        import io
+        import json
+        import logging
+        from common.log import JsonFormatter, LogPipeline, QueueingHandler, _request_id
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        target.setFormatter(JsonFormatter())
+        pipeline = LogPipeline(maxsize=100)
+        pipeline.start()
+        handler = QueueingHandler(pipeline, [target])
+        token = _request_id.set('req-1')
+        try:
+            handler.handle(self._record(msg='hello %s', args=('world',)))
+            try:
+                raise ValueError('boom')
+            except ValueError:
+                import sys
+                record = self._record(40, 'failed')
+                record.exc_info = sys.exc_info()
+                record.status_code = 500
+                handler.handle(record)
+        finally:
+            _request_id.reset(token)
+        pipeline.stop()
+        first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual((first['msg'], first['request_id'], first['level']), ('hello world', 'req-1', 'INFO'))
+        self.assertIn('ValueError: boom', second['exc'])
+        self.assertEqual(second['status_code'], 500)
+
+    def test_overload_samples_and_drops_without_blocking(self):
+        import io
+        import logging
+        from unittest import mock
+        from common.log import LogPipeline, QueueingHandler
+        stream = io.StringIO()
+        pipeline = LogPipeline(maxsize=10, high_water=0.5, sample=10)
+        handler = QueueingHandler(pipeline, [logging.StreamHandler(stream)])
+        # 未启动监听线程，队列不会被消费；采样固定为不保留
+        with mock.patch('common.log.random.randrange', return_value=1):
+            for _ in range(20):
+                handler.handle(self._record())
+            for _ in range(20):
+                handler.handle(self._record(40, 'error'))
+        self.assertEqual(pipeline.stats(), {'queued': 10, 'dropped': 15, 'sampled': 15})
+        # 队列回落后补写一条汇总告警
+        pipeline.start()
+        pipeline.stop()
+        handler.handle(self._record(30, 'after'))
+        pipeline.start()
+        pipeline.stop()
+        self.assertIn('日志队列过载：丢弃 15 条，采样丢弃 15 条', stream.getvalue())
+
+    def test_request_id_header(self):
+        resp = self.client.get('/api/ping/', HTTP_X_REQUEST_ID='abc-123')
+        self.assertEqual(resp['X-Request-ID'], 'abc-123')
+        resp = self.client.get('/api/ping/', HTTP_X_REQUEST_ID='bad id\n')
+        self.assertRegex(resp['X-Request-ID'], r'^[0-9a-f]{32}$')
+
+
+class PrecompressedStaticTests(SimpleTestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.css = b'body { color: red; }\n' * 200
+        with open(os.path.join(self.root, 'app.css'), 'wb') as fp:
+            fp.write(self.css)
+        override = override_settings(STATIC_ROOT=self.root, STATIC_URL='/static/', STATIC_COMPRESS_WORKERS=1)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _storage(self):
+        from common.staticfiles import CompressedManifestStaticFilesStorage
+        return CompressedManifestStaticFilesStorage(location=self.root, base_url='/static/')
+
+    def test_post_process_hashes_and_compresses_once(self):
+        import gzip
+        storage = self._storage()
+        processed = list(storage.post_process({'app.css': (storage, 'app.css')}))
+        hashed = processed[-1][1]
+        self.assertRegex(hashed, r'^app\.[0-9a-f]{12}\.css$')
+        gz_path = storage.path(hashed) + '.gz'
+        with open(gz_path, 'rb') as fp:
+            self.assertEqual(gzip.decompress(fp.read()), self.css)
+        # 内容未变（哈希文件名相同）时不再压缩
+        self.assertEqual(storage.compress_files([hashed]), 0)
+
+    def _serve(self, path, **headers):
+        from common.staticfiles import PrecompressedStaticMiddleware
+        middleware = PrecompressedStaticMiddleware(lambda r: HttpResponse('fallthrough'))
+        return middleware(RequestFactory().get(path, **headers))
+
+    def test_middleware_picks_variant_and_cache_headers(self):
+        storage = self._storage()
+        hashed = list(storage.post_process({'app.css': (storage, 'app.css')}))[-1][1]
+        resp = self._serve(f'/static/{hashed}', HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertEqual(resp['Content-Type'], 'text/css')
+        self.assertIn('immutable', resp['Cache-Control'])
+        self.assertIn('Accept-Encoding', resp['Vary'])
+        self.assertLess(len(b''.join(resp.streaming_content)), len(self.css))
+
+        resp = self._serve(f'/static/{hashed}', HTTP_ACCEPT_ENCODING='identity')
+        self.assertFalse(resp.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(resp.streaming_content), self.css)
+        self.assertEqual(self._serve(f'/static/{hashed}', HTTP_IF_NONE_MATCH=resp['ETag']).status_code, 304)
+
+        resp = self._serve('/static/app.css')
+        self.assertEqual(resp['Cache-Control'], 'public, max-age=60')
+        resp.close()
+        self.assertEqual(self._serve('/static/missing.css').content, b'fallthrough')
+        self.assertEqual(self._serve('/api/ping/').content, b'fallthrough')
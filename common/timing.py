@@ -0,0 +1,214 @@
+"""请求耗时分解：总耗时、SQL、缓存与模板渲染，输出 ``Server-Timing`` 响应头与慢请求日志。
+
+统计数据保存在 contextvar 中，仅在请求处理期间记录；
+缓存与模板的计时通过一次性包装后端方法实现，请求外调用几乎无额外开销。
+"""
+import contextvars
+import heapq
+import json
+import logging
+import time
+from contextlib import ExitStack
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("app")
+
+_stats = contextvars.ContextVar("request_timing", default=None)
+# 防止嵌套调用重复计时（如 BaseCache.get_many 内部逐个调用 get、模板 include）
+_cache_depth = contextvars.ContextVar("timing_cache_depth", default=0)
+_template_depth = contextvars.ContextVar("timing_template_depth", default=0)
+
+_CACHE_METHODS = ("get", "get_many", "set", "set_many", "add", "delete", "delete_many", "incr", "decr", "touch")
+
+
+class RequestStats:
+    __slots__ = ("db_count", "db_time", "slow_sql", "cache_hits", "cache_misses", "cache_time", "tpl_time")
+
+    def __init__(self):
+        self.db_count = 0
+        self.db_time = 0.0
+        self.slow_sql = []  # 小顶堆，保留最慢的若干条
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_time = 0.0
+        self.tpl_time = 0.0
+
+    def record_sql(self, sql, duration, keep):
+        self.db_count += 1
+        self.db_time += duration
+        item = (duration, self.db_count, sql)
+        if len(self.slow_sql) < keep:
+            heapq.heappush(self.slow_sql, item)
+        elif duration > self.slow_sql[0][0]:
+            heapq.heapreplace(self.slow_sql, item)
+
+
+def current_stats():
+    return _stats.get()
+
+
+def _wrap_cache_method(name, func):
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        stats = _stats.get()
+        if stats is None or _cache_depth.get():
+            return func(self, *args, **kwargs)
+        token = _cache_depth.set(1)
+        start = time.perf_counter()
+        try:
+            result = func(self, *args, **kwargs)
+        finally:
+            stats.cache_time += time.perf_counter() - start
+            _cache_depth.reset(token)
+        if name == "get":
+            default = args[1] if len(args) > 1 else kwargs.get("default")
+            if result is default:
+                stats.cache_misses += 1
+            else:
+                stats.cache_hits += 1
+        elif name == "get_many":
+            keys = list(args[0]) if args else list(kwargs.get("keys", []))
+            stats.cache_hits += len(result)
+            stats.cache_misses += len(keys) - len(result)
+        return result
+    wrapper._timing_wrapped = True
+    return wrapper
+
+
+def instrument_cache_backends():
+    """包装各缓存后端类的读写方法（每个类只包装一次）。"""
+    from django.core.cache import caches
+    for alias in settings.CACHES:
+        cls = type(caches[alias])
+        for name in _CACHE_METHODS:
+            func = getattr(cls, name, None)
+            if func is None or getattr(func, "_timing_wrapped", False):
+                continue
+            setattr(cls, name, _wrap_cache_method(name, func))
+
+
+def instrument_templates():
+    from django.template.base import Template
+    if getattr(Template.render, "_timing_wrapped", False):
+        return
+    original = Template.render
+
+    @wraps(original)
+    def render(self, context):
+        stats = _stats.get()
+        if stats is None or _template_depth.get():
+            return original(self, context)
+        token = _template_depth.set(1)
+        start = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            stats.tpl_time += time.perf_counter() - start
+            _template_depth.reset(token)
+
+    render._timing_wrapped = True
+    Template.render = render
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+class RequestTimingMiddleware:
+    """记录每个请求的耗时分解，写入 ``Server-Timing``；超过阈值写入 ``app`` 慢请求日志。
+
+    应放在 MIDDLEWARE 首位，以覆盖其余中间件的耗时。同时支持同步与异步调用链。
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.threshold_ms = getattr(settings, "SLOW_REQUEST_THRESHOLD_MS", 500)
+        self.keep_sql = getattr(settings, "SLOW_REQUEST_SQL_COUNT", 3)
+        self.emit_header = getattr(settings, "SERVER_TIMING_HEADER", True)
+        instrument_cache_backends()
+        instrument_templates()
+
+    def _sql_wrapper(self, stats):
+        keep = self.keep_sql
+
+        def wrapper(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats.record_sql(sql, time.perf_counter() - start, keep)
+        return wrapper
+
+    def _instrument(self, stack, stats):
+        wrapper = self._sql_wrapper(stats)
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(wrapper))
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _stats.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                self._instrument(stack, stats)
+                response = self.get_response(request)
+        finally:
+            _stats.reset(token)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _stats.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                self._instrument(stack, stats)
+                response = await self.get_response(request)
+        finally:
+            _stats.reset(token)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    def _finish(self, request, response, stats, total):
+        if self.emit_header:
+            response["Server-Timing"] = self.server_timing(stats, total)
+        if self.threshold_ms and total * 1000 >= self.threshold_ms:
+            self.log_slow(request, response, stats, total)
+        return response
+
+    @staticmethod
+    def server_timing(stats, total):
+        return ", ".join([
+            f"total;dur={_ms(total)}",
+            f'db;dur={_ms(stats.db_time)};desc="{stats.db_count} queries"',
+            f'cache;dur={_ms(stats.cache_time)};desc="{stats.cache_hits} hit {stats.cache_misses} miss"',
+            f"tpl;dur={_ms(stats.tpl_time)}",
+        ])
+
+    def log_slow(self, request, response, stats, total):
+        data = {
+            "method": request.method,
+            "path": request.path,
+            "status": getattr(response, "status_code", None),
+            "total_ms": _ms(total),
+            "db_ms": _ms(stats.db_time),
+            "db_queries": stats.db_count,
+            "cache_ms": _ms(stats.cache_time),
+            "cache_hits": stats.cache_hits,
+            "cache_misses": stats.cache_misses,
+            "template_ms": _ms(stats.tpl_time),
+            "slowest_sql": [
+                {"ms": _ms(d), "sql": sql[:500]} for d, _, sql in sorted(stats.slow_sql, reverse=True)
+            ],
+        }
+        logger.warning("慢请求 %s", json.dumps(data, ensure_ascii=False), extra={"request_timing": data})
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+from .upload_validators import (
+    HEADER_READ_LIMIT, check_dimensions, check_format, needs_pil_fallback, parse_image_header,
+)
+
+
+class ImageUploadLimitHandler(FileUploadHandler):
+    """在上传流读取阶段校验图片：超出大小、尺寸或格式限制时立即丢弃，不落盘也不进内存。
+
+    需排在 ``FILE_UPLOAD_HANDLERS`` 首位；被丢弃的文件不会出现在 ``request.FILES`` 中，
+    原因记录在 ``request.upload_errors[字段名]``，由 ``common.forms.UploadErrorsFormMixin``
+    （后台见 ``common.admin.UploadErrorsAdminMixin``）作为字段错误返回。
+    文件头解析器不支持的格式（见 ``HEADER_FORMATS``）在此只做大小限制，格式与尺寸由 ``validate_image`` 经 PIL 校验。
+    """
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.is_image = (content_type or "").startswith("image/")
+        self.checked = False
+        self.received = 0
+        self.head = b""
+        self.max_bytes = settings.MEDIA_MAX_IMAGE_SIZE_MB * 1024 * 1024
+        if self.is_image and content_length and content_length > self.max_bytes:
+            self._reject(f"图片大小超过限制：{settings.MEDIA_MAX_IMAGE_SIZE_MB}MB")
+
+    def _reject(self, message):
+        if not hasattr(self.request, "upload_errors"):
+            self.request.upload_errors = {}
+        self.request.upload_errors[self.field_name] = message
+        raise SkipFile(message)
+
+    def _sniff(self, chunk):
+        self.head += chunk[:HEADER_READ_LIMIT - len(self.head)]
+        try:
+            info = parse_image_header(self.head)
+        except ValueError:
+            if self.is_image and not needs_pil_fallback():
+                self._reject("无法识别的图片文件")
+            self.checked = True  # 非图片文件：交由后续处理器
+            return
+        if info is None:
+            if len(self.head) >= HEADER_READ_LIMIT:
+                self._reject("无法识别的图片文件")
+            return
+        self.checked = True
+        self.is_image = True
+        self.head = b""
+        fmt, width, height = info
+        try:
+            check_format(fmt)
+            check_dimensions(width, height)
+        except ValidationError as e:
+            self._reject(e.messages[0])
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if not self.checked:
+            self._sniff(raw_data)
+        if self.is_image and self.received > self.max_bytes:
+            self._reject(f"图片大小超过限制：{settings.MEDIA_MAX_IMAGE_SIZE_MB}MB")
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
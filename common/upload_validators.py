@@ -1,21 +1,160 @@
+import struct
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from PIL import Image
+from django.core.files.uploadedfile import UploadedFile
+
+# 读取文件头的上限：足以覆盖带较大 EXIF/ICC 段的 JPEG
+HEADER_READ_LIMIT = 256 * 1024
+
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _parse_jpeg(data):
+    pos = 2
+    while True:
+        # 跳过填充字节，定位下一个标记
+        while pos < len(data) and data[pos] == 0xFF:
+            pos += 1
+        if pos >= len(data):
+            return None
+        marker = data[pos]
+        pos += 1
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            continue  # 无长度字段的标记
+        if pos + 2 > len(data):
+            return None
+        length = struct.unpack(">H", data[pos:pos + 2])[0]
+        if marker in _JPEG_SOF:
+            if pos + 7 > len(data):
+                return None
+            height, width = struct.unpack(">HH", data[pos + 3:pos + 7])
+            return "JPEG", width, height
+        if marker == 0xD9 or length < 2:
+            raise ValueError("JPEG 缺少尺寸信息")
+        pos += length
+        if pos >= len(data):
+            return None
+        if data[pos] != 0xFF:
+            raise ValueError("JPEG 结构损坏")
+
+
+def _parse_webp(data):
+    if len(data) < 30:
+        return None
+    chunk = data[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", data[26:30])
+        return "WEBP", width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        b0, b1, b2, b3 = data[21:25]
+        width = 1 + (b0 | ((b1 & 0x3F) << 8))
+        height = 1 + ((b1 >> 6) | (b2 << 2) | ((b3 & 0x0F) << 10))
+        return "WEBP", width, height
+    if chunk == b"VP8X":
+        width = 1 + int.from_bytes(data[24:27], "little")
+        height = 1 + int.from_bytes(data[27:30], "little")
+        return "WEBP", width, height
+    raise ValueError("无法识别的 WebP 数据块")
+
+
+def parse_image_header(data: bytes):
+    """仅凭文件头识别格式与尺寸，不解码像素。
+
+    返回 ``(格式, 宽, 高)``；数据不足以判断时返回 None；无法识别则抛出 ValueError。
+    """
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        if len(data) < 24:
+            return None
+        if data[12:16] != b"IHDR":
+            raise ValueError("PNG 缺少 IHDR")
+        width, height = struct.unpack(">II", data[16:24])
+        return "PNG", width, height
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        if len(data) < 10:
+            return None
+        width, height = struct.unpack("<HH", data[6:10])
+        return "GIF", width, height
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return _parse_webp(data)
+    if data[:2] == b"\xff\xd8":
+        return _parse_jpeg(data)
+    if len(data) < 12:
+        return None
+    raise ValueError("无法识别的图片格式")
+
+
+def check_dimensions(width, height):
+    """按配置校验宽、高与总像素数，防止解压炸弹。"""
+    max_w = getattr(settings, "MEDIA_MAX_IMAGE_WIDTH", 8192)
+    max_h = getattr(settings, "MEDIA_MAX_IMAGE_HEIGHT", 8192)
+    max_pixels = getattr(settings, "MEDIA_MAX_IMAGE_PIXELS", 40_000_000)
+    if width <= 0 or height <= 0:
+        raise ValidationError("图片尺寸无效")
+    if width > max_w or height > max_h:
+        raise ValidationError(f"图片尺寸超过限制：{max_w}x{max_h}")
+    if width * height > max_pixels:
+        raise ValidationError(f"图片像素数超过限制：{max_pixels}")
+
+
+# parse_image_header 能直接识别的格式；ALLOWED_IMAGE_FORMATS 中的其他格式（如 BMP、TIFF）由 PIL 读取文件头
+HEADER_FORMATS = {"PNG", "GIF", "JPEG", "WEBP"}
+
+
+def _allowed_formats():
+    return {f.strip().upper() for f in settings.ALLOWED_IMAGE_FORMATS if f.strip()}
+
+
+def needs_pil_fallback():
+    """允许的格式中是否有文件头解析器不支持的格式。"""
+    return bool(_allowed_formats() - HEADER_FORMATS)
+
+
+def _pil_header(file):
+    from PIL import Image
+
+    # Image.open 只解析文件头，不解码像素
+    with Image.open(file) as img:
+        return img.format, img.width, img.height
+
+
+def check_format(fmt):
+    allowed = _allowed_formats()
+    if fmt not in allowed:
+        raise ValidationError(f"不支持的图片格式：{fmt}，仅支持：{', '.join(sorted(allowed))}")
+
 
 def validate_image(file):
-    """校验图片大小与格式。超限或格式不允许则抛出 ValidationError。"""
-    # 大小校验
+    """校验图片大小、格式与尺寸（仅读取文件头）。超限或格式不允许则抛出 ValidationError。
+
+    作为模型字段校验器时，已保存的文件（``full_clean`` 编辑其他字段时）不再校验，只校验新上传的文件。
+    """
+    if not isinstance(file, UploadedFile) and getattr(file, "_committed", False) is not False:
+        return
     max_bytes = settings.MEDIA_MAX_IMAGE_SIZE_MB * 1024 * 1024
-    if file.size > max_bytes:
-        raise ValidationError(f"图片大小超过限制：{settings.MEDIA_MAX_IMAGE_SIZE_MB}MB")
-    # 格式校验
     try:
-        img = Image.open(file)
-        fmt = img.format.upper()
-        allowed = {f.strip().upper() for f in settings.ALLOWED_IMAGE_FORMATS}
-        if fmt not in allowed:
-            raise ValidationError(f"不支持的图片格式：{fmt}，仅支持：{', '.join(sorted(allowed))}")
+        # 大小校验
+        if file.size > max_bytes:
+            raise ValidationError(f"图片大小超过限制：{settings.MEDIA_MAX_IMAGE_SIZE_MB}MB")
+        # 格式与尺寸校验：只读文件头
+        file.seek(0)
+        head = file.read(HEADER_READ_LIMIT)
+        file.seek(0)
+        try:
+            info = parse_image_header(head)
+        except ValueError:
+            if not needs_pil_fallback():
+                raise
+            info = _pil_header(file)
+            file.seek(0)
     except ValidationError:
         raise
+    except OSError as e:
+        raise ValidationError("无法读取图片文件") from e
     except Exception as e:
         raise ValidationError("无法识别的图片文件") from e
+    if info is None:
+        raise ValidationError("无法识别的图片文件")
+    fmt, width, height = info
+    check_format(fmt)
+    check_dimensions(width, height)
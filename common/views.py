@@ -0,0 +1,41 @@
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+
+from .downloads import serve_download
+from .upload_validators import validate_image
+
+
+def _ckeditor_error(message):
+    # CKEditor 4 上传接口约定的错误结构
+    return JsonResponse({"uploaded": 0, "error": {"message": message}})
+
+
+def ckeditor_upload(request):
+    """CKEditor 图片上传：先经统一图片校验，再交由 ckeditor_uploader 保存。"""
+    from ckeditor_uploader.views import upload
+
+    if request.method == "POST":
+        uploaded = request.FILES.get("upload")
+        if uploaded is None:
+            # 上传流被 ImageUploadLimitHandler 丢弃时，原因在解析请求体后才可读取
+            errors = getattr(request, "upload_errors", {})
+            return _ckeditor_error(errors.get("upload", "未收到上传文件"))
+        try:
+            validate_image(uploaded)
+        except ValidationError as e:
+            return _ckeditor_error(e.messages[0])
+    return upload(request)
+
+
+def ckeditor_browse(request):
+    """CKEditor 文件浏览：视图模块在首次访问时导入，不进入进程启动路径。"""
+    from ckeditor_uploader.views import browse
+
+    return browse(request)
+
+
+@require_safe
+def download_file(request, path):
+    """下载中心文件（DOWNLOAD_ROOT 下），支持 Range 断点续传。"""
+    return serve_download(request, path)
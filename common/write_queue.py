@@ -0,0 +1,138 @@
+"""进程内写入队列：单个写线程串行执行小写入，并按批合并提交（group commit）。
+
+SQLite 同一时刻只允许一个写事务：多个请求线程各自写入时会互相等待写锁，
+每次提交都要一次刷盘。交给写线程后，请求线程只需入队；一批写入共用一个事务，
+每项写入包在保存点中，单项失败只回滚自身。结果在整批提交后才写入 Future。
+
+只适合可独立提交、不依赖当前请求事务的写入。``SQLITE_WRITE_QUEUE`` 关闭时同步执行。
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger("app")
+
+_STOP = object()
+
+
+class WriteQueue:
+    """``batch_context``/``item_context`` 默认为 ``transaction.atomic``（整批事务 + 每项保存点）。"""
+
+    def __init__(self, batch_size=100, max_delay=0.005, batch_context=None, item_context=None, name="mctp-writer"):
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max_delay
+        self._batch_context = batch_context or transaction.atomic
+        self._item_context = item_context or transaction.atomic
+        self._name = name
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs) -> Future:
+        future = Future()
+        self._ensure_started()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name=self._name, daemon=True)
+                    self._thread.start()
+
+    def shutdown(self, wait=True):
+        """处理完已入队的写入后停止写线程。"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            if wait:
+                thread.join()
+
+    def _loop(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            # 短暂等待更多写入，凑成一批
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        close_old_connections()
+        done = []
+        try:
+            with self._batch_context():
+                for future, func, args, kwargs in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with self._item_context():
+                            done.append((future, func(*args, **kwargs), None))
+                    except Exception as exc:
+                        logger.exception("队列写入失败：%s", getattr(func, "__qualname__", func))
+                        done.append((future, None, exc))
+        except Exception as exc:
+            # 开启事务或提交失败：本批所有未完成的写入一并视为失败（含尚未执行的项）
+            logger.exception("写入队列批量提交失败（%d 项）", len(batch))
+            errors = {id(future): error for future, _, error in done}
+            for future, *_ in batch:
+                if not future.done():
+                    future.set_exception(errors.get(id(future)) or exc)
+            return
+        finally:
+            close_old_connections()
+        for future, result, error in done:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+_write_queue = None
+_lock = threading.Lock()
+
+
+def get_write_queue():
+    global _write_queue
+    if _write_queue is None:
+        with _lock:
+            if _write_queue is None:
+                _write_queue = WriteQueue(
+                    batch_size=getattr(settings, "SQLITE_WRITE_QUEUE_BATCH", 100),
+                    max_delay=getattr(settings, "SQLITE_WRITE_QUEUE_DELAY_MS", 5) / 1000,
+                )
+                # 进程退出前写完队列中的数据
+                atexit.register(_write_queue.shutdown)
+    return _write_queue
+
+
+def enqueue_write(func, *args, **kwargs) -> Future:
+    """提交一次小写入；未开启写入队列时同步执行，返回已完成的 Future。"""
+    if getattr(settings, "SQLITE_WRITE_QUEUE", False):
+        return get_write_queue().submit(func, *args, **kwargs)
+    future = Future()
+    try:
+        future.set_result(func(*args, **kwargs))
+    except Exception as exc:
+        logger.exception("写入失败：%s", getattr(func, "__qualname__", func))
+        future.set_exception(exc)
+    return future
@@ -1,10 +1,19 @@
-from django.utils.deprecation import MiddlewareMixin
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import HttpResponse
 
-class SecurityHeadersMiddleware(MiddlewareMixin):
-    """统一添加安全响应头，强化基础安全策略。"""
+class SecurityHeadersMiddleware:
+    """统一添加安全响应头，强化基础安全策略。
+
+    同时支持同步与异步调用链：ASGI 下直接 await，不经过 sync_to_async 线程切换。
+    """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
-        super().__init__(get_response)
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
         # 实例级配置，便于后续扩展与测试
         self._policies = {
             "X-Frame-Options": "DENY",
@@ -14,9 +23,17 @@ class SecurityHeadersMiddleware(MiddlewareMixin):
             "Permissions-Policy": "geolocation=(), microphone=(), camera=()",
         }
 
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
     def process_response(self, request, response: HttpResponse):
         # 显式使用 request 以满足静态检查；未来可按路径/方法定制策略
         _ = (request.method, request.path)
         for header, value in self._policies.items():
             response.setdefault(header, value)
-        return response
\ No newline at end of file
+        return response
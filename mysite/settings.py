@@ -6,6 +6,7 @@ mysite 项目的 Django 设置。
 
 from pathlib import Path
 import os
+import sys
 import importlib
 _util = getattr(importlib, 'util', None)
 _DOTENV_AVAILABLE = _util.find_spec("dotenv") is not None if _util else False
@@ -73,6 +74,9 @@ if DJANGO_ENV == "development":
 # 中间件
 # ----------------------------------------
 MIDDLEWARE = [
+    "common.log.RequestIDMiddleware",  # 置于首位：后续中间件的日志均带请求 ID
+    "common.timing.RequestTimingMiddleware",  # 统计完整请求耗时
+    "common.compression.CompressionMiddleware",  # 压缩其后中间件与视图生成的最终响应体
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -83,8 +87,9 @@ MIDDLEWARE = [
 ]
 if DJANGO_ENV == "development":
     MIDDLEWARE += ["debug_toolbar.middleware.DebugToolbarMiddleware"]
-# 挂载统一 API 异常处理与安全响应头
+# 挂载 API 限流、统一异常处理与安全响应头
 MIDDLEWARE += [
+    "common.ratelimit.RateLimitMiddleware",
     "common.api_middleware.ApiExceptionMiddleware",
     "mysite.middleware.SecurityHeadersMiddleware",
 ]
@@ -114,6 +119,18 @@ ASGI_APPLICATION = "mysite.asgi.application"
 # 数据库
 # ----------------------------------------
 DB_ENGINE = os.getenv("DB_ENGINE", "sqlite").lower()
+# SQLite 生产配置：WAL（读写互不阻塞）、synchronous=NORMAL、内存映射与页缓存；
+# 每个新连接执行一次。生产环境默认开启，SQLITE_TUNED=0 可关闭
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))}",
+    f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_SIZE_KB', '65536'))}",
+    "PRAGMA temp_store=MEMORY",
+]
+# 等待写锁的最长秒数（busy timeout）
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "20"))
+SQLITE_TUNED = os.getenv("SQLITE_TUNED", "1" if DJANGO_ENV == "production" else "0").lower() in {"1", "true", "yes", "on"}
 if DB_ENGINE in {"sqlite", "sqlite3"}:
     DATABASES = {
         "default": {
@@ -121,6 +138,13 @@ if DB_ENGINE in {"sqlite", "sqlite3"}:
             "NAME": str(BASE_DIR / os.getenv("DB_NAME", "db.sqlite3")),
         }
     }
+    if SQLITE_TUNED:
+        DATABASES["default"]["OPTIONS"] = {
+            "init_command": ";".join(SQLITE_PRAGMAS),
+            "timeout": SQLITE_BUSY_TIMEOUT,
+            # 写事务一开始即取得写锁：避免读锁升级为写锁时直接报 database is locked（busy timeout 对此无效）
+            "transaction_mode": "IMMEDIATE",
+        }
 elif DB_ENGINE in {"postgres", "postgresql", "psql"}:
     DATABASES = {
         "default": {
@@ -131,8 +155,24 @@ elif DB_ENGINE in {"postgres", "postgresql", "psql"}:
             "HOST": os.getenv("DB_HOST", "127.0.0.1"),
             "PORT": os.getenv("DB_PORT", "5432"),
             "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+            "CONN_HEALTH_CHECKS": True,
         }
     }
+    # psycopg 3 连接池（需安装 psycopg[pool]）：与 CONN_MAX_AGE 持久连接互斥，
+    # 借出连接前执行健康检查，自动丢弃已断开的连接
+    if os.getenv("DB_POOL", "false").lower() in {"1", "true", "yes", "on"}:
+        _pool = {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+        }
+        if _util and _util.find_spec("psycopg_pool"):
+            _check = getattr(importlib.import_module("psycopg_pool").ConnectionPool, "check_connection", None)
+            if _check:  # psycopg_pool >= 3.2
+                _pool["check"] = _check
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"] = {"pool": _pool}
 elif DB_ENGINE in {"mysql"}:
     DATABASES = {
         "default": {
@@ -143,6 +183,7 @@ elif DB_ENGINE in {"mysql"}:
             "HOST": os.getenv("DB_HOST", "127.0.0.1"),
             "PORT": os.getenv("DB_PORT", "3306"),
             "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+            "CONN_HEALTH_CHECKS": True,
             "OPTIONS": {
                 "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
             },
@@ -151,15 +192,41 @@ elif DB_ENGINE in {"mysql"}:
 else:
     raise RuntimeError(f"不支持的 DB_ENGINE: {DB_ENGINE}")
 
+# 只读副本：DB_REPLICAS 以逗号分隔。SQLite 下每项为数据库文件名，
+# 其余引擎为 host[:port]，账号与库名沿用主库。副本别名为 replica_1、replica_2 ...
+# 测试时副本镜像主库，不单独建库
+DATABASE_REPLICAS = []
+for _i, _replica in enumerate([r.strip() for r in os.getenv("DB_REPLICAS", "").split(",") if r.strip()], 1):
+    _conf = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+    if DATABASES["default"]["ENGINE"].endswith("sqlite3"):
+        _conf["NAME"] = str(BASE_DIR / _replica)
+    else:
+        _host, _, _port = _replica.partition(":")
+        _conf.update(HOST=_host, PORT=_port or DATABASES["default"]["PORT"])
+    DATABASES[f"replica_{_i}"] = _conf
+    DATABASE_REPLICAS.append(f"replica_{_i}")
+
+# 写入后该客户端的读取固定到主库的时长（秒），用于掩盖主从复制延迟
+REPLICA_PIN_SECONDS = int(os.getenv("DB_REPLICA_PIN_SECONDS", "5"))
+REPLICA_PIN_COOKIE = "db_pin"
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ["common.db_router.PrimaryReplicaRouter"]
+    # 置于会话/认证中间件之前：其中的写入（如登录更新 last_login）同样触发固定
+    MIDDLEWARE.insert(2, "common.db_router.ReplicaPinMiddleware")
+
 # ----------------------------------------
 # 认证 / 用户
 # ----------------------------------------
 AUTH_USER_MODEL = "players.User"
+# 仅保留一个后端：UsernameOrQQBackend 继承 ModelBackend 并已覆盖用户名登录，
+# 再叠加 ModelBackend 会让失败登录多计算一次密码哈希
 AUTHENTICATION_BACKENDS = [
     "players.auth_backends.UsernameOrQQBackend",  # 支持用户名或 QQ 号登录
-    "django.contrib.auth.backends.ModelBackend",
 ]
 
+# 异步登录时密码哈希所用线程池大小（限制并发 CPU 占用）
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+
 # 密码校验（包含复杂度校验器）
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -177,6 +244,24 @@ LOGOUT_REDIRECT_URL = os.getenv("LOGOUT_REDIRECT_URL", "/")
 LOGIN_ATTEMPT_LIMIT = int(os.getenv("LOGIN_ATTEMPT_LIMIT", "5"))
 LOGIN_LOCKOUT_MINUTES = int(os.getenv("LOGIN_LOCKOUT_MINUTES", "15"))
 
+# API 通用限流（RateLimitMiddleware 按顺序匹配路径；key 可选 ip/user/route）
+API_RATE_LIMITS = [
+    {"path": r"^/api/", "rate": os.getenv("API_RATE_LIMIT", "120/m"), "key": "ip"},
+]
+
+# 玩家搜索（进程内前缀索引）：增量刷新间隔（秒）、默认/最大返回条数、模糊匹配的三元组相似度阈值
+PLAYER_SEARCH_REFRESH_INTERVAL = float(os.getenv("PLAYER_SEARCH_REFRESH_INTERVAL", "5"))
+PLAYER_SEARCH_LIMIT = int(os.getenv("PLAYER_SEARCH_LIMIT", "10"))
+PLAYER_SEARCH_MAX_LIMIT = int(os.getenv("PLAYER_SEARCH_MAX_LIMIT", "50"))
+PLAYER_SEARCH_FUZZY_THRESHOLD = float(os.getenv("PLAYER_SEARCH_FUZZY_THRESHOLD", "0.3"))
+
+# 敏感词词典文件（每行一词，# 开头为注释；修改后按检查间隔自动热重载）
+SENSITIVE_WORDS_FILE = str(BASE_DIR / os.getenv("SENSITIVE_WORDS_FILE")) if os.getenv("SENSITIVE_WORDS_FILE") else ""
+SENSITIVE_WORDS_CHECK_INTERVAL = int(os.getenv("SENSITIVE_WORDS_CHECK_INTERVAL", "5"))
+
+# JSON 响应序列化后端：auto（orjson 可用时优先）/ orjson / stdlib
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto").lower()
+
 # ----------------------------------------
 # 国际化
 # ----------------------------------------
@@ -191,13 +276,49 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / os.getenv("STATIC_ROOT", "static")
 STATICFILES_DIRS = [p for p in [BASE_DIR / "assets"] if p.exists()]
+# collectstatic 生成内容哈希文件名并并行预压缩（.gz，安装 brotli 时另有 .br），未变化的文件跳过
+STATIC_PRECOMPRESS = os.getenv("STATIC_PRECOMPRESS", "1" if DJANGO_ENV == "production" else "0") in {"1","true","yes"}
+STATIC_COMPRESS_WORKERS = int(os.getenv("STATIC_COMPRESS_WORKERS", "0"))  # 0 = CPU 核数
+STATIC_COMPRESS_MIN_SIZE = int(os.getenv("STATIC_COMPRESS_MIN_SIZE", "256"))
+if STATIC_PRECOMPRESS:
+    STORAGES = {
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "common.staticfiles.CompressedManifestStaticFilesStorage"},
+    }
+# 由应用直接提供静态文件（无 Nginx 时）：按 Accept-Encoding 返回预压缩文件，哈希文件名长期缓存
+STATIC_SERVE = os.getenv("STATIC_SERVE", "1" if STATIC_PRECOMPRESS else "0") in {"1","true","yes"}
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "60"))  # 无哈希文件名的缓存秒数
+if STATIC_SERVE:
+    MIDDLEWARE.insert(MIDDLEWARE.index("django.middleware.security.SecurityMiddleware") + 1,
+                      "common.staticfiles.PrecompressedStaticMiddleware")
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / os.getenv("MEDIA_ROOT", "media")
 
 # 媒体上传限制（尺寸/格式），供校验器使用
 MEDIA_MAX_IMAGE_SIZE_MB = int(os.getenv("MEDIA_MAX_IMAGE_SIZE_MB", "5"))
+# PNG/GIF/JPEG/WEBP 仅读文件头校验；其他 PIL 支持的格式（如 BMP、TIFF）回退到 PIL 读取文件头
 ALLOWED_IMAGE_FORMATS = os.getenv("ALLOWED_IMAGE_FORMATS", "JPEG,PNG,WEBP").split(",")
+# 图片尺寸上限（仅读取文件头校验，防止解压炸弹）
+MEDIA_MAX_IMAGE_WIDTH = int(os.getenv("MEDIA_MAX_IMAGE_WIDTH", "8192"))
+MEDIA_MAX_IMAGE_HEIGHT = int(os.getenv("MEDIA_MAX_IMAGE_HEIGHT", "8192"))
+MEDIA_MAX_IMAGE_PIXELS = int(os.getenv("MEDIA_MAX_IMAGE_PIXELS", str(40_000_000)))
+
+# 上传处理器：图片在读取上传流时即校验，超限文件不落盘
+FILE_UPLOAD_HANDLERS = [
+    "common.upload_handlers.ImageUploadLimitHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+
+# 头像缩略图尺寸（后台生成 WebP）与处理完成前无头像时的占位图
+AVATAR_SIZES = [int(s) for s in os.getenv("AVATAR_SIZES", "32,64,128,256").split(",") if s.strip()]
+AVATAR_PLACEHOLDER_URL = os.getenv("AVATAR_PLACEHOLDER_URL", STATIC_URL + "img/avatar-placeholder.png")
+
+# 下载中心文件目录（/downloads/ 路由支持断点续传）；设置 DOWNLOAD_ACCEL_PREFIX 后交由 Nginx 发送，
+# 需配置对应的 internal location，例如 location /protected-downloads/ { internal; alias <DOWNLOAD_ROOT>/; }
+DOWNLOAD_ROOT = BASE_DIR / os.getenv("DOWNLOAD_ROOT", "media/downloads")
+DOWNLOAD_ACCEL_PREFIX = os.getenv("DOWNLOAD_ACCEL_PREFIX", "")
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -226,30 +347,95 @@ else:
         }
     }
 
+# 标签缓存：软过期抖动比例、软过期后的旧值保留秒数、重算锁超时、模型写入时自动失效标签
+TAGGED_CACHE_JITTER = float(os.getenv("TAGGED_CACHE_JITTER", "0.1"))
+TAGGED_CACHE_GRACE = int(os.getenv("TAGGED_CACHE_GRACE", "60"))
+TAGGED_CACHE_LOCK_TIMEOUT = int(os.getenv("TAGGED_CACHE_LOCK_TIMEOUT", "10"))
+TAGGED_CACHE_AUTO_INVALIDATE = True
+
+# 浏览量缓冲：进程内缓冲的自动刷新间隔（秒，0 表示仅由 flush_views 命令刷新）
+VIEW_COUNTER_FLUSH_INTERVAL = int(os.getenv("VIEW_COUNTER_FLUSH_INTERVAL", "60"))
+
+# ----------------------------------------
+# Minecraft 服务器状态（poll_server_status 命令轮询写入缓存）
+# ----------------------------------------
+# 格式：名称=主机:端口，多个以逗号分隔，例如 main=play.example.com:25565
+MC_SERVERS = os.getenv("MC_SERVERS", "")
+MC_STATUS_INTERVAL = int(os.getenv("MC_STATUS_INTERVAL", "30"))
+MC_STATUS_TIMEOUT = float(os.getenv("MC_STATUS_TIMEOUT", "3"))
+MC_STATUS_MAX_BACKOFF = int(os.getenv("MC_STATUS_MAX_BACKOFF", "300"))
+
+# RCON（白名单同步等）：同一进程内复用一条连接
+MC_RCON_HOST = os.getenv("MC_RCON_HOST", "")
+MC_RCON_PORT = int(os.getenv("MC_RCON_PORT", "25575"))
+MC_RCON_PASSWORD = os.getenv("MC_RCON_PASSWORD", "")
+MC_RCON_TIMEOUT = float(os.getenv("MC_RCON_TIMEOUT", "5"))
+
+# 白名单同步：file（写 whitelist.json）/ rcon（发送 whitelist add/remove）；留空则不同步
+WHITELIST_SYNC_MODE = os.getenv("WHITELIST_SYNC_MODE", "")
+WHITELIST_FILE = str(BASE_DIR / os.getenv("WHITELIST_FILE", "whitelist.json"))
+WHITELIST_RCON_BATCH = int(os.getenv("WHITELIST_RCON_BATCH", "50"))
+
+# ----------------------------------------
+# 响应压缩（brotli 需安装 Brotli，否则仅 gzip）；设置 Cookie 或使用 CSRF 令牌的响应不压缩（BREACH）
+# ----------------------------------------
+RESPONSE_COMPRESS_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESS_MIN_SIZE", "1024"))
+RESPONSE_COMPRESS_CONTENT_TYPES = [t.strip() for t in os.getenv(
+    "RESPONSE_COMPRESS_CONTENT_TYPES", "application/json,text/csv,text/plain"
+).split(",") if t.strip()]
+RESPONSE_COMPRESS_BROTLI_QUALITY = int(os.getenv("RESPONSE_COMPRESS_BROTLI_QUALITY", "4"))
+RESPONSE_COMPRESS_GZIP_LEVEL = int(os.getenv("RESPONSE_COMPRESS_GZIP_LEVEL", "6"))
+
+# ----------------------------------------
+# 请求耗时（Server-Timing 响应头与慢请求日志）
+# ----------------------------------------
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", "1") in {"1","true","yes"}
+SLOW_REQUEST_THRESHOLD_MS = int(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "500"))
+SLOW_REQUEST_SQL_COUNT = int(os.getenv("SLOW_REQUEST_SQL_COUNT", "3"))
+
 # ----------------------------------------
 # 日志
 # ----------------------------------------
-LOG_DIR = BASE_DIR / "logs"
+LOG_DIR = Path(os.getenv("LOG_DIR", BASE_DIR / "logs"))
 LOG_DIR.mkdir(exist_ok=True)
+# 运行测试时不写入真实日志文件
+TESTING = sys.argv[1:2] == ["test"] or "pytest" in sys.modules
+
+# 非阻塞日志：请求线程只入队，由单个监听线程格式化并写文件（common.log）；
+# 队列占用超过高水位时 INFO 及以下按 1/LOG_QUEUE_SAMPLE 采样，队列满时丢弃并计数
+LOG_QUEUE = os.getenv("LOG_QUEUE", "1" if DJANGO_ENV == "production" else "0") in {"1","true","yes"}
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_QUEUE_HIGH_WATER = float(os.getenv("LOG_QUEUE_HIGH_WATER", "0.8"))
+LOG_QUEUE_SAMPLE = int(os.getenv("LOG_QUEUE_SAMPLE", "10"))
+# 文件日志格式：text（原格式）/ json（单行 JSON，便于采集）
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOGGING_CONFIG = "common.log.configure"
+REQUEST_ID_HEADER = os.getenv("REQUEST_ID_HEADER", "X-Request-ID")
 
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "filters": {
+        "request_id": {"()": "common.log.RequestIDFilter"},
+    },
     "formatters": {
         "verbose": {
-            "format": "[%(asctime)s] %(levelname)s %(name)s %(module)s:%(lineno)d %(message)s",
+            "format": "[%(asctime)s] %(levelname)s %(name)s %(module)s:%(lineno)d [%(request_id)s] %(message)s",
             "datefmt": "%Y-%m-%d %H:%M:%S",
         },
         "simple": {"format": "%(levelname)s %(message)s"},
+        "json": {"()": "common.log.JsonFormatter"},
     },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
             "formatter": "verbose" if DJANGO_ENV != "development" else "simple",
+            "filters": ["request_id"],
         },
     },
     "loggers": {},
 }
+_FILE_FORMATTER = "json" if LOG_FORMAT == "json" else "verbose"
 
 # 根据环境添加文件处理器（生产环境使用滚动日志）
 if DJANGO_ENV == "production":
@@ -258,7 +444,8 @@ if DJANGO_ENV == "production":
         "filename": str(LOG_DIR / "app.log"),
         "maxBytes": 5 * 1024 * 1024,
         "backupCount": 5,
-        "formatter": "verbose",
+        "formatter": _FILE_FORMATTER,
+        "filters": ["request_id"],
         "encoding": "utf-8",
     }
     LOGGING["handlers"]["error_file"] = {
@@ -266,22 +453,28 @@ if DJANGO_ENV == "production":
         "filename": str(LOG_DIR / "error.log"),
         "maxBytes": 5 * 1024 * 1024,
         "backupCount": 10,
-        "formatter": "verbose",
+        "formatter": _FILE_FORMATTER,
+        "filters": ["request_id"],
         "encoding": "utf-8",
     }
 else:
     LOGGING["handlers"]["app_file"] = {
         "class": "logging.FileHandler",
         "filename": str(LOG_DIR / "app.log"),
-        "formatter": "verbose",
+        "formatter": _FILE_FORMATTER,
+        "filters": ["request_id"],
         "encoding": "utf-8",
     }
     LOGGING["handlers"]["error_file"] = {
         "class": "logging.FileHandler",
         "filename": str(LOG_DIR / "error.log"),
-        "formatter": "verbose",
+        "formatter": _FILE_FORMATTER,
+        "filters": ["request_id"],
         "encoding": "utf-8",
     }
+if TESTING:
+    LOGGING["handlers"]["app_file"] = {"class": "logging.NullHandler"}
+    LOGGING["handlers"]["error_file"] = {"class": "logging.NullHandler"}
 
 LOGGING["loggers"] = {
     "django": {"handlers": ["console", "app_file"], "level": os.getenv("DJANGO_LOG_LEVEL", "INFO"), "propagate": True},
@@ -317,6 +510,9 @@ SIMPLEUI_CONFIG = {
 SIMPLEUI_HOME_TITLE = os.getenv("SIMPLEUI_HOME_TITLE", "MCTP 管理后台")
 SIMPLEUI_LOGIN_TITLE = os.getenv("SIMPLEUI_LOGIN_TITLE", "MCTP 管理登录")
 
+# 后台列表：估算行数达到该值后不再执行精确 COUNT(*)，直接使用数据库统计信息
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv("ADMIN_ESTIMATED_COUNT_THRESHOLD", "10000"))
+
 # ----------------------------------------
 # CKEditor 配置
 # ----------------------------------------
@@ -346,6 +542,18 @@ CKEDITOR_CONFIGS = {
 # ----------------------------------------
 INTERNAL_IPS = ["127.0.0.1", "localhost"]
 
+# ----------------------------------------
+# 后台任务（进程内线程池；BACKGROUND_TASKS_EAGER=1 时同步执行，便于调试）
+# ----------------------------------------
+BACKGROUND_TASK_WORKERS = int(os.getenv("BACKGROUND_TASK_WORKERS", "2"))
+BACKGROUND_TASKS_EAGER = os.getenv("BACKGROUND_TASKS_EAGER", "0") in {"1","true","yes"}
+
+# 进程内写入队列：把可独立提交的小写入（last_login、浏览量回写）交给单个写线程，
+# 按批合并为一个事务提交，请求线程不再争抢 SQLite 写锁。默认关闭（同步执行）
+SQLITE_WRITE_QUEUE = os.getenv("SQLITE_WRITE_QUEUE", "0") in {"1","true","yes"}
+SQLITE_WRITE_QUEUE_BATCH = int(os.getenv("SQLITE_WRITE_QUEUE_BATCH", "100"))
+SQLITE_WRITE_QUEUE_DELAY_MS = float(os.getenv("SQLITE_WRITE_QUEUE_DELAY_MS", "5"))
+
 # ----------------------------------------
 # Celery（占位）
 # ----------------------------------------
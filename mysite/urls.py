@@ -1,22 +1,31 @@
 """
 mysite 项目 URL 路由配置。
 此处统一挂载后台、富文本上传、API 等入口；开发环境追加调试工具与静态/媒体文件服务。
+调试工具栏与 ckeditor_uploader（间接引入 PIL）不在启动路径上导入：前者仅在已安装时挂载，后者在首次请求时加载。
 """
 
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include,path
-from debug_toolbar.toolbar import debug_toolbar_urls
+from django.contrib.admin.views.decorators import staff_member_required
+from django.urls import include,path,re_path
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
+from common.views import ckeditor_browse, ckeditor_upload, download_file
 
 urlpatterns = [
     path('admin/', admin.site.urls),  # 后台管理
-    path('ckeditor/', include('ckeditor_uploader.urls')),  # CKEditor 上传
+    re_path(r'^ckeditor/upload/', csrf_exempt(staff_member_required(ckeditor_upload)), name='ckeditor_upload'),  # CKEditor 上传（统一图片校验）
+    re_path(r'^ckeditor/browse/', never_cache(staff_member_required(ckeditor_browse)), name='ckeditor_browse'),  # CKEditor 浏览
     path('api/', include('api.urls')),  # API 路由
+    path('downloads/<path:path>', download_file, name='download_file'),  # 下载中心（断点续传）
     path('', lambda r: JsonResponse({"success": True, "data": None, "message": "MCTP API"})),  # 根入口
 ]
-if settings.DEBUG:
+if settings.DEBUG and "debug_toolbar" in settings.INSTALLED_APPS:
+    from debug_toolbar.toolbar import debug_toolbar_urls
+
     urlpatterns += [path('__debug__/', include(debug_toolbar_urls()))]  # 调试工具栏
+if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)  # 媒体文件
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)  # 静态文件
@@ -1,10 +1,81 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils import timezone
+from common.admin import EstimatedCountPaginator, UploadErrorsAdminMixin, bulk_update
+from common.responses import csv_stream
 from .models import User
+from .search import player_index
+from .whitelist import schedule_sync
+
+EXPORT_FIELDS = (
+    ("id", "ID"),
+    ("username", "用户名"),
+    ("nickname", "游戏昵称"),
+    ("qq", "QQ"),
+    ("is_whitelisted", "白名单"),
+    ("is_active", "启用"),
+    ("is_staff", "管理员"),
+    ("date_joined", "注册时间"),
+    ("last_login", "最后登录"),
+)
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(UploadErrorsAdminMixin, admin.ModelAdmin):
     list_display = ("id", "username", "nickname", "qq", "is_staff", "is_whitelisted", "is_active", "created_at")
     search_fields = ("username", "nickname", "qq")
     list_filter = ("is_whitelisted", "is_staff", "is_active")
-    readonly_fields = ("last_login", "date_joined", "views")
+    readonly_fields = ("last_login", "date_joined", "views", "avatar_variants")
+    # 大表：总数使用数据库估算值，且不再额外统计未筛选总数
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ("whitelist_players", "unwhitelist_players", "activate_players", "deactivate_players", "export_csv")
+
+    # 后台搜索优先走进程内索引（前缀 + 模糊）；索引无结果或超过上限时回退到默认的 icontains 搜索，
+    # 保留子串匹配，也不截断结果。纯数字（QQ 号）只在索引内做前缀与子串匹配，不再扫描 qq 列，
+    # 超过上限时截断并提示
+    search_index_limit = 500
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term or len(term.split()) > 1:
+            return super().get_search_results(request, queryset, search_term)
+        if term.isdigit():
+            pks = player_index.search(term, self.search_index_limit + 1, with_qq=True, include_inactive=True,
+                                      substring=True)
+            if len(pks) > self.search_index_limit:
+                pks = pks[:self.search_index_limit]
+                self.message_user(request, f"匹配结果过多，仅显示前 {self.search_index_limit} 名玩家，请输入更多位数",
+                                  messages.WARNING)
+            return queryset.filter(pk__in=pks), False
+        pks = player_index.search(term, self.search_index_limit + 1, fuzzy=True, with_qq=True, include_inactive=True)
+        if not pks or len(pks) > self.search_index_limit:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=pks), False
+
+    def _bulk_update(self, request, queryset, label, **values):
+        # 单条 UPDATE，不逐行触发 save 信号；白名单/启用状态变化后统一调度一次同步
+        updated = bulk_update(queryset, **values)
+        if updated:
+            schedule_sync()
+        self.message_user(request, f"已{label} {updated} 名玩家", messages.SUCCESS)
+
+    @admin.action(description="加入白名单", permissions=["change"])
+    def whitelist_players(self, request, queryset):
+        self._bulk_update(request, queryset, "加入白名单", is_whitelisted=True)
+
+    @admin.action(description="移出白名单", permissions=["change"])
+    def unwhitelist_players(self, request, queryset):
+        self._bulk_update(request, queryset, "移出白名单", is_whitelisted=False)
+
+    @admin.action(description="启用所选玩家", permissions=["change"])
+    def activate_players(self, request, queryset):
+        self._bulk_update(request, queryset, "启用", is_active=True)
+
+    @admin.action(description="停用所选玩家", permissions=["change"])
+    def deactivate_players(self, request, queryset):
+        self._bulk_update(request, queryset, "停用", is_active=False)
 
+    @admin.action(description="导出 CSV", permissions=["view"])
+    def export_csv(self, request, queryset):
+        rows = queryset.order_by("pk").values_list(*(f for f, _ in EXPORT_FIELDS))
+        filename = f"players-{timezone.localtime():%Y%m%d-%H%M%S}.csv"
+        return csv_stream(rows, header=[h for _, h in EXPORT_FIELDS], filename=filename)
@@ -1,11 +1,37 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
 from django.db.models import Q
 
 User = get_user_model()
 
+_hash_executor = None
+_hash_executor_lock = threading.Lock()
+
+def _get_hash_executor():
+    """密码哈希专用的有界线程池，避免 CPU 密集计算占满默认执行器或阻塞事件循环。"""
+    global _hash_executor
+    if _hash_executor is None:
+        with _hash_executor_lock:
+            if _hash_executor is None:
+                _hash_executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "PASSWORD_HASH_WORKERS", 4),
+                    thread_name_prefix="mctp-hash",
+                )
+    return _hash_executor
+
+async def run_hash(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), func, *args)
+
 class UsernameOrQQBackend(ModelBackend):
-    """支持通过用户名或 QQ 号进行身份认证的后端。"""
+    """支持通过用户名或 QQ 号进行身份认证的后端。
+
+    作为唯一认证后端使用：每次尝试只做一次索引查询、恰好一次密码哈希校验；
+    用户不存在时也计算一次哈希，使失败耗时与用户是否存在无关。
+    """
     def authenticate(self, request, username=None, password=None, **kwargs):
         if username is None:
             username_field = getattr(User, 'USERNAME_FIELD', 'username')
@@ -13,12 +39,38 @@ class UsernameOrQQBackend(ModelBackend):
         if username is None or password is None:
             return None
 
-        # 仅查询首条匹配记录，不会抛出异常
-        user = (
-            User.objects
-            .filter(Q(username=username) | Q(qq=username))
-            .first()
-        )
-        if user and user.check_password(password) and self.user_can_authenticate(user):
+        user = self._pick(list(self._candidates(username)), username)
+        if user is None:
+            # 与 ModelBackend 一致：执行一次哈希以抵御基于耗时的用户枚举
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
             return user
         return None
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        """异步版本：异步 ORM 查询，密码哈希交由有界线程池执行。"""
+        if username is None:
+            username_field = getattr(User, 'USERNAME_FIELD', 'username')
+            username = kwargs.get(username_field)
+        if username is None or password is None:
+            return None
+
+        user = self._pick([u async for u in self._candidates(username)], username)
+        if user is None:
+            await run_hash(User().set_password, password)
+            return None
+        if await run_hash(user.check_password, password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    @staticmethod
+    def _candidates(username):
+        # 一次查询取回用户名或 QQ 匹配的记录
+        return User.objects.filter(Q(username=username) | Q(qq=username))[:2]
+
+    @staticmethod
+    def _pick(candidates, username):
+        # 用户名与 QQ 分属不同用户时，用户名优先
+        return next((u for u in candidates if u.get_username() == username), None) or \
+            (candidates[0] if candidates else None)
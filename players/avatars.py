@@ -0,0 +1,77 @@
+"""头像处理：后台一次解码，生成多尺寸 WebP 缩略图。"""
+import logging
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from common.upload_validators import check_dimensions
+
+logger = logging.getLogger("app")
+
+
+def avatar_sizes():
+    return sorted({int(s) for s in getattr(settings, "AVATAR_SIZES", (32, 64, 128, 256))}, reverse=True)
+
+
+def variant_path(user_pk, avatar_name, size):
+    stem = posixpath.splitext(posixpath.basename(avatar_name))[0]
+    return f"avatars/variants/{user_pk}/{stem}_{size}.webp"
+
+
+def render_variants(fp, sizes):
+    """解码一次原图，由大到小逐级缩放，返回 {尺寸: WebP 字节}。"""
+    from PIL import Image, ImageOps
+
+    img = Image.open(fp)
+    # Image.open 只读取文件头：解码前再次校验尺寸，防止解压炸弹
+    check_dimensions(*img.size)
+    # JPEG 可在解码阶段按比例缩小，避免完整解码大图
+    img.draft("RGB", (sizes[0] * 2, sizes[0] * 2))
+    img = ImageOps.exif_transpose(img)
+    mode = "RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB"
+    current = ImageOps.fit(img.convert(mode), (sizes[0], sizes[0]), Image.LANCZOS)
+    out = {}
+    for size in sizes:
+        if current.width != size:
+            current = current.resize((size, size), Image.LANCZOS)
+        buffer = BytesIO()
+        current.save(buffer, format="WEBP", quality=82, method=4)
+        out[size] = buffer.getvalue()
+    return out
+
+
+def delete_variants(paths):
+    for path in paths:
+        try:
+            default_storage.delete(path)
+        except Exception:
+            logger.warning("删除旧头像缩略图失败：%s", path)
+
+
+def process_avatar(user_pk, avatar_name, stale=()):
+    """后台任务：生成缩略图并写回 ``avatar_variants``（不触发模型信号）。"""
+    from .models import User
+
+    delete_variants(stale)
+    if not avatar_name:
+        return {}
+    with default_storage.open(avatar_name, "rb") as fp:
+        rendered = render_variants(fp, avatar_sizes())
+    variants = {}
+    for size, data in rendered.items():
+        path = variant_path(user_pk, avatar_name, size)
+        if default_storage.exists(path):
+            default_storage.delete(path)
+        variants[str(size)] = default_storage.save(path, ContentFile(data))
+    # 仅当头像未再次更换时写回，避免覆盖更新的处理结果；update() 不触发 auto_now，显式刷新 updated_at
+    updated = User.objects.filter(pk=user_pk, avatar=avatar_name).update(
+        avatar_variants=variants, updated_at=timezone.now()
+    )
+    if not updated:
+        delete_variants(variants.values())
+        return {}
+    return variants
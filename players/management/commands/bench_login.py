@@ -0,0 +1,86 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from common.benchmark import percentile
+
+
+@contextmanager
+def count_password_hashes():
+    """统计期间密码哈希计算次数（encode/verify 的最外层调用；PBKDF2 的 verify 内部会调用 encode）。"""
+    counter = {"n": 0}
+    lock = threading.Lock()
+    local = threading.local()
+    patched = []
+
+    def wrap(func):
+        def inner(*args, **kwargs):
+            if getattr(local, "active", False):
+                return func(*args, **kwargs)
+            with lock:
+                counter["n"] += 1
+            local.active = True
+            try:
+                return func(*args, **kwargs)
+            finally:
+                local.active = False
+        return inner
+
+    for hasher in get_hashers():
+        for name in ("encode", "verify"):
+            patched.append((hasher, name))
+            setattr(hasher, name, wrap(getattr(hasher, name)))
+    try:
+        yield counter
+    finally:
+        for hasher, name in patched:
+            delattr(hasher, name)  # 移除实例属性，恢复类方法
+
+
+class Command(BaseCommand):
+    help = "登录基准：统计每次失败登录的密码哈希次数，并在并发下测量登录延迟 p50/p99"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--attempts", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=8)
+
+    def _attempt(self, username, password):
+        close_old_connections()
+        start = time.perf_counter()
+        authenticate(None, username=username, password=password)
+        elapsed = time.perf_counter() - start
+        close_old_connections()
+        return elapsed
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        user = User(username="__bench_login__", qq="900000000")
+        user.set_password("Bench-Passw0rd!")
+        user.save()
+        try:
+            cases = {
+                "错误密码（用户名）": ("__bench_login__", "wrong"),
+                "错误密码（QQ）": ("900000000", "wrong"),
+                "用户不存在": ("__bench_missing__", "wrong"),
+            }
+            for label, (username, password) in cases.items():
+                with count_password_hashes() as counter:
+                    with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                        latencies = list(pool.map(lambda _: self._attempt(username, password),
+                                                  range(options["attempts"])))
+                per_attempt = counter["n"] / options["attempts"]
+                self.stdout.write(
+                    f"{label}: 哈希次数/次 {per_attempt:.2f}  "
+                    f"p50 {percentile(latencies, 50) * 1000:.1f}ms  "
+                    f"p99 {percentile(latencies, 99) * 1000:.1f}ms  "
+                    f"均值 {statistics.mean(latencies) * 1000:.1f}ms"
+                )
+        finally:
+            user.delete()
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from common.rcon import RconError
+from players.whitelist import sync_whitelist
+
+
+class Command(BaseCommand):
+    help = "将 is_whitelisted 的玩家增量同步到游戏服务器白名单（whitelist.json 或 RCON）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mode", choices=["file", "rcon"], help="默认使用 WHITELIST_SYNC_MODE")
+        parser.add_argument("--full", action="store_true", help="忽略上次同步结果，以服务器现状为准重新比对")
+        parser.add_argument("--dry-run", action="store_true", help="只输出差异，不做修改")
+
+    def handle(self, *args, **options):
+        mode = options["mode"] or getattr(settings, "WHITELIST_SYNC_MODE", "")
+        if not mode:
+            raise CommandError("未配置 WHITELIST_SYNC_MODE，请通过 --mode 指定 file 或 rcon")
+        try:
+            result = sync_whitelist(mode, full=options["full"], dry_run=options["dry_run"])
+        except (OSError, RconError) as e:
+            raise CommandError(f"白名单同步失败：{e}") from e
+        for name in result.added:
+            self.stdout.write(f"+ {name}")
+        for name in result.removed:
+            self.stdout.write(f"- {name}")
+        for name in result.skipped:
+            self.stdout.write(self.style.WARNING(f"跳过不合规的玩家名：{name}"))
+        prefix = "（演练）" if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}白名单同步完成（{result.mode}）：新增 {len(result.added)}，移除 {len(result.removed)}"
+        ))
@@ -1,13 +1,17 @@
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from common.models import BaseModel
+from common.upload_validators import validate_image
 
 class User(AbstractUser, BaseModel):
     """自定义用户：扩展昵称、QQ、白名单标记、头像；继承 BaseModel 增加通用字段。"""
     nickname = models.CharField("游戏昵称", max_length=50, blank=True, db_index=True)
     qq = models.CharField("QQ", max_length=15, blank=True, db_index=True, unique=True, null=True)
     is_whitelisted = models.BooleanField("白名单", default=False, db_index=True)
-    avatar = models.ImageField("头像", upload_to="avatars/%Y/%m/", blank=True, null=True)
+    avatar = models.ImageField("头像", upload_to="avatars/%Y/%m/", blank=True, null=True, validators=[validate_image])
+    # 后台生成的 WebP 缩略图：{"64": "avatars/variants/..."}，为空表示处理中或无头像
+    avatar_variants = models.JSONField("头像缩略图", default=dict, blank=True, editable=False)
 
     class Meta:
         verbose_name = "玩家"
@@ -16,7 +20,19 @@ class User(AbstractUser, BaseModel):
             models.Index(fields=["nickname"]),
             models.Index(fields=["qq"]),
             models.Index(fields=["is_whitelisted"]),
+            models.Index(fields=["created_at", "id"]),
         ]
 
     def __str__(self):
-        return self.nickname or self.username
\ No newline at end of file
+        return self.nickname or self.username
+
+    def avatar_url(self, size=64):
+        """返回不小于 ``size`` 的最小缩略图；处理中返回原图，无头像返回占位图。"""
+        if self.avatar_variants:
+            fitting = sorted((int(s) for s in self.avatar_variants if int(s) >= size)) or \
+                [max(int(s) for s in self.avatar_variants)]
+            from django.core.files.storage import default_storage
+            return default_storage.url(self.avatar_variants[str(fitting[0])])
+        if self.avatar:
+            return self.avatar.url
+        return settings.AVATAR_PLACEHOLDER_URL
\ No newline at end of file
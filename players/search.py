@@ -0,0 +1,201 @@
+"""玩家搜索：进程内前缀索引（有序数组 + 二分）与可选的三元组模糊匹配。
+
+- 索引键为小写的用户名、昵称，以及 QQ 号（仅在 ``with_qq`` 时参与匹配）；
+  前缀查询为一次 ``bisect`` 加顺序扫描，与玩家总数基本无关；
+- 刷新按 ``updated_at`` 增量拉取（最多每 ``PLAYER_SEARCH_REFRESH_INTERVAL`` 秒一次），
+  有变化时以写时复制方式生成新快照，查询线程无需加锁；
+- 删除玩家无法从 ``updated_at`` 得知：``post_delete`` 递增缓存中的版本号，各进程据此全量重建。
+"""
+import bisect
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+
+VERSION_KEY = "players:search:version"
+# 增量拉取时回看的时间窗口：覆盖保存时间早于提交时间的事务
+_OVERLAP = timedelta(seconds=60)
+_FIELDS = ("id", "username", "nickname", "qq", "is_active", "is_whitelisted", "avatar", "avatar_variants", "updated_at")
+
+
+def player_summary(user):
+    return {"id": user.pk, "name": str(user), "avatar": user.avatar_url(64), "whitelisted": user.is_whitelisted}
+
+
+def trigrams(text):
+    text = f"  {text.lower()} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _Entry:
+    __slots__ = ("pk", "names", "qq", "is_active", "summary", "signature")
+
+    def __init__(self, user):
+        self.pk = user.pk
+        self.names = tuple(dict.fromkeys(n.lower() for n in (user.username, user.nickname) if n))
+        self.qq = user.qq or ""
+        self.is_active = user.is_active
+        self.summary = player_summary(user)
+        self.signature = (self.names, self.qq, self.is_active, tuple(sorted(self.summary.items())))
+
+
+class _Snapshot:
+    """不可变快照：有序键数组与（按需构建的）三元组倒排表。"""
+
+    def __init__(self, entries):
+        self.entries = entries
+        pairs = sorted(
+            [(name, pk, False) for pk, e in entries.items() for name in e.names]
+            + [(e.qq, pk, True) for pk, e in entries.items() if e.qq]
+        )
+        self.keys = [p[0] for p in pairs]
+        self.pks = [p[1] for p in pairs]
+        self.is_qq = [p[2] for p in pairs]
+
+    @cached_property
+    def postings(self):
+        index = {}
+        for pk, entry in self.entries.items():
+            grams = set()
+            for name in entry.names:
+                grams |= trigrams(name)
+            for gram in grams:
+                index.setdefault(gram, []).append(pk)
+        return index
+
+    def prefix(self, term, limit, with_qq, include_inactive):
+        exact, others, seen = [], [], set()
+        i = bisect.bisect_left(self.keys, term)
+        while i < len(self.keys) and self.keys[i].startswith(term) and len(exact) + len(others) < limit:
+            pk = self.pks[i]
+            if pk not in seen and (with_qq or not self.is_qq[i]) and (include_inactive or self.entries[pk].is_active):
+                seen.add(pk)
+                (exact if self.keys[i] == term else others).append(pk)
+            i += 1
+        return exact + others
+
+    def contains(self, term, limit, with_qq, include_inactive, exclude=()):
+        """子串匹配（内存顺序扫描，不访问数据库），用于 QQ 号中间几位等中缀查询。"""
+        found = []
+        for pk, entry in self.entries.items():
+            if len(found) >= limit:
+                break
+            if pk in exclude or not (include_inactive or entry.is_active):
+                continue
+            if any(term in name for name in entry.names) or (with_qq and term in entry.qq):
+                found.append(pk)
+        return found
+
+    def fuzzy(self, term, limit, include_inactive, exclude=()):
+        grams = trigrams(term)
+        threshold = getattr(settings, "PLAYER_SEARCH_FUZZY_THRESHOLD", 0.3)
+        hits = Counter()
+        for gram in grams:
+            hits.update(self.postings.get(gram, ()))
+        scored = []
+        for pk, common in hits.items():
+            # 共有三元组数给出相似度上界，低于阈值的候选无需计算
+            if pk in exclude or common / len(grams) < threshold:
+                continue
+            entry = self.entries[pk]
+            if not include_inactive and not entry.is_active:
+                continue
+            # 与各名字的三元组 Jaccard 相似度取最大值
+            score = max(len(grams & trigrams(n)) / len(grams | trigrams(n)) for n in entry.names)
+            if score >= threshold:
+                scored.append((-score, pk))
+        return [pk for _, pk in sorted(scored)[:limit]]
+
+
+class PlayerIndex:
+    def __init__(self):
+        self._snapshot = _Snapshot({})
+        self._version = None
+        self._last_updated = None
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return len(self._snapshot.entries)
+
+    def _fetch(self, since=None):
+        from .models import User
+        qs = User.objects.only(*_FIELDS)
+        if since is not None:
+            qs = qs.filter(updated_at__gte=since - _OVERLAP)
+        return qs.iterator(chunk_size=2000)
+
+    def rebuild(self):
+        with self._lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        version = cache.get(VERSION_KEY)
+        entries, latest = {}, None
+        for user in self._fetch():
+            entries[user.pk] = _Entry(user)
+            latest = max(latest, user.updated_at) if latest else user.updated_at
+        self._snapshot = _Snapshot(entries)
+        self._version, self._last_updated = version, latest
+        self._last_refresh = time.monotonic()
+
+    def refresh(self, force=False):
+        """按 ``updated_at`` 增量同步；距上次刷新不足间隔时直接返回。"""
+        interval = getattr(settings, "PLAYER_SEARCH_REFRESH_INTERVAL", 5)
+        if not force and time.monotonic() - self._last_refresh < interval:
+            return
+        with self._lock:
+            if not force and time.monotonic() - self._last_refresh < interval:
+                return
+            if self._last_updated is None or cache.get(VERSION_KEY) != self._version:
+                self._rebuild()
+                return
+            changed, latest = {}, self._last_updated
+            for user in self._fetch(self._last_updated):
+                entry = _Entry(user)
+                current = self._snapshot.entries.get(user.pk)
+                if current is None or current.signature != entry.signature:
+                    changed[user.pk] = entry
+                latest = max(latest, user.updated_at)
+            if changed:
+                self._snapshot = _Snapshot({**self._snapshot.entries, **changed})
+            self._last_updated = latest
+            self._last_refresh = time.monotonic()
+
+    def search(self, term, limit=10, fuzzy=False, with_qq=False, include_inactive=False, substring=False):
+        """返回匹配玩家的主键列表：完全匹配优先，其次前缀匹配，不足时以子串（``substring``）与模糊匹配补足。"""
+        term = (term or "").strip().lower()
+        if not term:
+            return []
+        self.refresh()
+        snapshot = self._snapshot
+        pks = snapshot.prefix(term, limit, with_qq, include_inactive)
+        if substring and len(pks) < limit:
+            pks += snapshot.contains(term, limit - len(pks), with_qq, include_inactive, exclude=set(pks))
+        if fuzzy and len(pks) < limit and len(term) >= 3:
+            pks += snapshot.fuzzy(term, limit - len(pks), include_inactive, exclude=set(pks))
+        return pks
+
+    def mark_stale(self):
+        self._last_refresh = 0.0
+
+    def summaries(self, pks):
+        entries = self._snapshot.entries
+        return [entries[pk].summary for pk in pks if pk in entries]
+
+
+player_index = PlayerIndex()
+
+
+def invalidate_index():
+    """玩家被删除后调用：各进程在下次查询时全量重建。"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, timeout=None)
+    player_index.mark_stale()
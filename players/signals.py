@@ -1,27 +1,89 @@
-from io import BytesIO
-from django.db.models.signals import pre_save
+from django.conf import settings
+from django.contrib.auth.models import update_last_login
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
-from django.core.files.base import ContentFile
-from PIL import Image
+from django.utils import timezone
+from common.tasks import on_commit
+from common.write_queue import enqueue_write
+from .avatars import delete_variants, process_avatar
+from .search import invalidate_index
+from .whitelist import schedule_sync
 from .models import User
 
-@receiver(pre_save, sender=User)
-def convert_avatar_to_webp(sender, instance: User, **kwargs):
-    """在保存用户前尝试将头像转换为 WebP（失败则保持原格式）。"""
-    if instance.avatar and hasattr(instance.avatar, 'file'):
-        try:
-            instance.avatar.file.seek(0)
-            img = Image.open(instance.avatar.file)
-            if img.format != 'WEBP':
-                img = img.convert('RGB')
-                buffer = BytesIO()
-                img.save(buffer, format='WEBP', quality=85, method=6)
-                buffer.seek(0)
-                instance.avatar.save(
-                    instance.avatar.name.rsplit('.', 1)[0] + '.webp',
-                    ContentFile(buffer.read()),
-                    save=False,
-                )
-        except Exception:
-            # 转换失败则忽略
-            pass
+def _raw_avatar_name(instance):
+    # 直接读取实例字典，避免延迟加载字段时触发额外查询；None 表示未加载
+    if "avatar" not in instance.__dict__:
+        return None
+    raw = instance.__dict__["avatar"]
+    return getattr(raw, "name", raw) or ""
+
+_WHITELIST_FIELDS = ("is_whitelisted", "is_active", "nickname", "username")
+
+def _whitelist_state(instance):
+    # 与头像相同：只读实例字典，字段未加载时返回 None
+    if any(f not in instance.__dict__ for f in _WHITELIST_FIELDS):
+        return None
+    return tuple(instance.__dict__[f] for f in _WHITELIST_FIELDS)
+
+@receiver(post_init, sender=User)
+def remember_avatar(sender, instance: User, **kwargs):
+    """记录加载时的头像路径与白名单相关字段，用于保存后判断是否变更。"""
+    instance._avatar_name = _raw_avatar_name(instance)
+    instance._whitelist_state = _whitelist_state(instance)
+
+@receiver(post_save, sender=User)
+def schedule_avatar_processing(sender, instance: User, **kwargs):
+    """头像变更后清空旧缩略图，并在事务提交后交由后台生成新尺寸（请求线程不解码图片）。"""
+    previous = getattr(instance, "_avatar_name", None)
+    name = _raw_avatar_name(instance)
+    if name is None or previous is None or name == previous:
+        return
+    instance._avatar_name = name
+    stale = list((instance.avatar_variants or {}).values())
+    if stale:
+        User.objects.filter(pk=instance.pk).update(avatar_variants={}, updated_at=timezone.now())
+        instance.avatar_variants = {}
+    if name or stale:
+        on_commit(process_avatar, instance.pk, name, stale)
+
+@receiver(post_delete, sender=User)
+def delete_avatar_variants(sender, instance: User, **kwargs):
+    """删除玩家后在事务提交后清理其缩略图（原图与普通 FileField 一样保留，由存储侧策略处理）。"""
+    stale = list((instance.avatar_variants or {}).values())
+    if stale:
+        on_commit(delete_variants, stale)
+
+@receiver(post_save, sender=User)
+def schedule_whitelist_sync(sender, instance: User, created, **kwargs):
+    """白名单状态或玩家名变化时调度一次后台同步（多次变更合并）。"""
+    state = _whitelist_state(instance)
+    previous = getattr(instance, "_whitelist_state", None)
+    instance._whitelist_state = state
+    if created:
+        if instance.is_whitelisted:
+            schedule_sync()
+    elif state != previous and (instance.is_whitelisted or previous is None or previous[0]):
+        schedule_sync()
+
+@receiver(post_delete, sender=User)
+def schedule_whitelist_sync_on_delete(sender, instance: User, **kwargs):
+    if instance.is_whitelisted:
+        schedule_sync()
+
+@receiver(post_delete, sender=User)
+def invalidate_search_index(sender, instance: User, **kwargs):
+    """删除无法通过 updated_at 增量发现，通知各进程重建搜索索引。"""
+    invalidate_index()
+
+def _save_last_login(pk, when):
+    User.objects.filter(pk=pk).update(last_login=when)
+
+def queue_last_login(sender, user, **kwargs):
+    """登录时间交给写入队列合并提交，登录请求不等待 SQLite 写锁。"""
+    user.last_login = timezone.now()
+    enqueue_write(_save_last_login, user.pk, user.last_login)
+
+if getattr(settings, "SQLITE_WRITE_QUEUE", False):
+    user_logged_in.disconnect(update_last_login, dispatch_uid="update_last_login")
+    user_logged_in.connect(queue_last_login, dispatch_uid="update_last_login")
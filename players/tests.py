@@ -0,0 +1,385 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from io import BytesIO, StringIO
+from PIL import Image
+import shutil
+import tempfile
+
+User = get_user_model()
+
+def _png(size=(400, 300)):
+    bio = BytesIO()
+    Image.new('RGB', size, color=(0, 128, 255)).save(bio, format='PNG')
+    return bio.getvalue()
+
+class AvatarPipelineTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media, BACKGROUND_TASKS_EAGER=True,
+                                          AVATAR_SIZES=[32, 64, 128])
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def test_variants_generated_after_commit(self):
+        user = User(username='painter')
+        user.avatar = SimpleUploadedFile('a.png', _png(), content_type='image/png')
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            user.save()
+        # 保存本身不处理图片：原图保持原格式，缩略图待生成
+        self.assertTrue(user.avatar.name.endswith('.png'))
+        self.assertEqual(user.avatar_url(64), user.avatar.url)
+        for cb in callbacks:
+            cb()
+        user.refresh_from_db()
+        self.assertEqual(sorted(user.avatar_variants), ['128', '32', '64'])
+        self.assertTrue(user.avatar_url(40).endswith('_64.webp'))
+        with Image.open(f"{self.media}/{user.avatar_variants['32']}") as img:
+            self.assertEqual((img.format, img.size), ('WEBP', (32, 32)))
+
+    @override_settings(TAGGED_CACHE_AUTO_INVALIDATE=False)  # 只统计头像处理回调
+    def test_unchanged_avatar_not_reprocessed(self):
+        user = User.objects.create(username='idle')
+        with self.captureOnCommitCallbacks() as callbacks:
+            user.nickname = 'Idle'
+            user.save()
+        self.assertEqual(callbacks, [])
+
+    def test_variants_deleted_with_user(self):
+        import os
+        user = User(username='leaver')
+        user.avatar = SimpleUploadedFile('a.png', _png(), content_type='image/png')
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        user.refresh_from_db()
+        paths = [f"{self.media}/{p}" for p in user.avatar_variants.values()]
+        self.assertTrue(paths and all(os.path.exists(p) for p in paths))
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            user.delete()
+        # 提交前不删除，事务回滚时缩略图仍可用
+        self.assertTrue(all(os.path.exists(p) for p in paths))
+        for cb in callbacks:
+            cb()
+        self.assertFalse(any(os.path.exists(p) for p in paths))
+
+    @override_settings(AVATAR_PLACEHOLDER_URL='/static/img/avatar-placeholder.png')
+    def test_placeholder_without_avatar(self):
+        user = User.objects.create(username='blank')
+        self.assertEqual(user.avatar_url(), '/static/img/avatar-placeholder.png')
+
+
+class FakeRconServer:
+    """本地伪 RCON 服务器：实现登录、whitelist list/add/remove 与未知类型的回显。"""
+    def __init__(self, password='secret', names=()):
+        import socket
+        import threading
+        self.password = password
+        self.names = {n.lower(): n for n in names}
+        self.commands = []
+        self.connections = 0
+        self.rejected = 0
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen()
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        import threading
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _reply(self, conn, request_id, body):
+        import struct
+        data = body.encode()
+        # 与原版相同：长响应按 4096 字节分包
+        for i in range(0, max(len(data), 1), 4096):
+            payload = struct.pack('<ii', request_id, 0) + data[i:i + 4096] + b'\x00\x00'
+            conn.sendall(struct.pack('<i', len(payload)) + payload)
+
+    def _execute(self, command):
+        self.commands.append(command)
+        parts = command.split()
+        if parts[:2] == ['whitelist', 'list']:
+            if not self.names:
+                return 'There are no whitelisted players'
+            return f'There are {len(self.names)} whitelisted player(s): ' + ', '.join(self.names.values())
+        if parts[:2] == ['whitelist', 'add']:
+            self.names[parts[2].lower()] = parts[2]
+            return f'Added {parts[2]} to the whitelist'
+        if parts[:2] == ['whitelist', 'remove']:
+            self.names.pop(parts[2].lower(), None)
+            return f'Removed {parts[2]} from the whitelist'
+        return 'Unknown command'
+
+    def _handle(self, conn):
+        import struct
+        buffer = b''
+        try:
+            while True:
+                while len(buffer) < 4 or len(buffer) < 4 + struct.unpack('<i', buffer[:4])[0]:
+                    chunk = conn.recv(4096)
+                    if not chunk:
+                        return
+                    buffer += chunk
+                length = struct.unpack('<i', buffer[:4])[0]
+                packet, buffer = buffer[4:4 + length], buffer[4 + length:]
+                if buffer:
+                    # 与原版相同：一次读取只解析一个报文，多余数据视为协议错误并断开
+                    self.rejected += 1
+                    return
+                request_id, kind = struct.unpack('<ii', packet[:8])
+                body = packet[8:-2].decode()
+                if kind == 3:
+                    self._reply(conn, request_id if body == self.password else -1, '')
+                elif kind == 2:
+                    self._reply(conn, request_id, self._execute(body))
+                else:
+                    self._reply(conn, request_id, f'Unknown request {kind:x}')
+        finally:
+            conn.close()
+
+    def close(self):
+        self.sock.close()
+
+
+class WhitelistSyncTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from common.rcon import close_clients
+        cache.clear()
+        close_clients()
+        for name, listed in (('Steve', True), ('Alex', True), ('Herobrine', False), ('bad name!', True)):
+            User.objects.create(username=name.replace(' ', '_').replace('!', ''), nickname=name, is_whitelisted=listed)
+
+    def tearDown(self):
+        from common.rcon import close_clients
+        close_clients()
+
+    def test_rcon_incremental_sync_over_one_connection(self):
+        from players.whitelist import sync_whitelist
+        server = FakeRconServer(names=['Steve', 'Griefer'])
+        self.addCleanup(server.close)
+        with override_settings(MC_RCON_HOST='127.0.0.1', MC_RCON_PORT=server.port, MC_RCON_PASSWORD='secret'):
+            result = sync_whitelist('rcon')
+            self.assertEqual((result.added, result.removed, result.skipped), (['Alex'], ['Griefer'], ['bad name!']))
+            self.assertEqual(sorted(server.names.values()), ['Alex', 'Steve'])
+
+            # 再次同步只发送差异；上次结果来自缓存，不再查询 whitelist list
+            server.commands.clear()
+            User.objects.filter(username='Herobrine').update(is_whitelisted=True)
+            User.objects.filter(username='Alex').update(is_whitelisted=False)
+            result = sync_whitelist('rcon')
+            self.assertEqual(server.commands, ['whitelist remove Alex', 'whitelist add Herobrine'])
+            self.assertEqual(sync_whitelist('rcon').changed, False)
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(server.rejected, 0)
+
+    def test_rcon_long_response_reassembled(self):
+        from common.rcon import RconClient
+        names = [f'Player{i:04d}' for i in range(800)]
+        server = FakeRconServer(names=names)
+        self.addCleanup(server.close)
+        client = RconClient('127.0.0.1', server.port, 'secret')
+        self.addCleanup(client.close)
+        listing, added = client.run('whitelist list', 'whitelist add Steve')
+        self.assertGreater(len(listing), 4096)
+        self.assertTrue(listing.endswith('Player0799'))
+        self.assertEqual(added, 'Added Steve to the whitelist')
+        self.assertEqual((server.connections, server.rejected), (1, 0))
+
+    def test_rcon_wrong_password(self):
+        from common.rcon import RconAuthError
+        from players.whitelist import sync_whitelist
+        server = FakeRconServer()
+        self.addCleanup(server.close)
+        with override_settings(MC_RCON_HOST='127.0.0.1', MC_RCON_PORT=server.port, MC_RCON_PASSWORD='wrong'):
+            with self.assertRaises(RconAuthError):
+                sync_whitelist('rcon')
+
+    def test_file_sync_is_atomic_and_incremental(self):
+        import json
+        import os
+        from players.whitelist import offline_uuid
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        path = os.path.join(tmp, 'whitelist.json')
+        with open(path, 'w') as fp:
+            json.dump([{'uuid': 'kept-uuid', 'name': 'steve'}, {'uuid': 'x', 'name': 'Griefer'}], fp)
+        out = StringIO()
+        with override_settings(WHITELIST_FILE=path, MC_RCON_HOST=''):
+            call_command('sync_whitelist', mode='file', stdout=out)
+            with open(path) as fp:
+                entries = json.load(fp)
+            self.assertEqual(entries, [{'uuid': offline_uuid('Alex'), 'name': 'Alex'},
+                                       {'uuid': 'kept-uuid', 'name': 'steve'}])
+            self.assertIn('+ Alex', out.getvalue())
+            self.assertIn('- Griefer', out.getvalue())
+            self.assertEqual(os.listdir(tmp), ['whitelist.json'])
+            # 名单未变化时不重写文件
+            mtime = os.stat(path).st_mtime_ns
+            call_command('sync_whitelist', mode='file', stdout=StringIO())
+            self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+
+    def test_model_changes_schedule_one_background_sync(self):
+        import json
+        import os
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        path = os.path.join(tmp, 'whitelist.json')
+        with override_settings(WHITELIST_SYNC_MODE='file', WHITELIST_FILE=path, MC_RCON_HOST='',
+                               BACKGROUND_TASKS_EAGER=True, TAGGED_CACHE_AUTO_INVALIDATE=False):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                herobrine = User.objects.get(username='Herobrine')
+                herobrine.is_whitelisted = True
+                herobrine.save()
+                alex = User.objects.get(username='Alex')
+                alex.nickname = 'Alex_2'
+                alex.save()
+                User.objects.get(username='Steve').save()  # 无相关变更
+            self.assertEqual(len(callbacks), 2)
+            with open(path) as fp:
+                self.assertEqual(sorted(e['name'] for e in json.load(fp)), ['Alex_2', 'Herobrine', 'Steve'])
+
+
+class PlayerAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('root', 'root@example.com', 'Passw0rd!x')
+        self.client.force_login(self.admin)
+        self.players = [User.objects.create(username=f'p{i}', nickname=f'=cmd{i}' if i == 0 else '') for i in range(3)]
+
+    def _action(self, action, **extra):
+        return self.client.post('/admin/players/user/', {
+            'action': action, '_selected_action': [p.pk for p in self.players], **extra,
+        })
+
+    def test_bulk_whitelist_is_single_update_without_signals(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with override_settings(WHITELIST_SYNC_MODE=''), CaptureQueriesContext(connection) as ctx:
+            self._action('whitelist_players')
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "players_user"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(User.objects.filter(is_whitelisted=True).count(), 3)
+        self._action('deactivate_players')
+        self.assertEqual(User.objects.filter(is_active=False).count(), 3)
+
+    def test_bulk_action_invalidates_per_object_cache(self):
+        from common.tagged_cache import cached, model_tags
+        player = self.players[1]
+
+        @cached(60, tags=lambda pk: model_tags(User, pk))
+        def whitelisted(pk):
+            return User.objects.get(pk=pk).is_whitelisted
+
+        self.assertFalse(whitelisted(player.pk))
+        with override_settings(WHITELIST_SYNC_MODE=''):
+            self._action('whitelist_players')
+        self.assertTrue(whitelisted(player.pk))
+
+    def test_export_csv_streams_rows(self):
+        response = self._action('export_csv')
+        self.assertTrue(response.streaming)
+        body = b''.join(response.streaming_content).decode('utf-8-sig')
+        lines = body.strip().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['ID', '用户名', '游戏昵称'])
+        self.assertEqual(len(lines), 4)  # 表头 + 所选 3 名玩家
+        self.assertIn("'=cmd0", body)  # 防 CSV 注入
+
+    def test_estimated_count_paginator(self):
+        from common.admin import EstimatedCountPaginator
+        from unittest import mock
+        qs = User.objects.order_by('pk')
+        with mock.patch('common.admin.estimate_count', return_value=50000), \
+                override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=10000):
+            self.assertEqual(EstimatedCountPaginator(qs, 20).count, 50000)
+        with mock.patch('common.admin.estimate_count', return_value=None):
+            self.assertEqual(EstimatedCountPaginator(qs, 20).count, 4)
+        self.assertEqual(self.client.get('/admin/players/user/').status_code, 200)
+
+
+@override_settings(PLAYER_SEARCH_REFRESH_INTERVAL=0)
+class PlayerSearchTests(TestCase):
+    def setUp(self):
+        from players.search import PlayerIndex
+        self.steve = User.objects.create(username='steve', nickname='Steve', qq='10001')
+        self.steven = User.objects.create(username='steven_x', nickname='', qq='10002')
+        self.hero = User.objects.create(username='hb', nickname='Herobrine', qq='20001')
+        self.ghost = User.objects.create(username='stealth', is_active=False)
+        self.index = PlayerIndex()
+
+    def test_prefix_exact_first_and_filters(self):
+        self.assertEqual(self.index.search('Steve'), [self.steve.pk, self.steven.pk])
+        self.assertEqual(self.index.search('ste', include_inactive=True),
+                         [self.ghost.pk, self.steve.pk, self.steven.pk])
+        self.assertEqual(self.index.search('1000'), [])
+        self.assertEqual(self.index.search('1000', with_qq=True), [self.steve.pk, self.steven.pk])
+        self.assertEqual(self.index.search('herobrime'), [])
+        self.assertEqual(self.index.search('herobrime', fuzzy=True), [self.hero.pk])
+
+    def test_incremental_refresh_and_delete(self):
+        self.assertEqual(self.index.search('alex'), [])
+        alex = User.objects.create(username='alex')
+        self.assertEqual(self.index.search('alex'), [alex.pk])
+        self.hero.nickname = 'Notch'
+        self.hero.save()
+        self.assertEqual(self.index.search('notch'), [self.hero.pk])
+        self.assertEqual(self.index.search('herobrine'), [])  # 旧昵称已移出索引
+        alex.delete()
+        self.assertEqual(self.index.search('alex'), [])
+
+    def test_api_and_admin_search(self):
+        from players.search import player_index
+        player_index.rebuild()
+        data = self.client.get('/api/players/search/', {'q': 'her', 'limit': 5}).json()
+        self.assertEqual([p['name'] for p in data['data']], ['Herobrine'])
+        # 匿名用户不能按 QQ 搜索
+        self.assertEqual(self.client.get('/api/players/search/', {'q': '2000'}).json()['data'], [])
+        admin = User.objects.create_superuser('root', 'root@example.com', 'Passw0rd!x')
+        self.client.force_login(admin)
+        response = self.client.get('/admin/players/user/', {'q': '2000'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.hero])
+        # 索引无匹配时回退到子串搜索
+        infix = User.objects.create(username='player_steve_2024', qq='98200017')
+        for term in ('eve_20', '82000'):
+            response = self.client.get('/admin/players/user/', {'q': term})
+            self.assertEqual(list(response.context['cl'].result_list), [infix])
+
+    def test_admin_search_falls_back_when_index_capped(self):
+        from unittest import mock
+        from players.admin import UserAdmin
+        from players.search import player_index
+        player_index.rebuild()
+        admin = User.objects.create_superuser('root', 'root@example.com', 'Passw0rd!x')
+        self.client.force_login(admin)
+        with mock.patch.object(UserAdmin, 'search_index_limit', 1):
+            response = self.client.get('/admin/players/user/', {'q': 'ste'})
+        self.assertEqual(set(response.context['cl'].result_list), {self.steve, self.steven, self.ghost})
+
+    def test_admin_numeric_search_stays_in_index(self):
+        from unittest import mock
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from players.admin import UserAdmin
+        from players.search import player_index
+        player_index.rebuild()
+        admin = User.objects.create_superuser('root', 'root@example.com', 'Passw0rd!x')
+        self.client.force_login(admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/admin/players/user/', {'q': '0001'})
+        self.assertEqual(set(response.context['cl'].result_list), {self.steve, self.hero})
+        self.assertFalse([q for q in ctx.captured_queries if 'LIKE' in q['sql'].upper()])
+        # 超过上限时截断并提示，而不是回退到数据库扫描
+        with mock.patch.object(UserAdmin, 'search_index_limit', 1):
+            response = self.client.get('/admin/players/user/', {'q': '000'})
+        self.assertEqual(len(response.context['cl'].result_list), 1)
+        self.assertIn('匹配结果过多', ' '.join(str(m) for m in response.context['messages']))
@@ -0,0 +1,209 @@
+"""白名单同步：把 ``User.is_whitelisted`` 增量推送到游戏服务器。
+
+每次同步计算期望名单与上次同步结果的差集，只处理新增与移除的名字：
+
+- ``file``：原子替换服务器目录下的 ``whitelist.json``（临时文件 + ``os.replace``），
+  名单未变化时不写文件；
+- ``rcon``：通过复用的 RCON 连接分批发送 ``whitelist add/remove``，
+  上次同步结果保存在缓存中，缺失时以 ``whitelist list`` 的返回为准。
+
+模型变更后由信号调度后台同步，短时间内的多次变更合并为一次。
+"""
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import uuid
+from dataclasses import dataclass, field
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from common.tasks import submit
+
+logger = logging.getLogger("app")
+
+# Minecraft 玩家名规则；不合规的名字跳过，也避免拼接进 RCON 命令
+NAME_RE = re.compile(r"^[A-Za-z0-9_]{3,16}$")
+RCON_SNAPSHOT_KEY = "whitelist:rcon:{host}:{port}"
+
+
+@dataclass
+class SyncResult:
+    mode: str
+    added: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    skipped: list = field(default_factory=list)
+
+    @property
+    def changed(self):
+        return bool(self.added or self.removed)
+
+
+def desired_names():
+    """返回 ({小写名: 名字}, 不合规名字列表)。Minecraft 玩家名不区分大小写。"""
+    from .models import User
+    names, skipped = {}, []
+    rows = User.objects.filter(is_whitelisted=True, is_active=True).values_list("nickname", "username")
+    for nickname, username in rows.iterator(chunk_size=2000):
+        name = nickname or username
+        if NAME_RE.match(name):
+            names.setdefault(name.lower(), name)
+        else:
+            skipped.append(name)
+    return names, skipped
+
+
+def offline_uuid(name):
+    """离线模式 UUID：与服务端 ``UUID.nameUUIDFromBytes("OfflinePlayer:" + name)`` 一致。"""
+    digest = bytearray(md5(f"OfflinePlayer:{name}".encode("utf-8")).digest())
+    digest[6] = (digest[6] & 0x0F) | 0x30
+    digest[8] = (digest[8] & 0x3F) | 0x80
+    return str(uuid.UUID(bytes=bytes(digest)))
+
+
+def _diff(current, desired):
+    added = sorted(desired[k] for k in desired.keys() - current.keys())
+    removed = sorted(current[k] for k in current.keys() - desired.keys())
+    return added, removed
+
+
+class FileTarget:
+    """直接维护服务器的 ``whitelist.json``；已有条目保留原 UUID，新条目使用离线 UUID。
+
+    服务器运行中需执行 ``whitelist reload`` 才会读取文件（配置 RCON 时自动执行）。
+    """
+    mode = "file"
+
+    def __init__(self, path=None):
+        self.path = str(path or getattr(settings, "WHITELIST_FILE", "whitelist.json"))
+
+    def _entries(self):
+        try:
+            with open(self.path, encoding="utf-8") as fp:
+                return {e["name"].lower(): e for e in json.load(fp) if e.get("name")}
+        except FileNotFoundError:
+            return {}
+
+    def sync(self, desired, full=False, dry_run=False):
+        entries = self._entries()
+        added, removed = _diff({k: e["name"] for k, e in entries.items()}, desired)
+        if dry_run or not (added or removed):
+            return added, removed
+        for name in removed:
+            entries.pop(name.lower())
+        for name in added:
+            entries[name.lower()] = {"uuid": offline_uuid(name), "name": name}
+        self._write(sorted(entries.values(), key=lambda e: e["name"].lower()))
+        if getattr(settings, "MC_RCON_HOST", ""):
+            try:
+                from common.rcon import get_client
+                get_client().command("whitelist reload")
+            except Exception as e:
+                logger.warning("whitelist.json 已更新，但 RCON reload 失败：%s", e)
+        return added, removed
+
+    def _write(self, entries):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".whitelist-", suffix=".json", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fp:
+                json.dump(entries, fp, ensure_ascii=False, indent=2)
+                fp.flush()
+                os.fsync(fp.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+
+class RconTarget:
+    mode = "rcon"
+
+    def __init__(self, client=None, batch_size=None):
+        from common.rcon import get_client
+        self.client = client or get_client()
+        self.batch_size = batch_size or getattr(settings, "WHITELIST_RCON_BATCH", 50)
+        self.snapshot_key = RCON_SNAPSHOT_KEY.format(host=self.client.host, port=self.client.port)
+
+    def server_names(self):
+        """解析 ``whitelist list`` 的返回，如 ``There are 2 whitelisted player(s): Steve, Alex``。"""
+        reply = self.client.command("whitelist list")
+        _, sep, tail = reply.partition(":")
+        names = [n.strip() for n in tail.split(",")] if sep else []
+        return {n.lower(): n for n in names if n}
+
+    def sync(self, desired, full=False, dry_run=False):
+        current = None if full else cache.get(self.snapshot_key)
+        if current is None:
+            current = self.server_names()
+        added, removed = _diff(current, desired)
+        if dry_run:
+            return added, removed
+        commands = [f"whitelist remove {n}" for n in removed] + [f"whitelist add {n}" for n in added]
+        for start in range(0, len(commands), self.batch_size):
+            self.client.run(*commands[start:start + self.batch_size])
+        cache.set(self.snapshot_key, desired, timeout=None)
+        return added, removed
+
+
+def get_target(mode=None):
+    mode = mode or getattr(settings, "WHITELIST_SYNC_MODE", "")
+    if mode == "file":
+        return FileTarget()
+    if mode == "rcon":
+        return RconTarget()
+    raise ValueError(f"未知的白名单同步方式: {mode!r}（可选 file / rcon）")
+
+
+def sync_whitelist(mode=None, full=False, dry_run=False, target=None):
+    """执行一次增量同步。``full`` 为真时忽略缓存的上次结果，以服务器现状为准。"""
+    target = target or get_target(mode)
+    desired, skipped = desired_names()
+    added, removed = target.sync(desired, full=full, dry_run=dry_run)
+    result = SyncResult(target.mode, added, removed, skipped)
+    if skipped:
+        logger.warning("白名单同步：跳过 %d 个不合规的玩家名：%s", len(skipped), ", ".join(skipped[:20]))
+    if result.changed and not dry_run:
+        logger.info("白名单同步（%s）：新增 %d，移除 %d", target.mode, len(added), len(removed))
+    return result
+
+
+_pending = False
+_pending_lock = threading.Lock()
+# 后台线程池可能同时运行两次同步：串行执行，避免交错写文件/快照
+_sync_lock = threading.Lock()
+
+
+def _run_scheduled():
+    global _pending
+    with _pending_lock:
+        _pending = False
+    try:
+        with _sync_lock:
+            sync_whitelist()
+    except Exception:
+        logger.exception("白名单后台同步失败")
+
+
+def _submit_once():
+    global _pending
+    with _pending_lock:
+        if _pending:
+            return
+        _pending = True
+    submit(_run_scheduled)
+
+
+def schedule_sync():
+    """事务提交后在后台同步一次；已有待执行的同步时不重复提交（事务回滚则不同步）。"""
+    if getattr(settings, "WHITELIST_SYNC_MODE", ""):
+        transaction.on_commit(_submit_once)